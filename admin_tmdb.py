@@ -3,12 +3,14 @@ import requests
 import json
 import os
 import re
-import urllib.request
 import logging
 import sys
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+import cache_tmdb
+import cliente_http
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -31,9 +33,12 @@ class TMDbAPI:
         self.base_url = "https://api.themoviedb.org/3"
 
     def _make_request(self, endpoint: str, params: dict = None) -> dict:
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint: str, params: dict = None) -> dict:
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -62,19 +67,15 @@ class TMDbAPI:
         """Obtiene detalles de una película de TMDB por ID"""
         logger.info(f"Obteniendo detalles para la película ID: {movie_id}")
 
-        details = self._make_request(f"movie/{movie_id}", params={"language": language})
+        # Detalles y créditos en una sola petición
+        details = self._make_request(f"movie/{movie_id}", params={"language": language, "append_to_response": "credits"})
         if not details:
             if language == "es":
                 logger.info("Intentando obtener detalles en inglés...")
                 return self.get_movie_details(movie_id, "en")
             return {}
 
-        credits = self._make_request(f"movie/{movie_id}/credits", params={"language": language})
-        if not credits and language == "es":
-            credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
-
-        if not credits:
-            credits = {"cast": [], "crew": []}
+        credits = details.get("credits") or {"cast": [], "crew": []}
 
         return {
             "id": details.get("id"),
@@ -102,7 +103,7 @@ class TMDbAPI:
         ruta_imagen = os.path.join('imagenes_filmoteca', nombre_archivo)
 
         try:
-            urllib.request.urlretrieve(poster_url, ruta_imagen)
+            cliente_http.descargar_archivo(poster_url, ruta_imagen)
             logger.info(f"Poster guardado en: {ruta_imagen}")
             return ruta_imagen
         except Exception as e:
@@ -3,10 +3,15 @@ from dotenv import load_dotenv
 import os
 import json
 import requests
-import urllib.request
 import re
+import time
 from datetime import datetime
 
+import busqueda_criticas
+import cache_tmdb
+import ficha_tecnica
+import cliente_http
+
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
@@ -37,9 +42,12 @@ class TMDbAPI:
         self.base_url = "https://api.themoviedb.org/3"
 
     def _make_request(self, endpoint, params=None):
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint, params=None):
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -60,18 +68,14 @@ class TMDbAPI:
 
     def get_movie_details(self, movie_id, language="es"):
         """Obtiene detalles de una película de TMDB por ID"""
-        details = self._make_request(f"movie/{movie_id}", params={"language": language})
+        # Detalles y créditos en una sola petición
+        details = self._make_request(f"movie/{movie_id}", params={"language": language, "append_to_response": "credits"})
         if not details:
             if language == "es":
                 return self.get_movie_details(movie_id, "en")
             return {}
         
-        credits = self._make_request(f"movie/{movie_id}/credits", params={"language": language})
-        if not credits and language == "es":
-            credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
-        
-        if not credits:
-            credits = {"cast": [], "crew": []}
+        credits = details.get("credits") or {"cast": [], "crew": []}
         
         return {
             "id": details.get("id"),
@@ -96,7 +100,7 @@ class TMDbAPI:
         ruta_imagen = os.path.join('imagenes_filmoteca', nombre_archivo)
         
         try:
-            urllib.request.urlretrieve(poster_url, ruta_imagen)
+            cliente_http.descargar_archivo(poster_url, ruta_imagen)
             return ruta_imagen
         except Exception as e:
             print(f"Error al descargar el póster: {str(e)}")
@@ -650,6 +654,40 @@ def buscar():
     resultados = tmdb_api.search_movies(query)
     return render_template('resultados.html', resultados=resultados, query=query)
 
+@app.route('/api/criticas')
+def api_criticas():
+    """Busca en las críticas de Ghost in the Blog (JSON): ?q=texto&limite=20"""
+    consulta = request.args.get('q', '').strip()
+    limite = max(1, min(request.args.get('limite', 20, type=int), 100))
+    if not consulta:
+        return jsonify({"error": "Falta el parámetro q"}), 400
+    
+    inicio = time.perf_counter()
+    resultados = busqueda_criticas.obtener_indice().buscar(consulta, limite=limite)
+    return jsonify({
+        "consulta": consulta,
+        "resultados": resultados,
+        "total": len(resultados),
+        "ms": round((time.perf_counter() - inicio) * 1000, 1)
+    })
+
+@app.route('/api/criticas/facetas')
+def api_facetas_criticas():
+    """
+    Lista las críticas filtradas por ficha técnica (?director=&pais=&año=&duracion=) y cuenta,
+    para cada faceta, cuántas hay por valor entre las filtradas
+    """
+    filtros = {faceta: request.args.get(faceta) or None for faceta in ficha_tecnica.FACETAS}
+    limite = max(1, min(request.args.get('limite', 100, type=int), 100))
+    facetas = ficha_tecnica.obtener_indice()
+    resultados = facetas.listar(**filtros)
+    return jsonify({
+        "filtros": {faceta: valor for faceta, valor in filtros.items() if valor},
+        "total": len(resultados),
+        "resultados": resultados[:limite],
+        "facetas": {faceta: facetas.contar(faceta, **filtros) for faceta in ficha_tecnica.FACETAS}
+    })
+
 @app.route('/pelicula/<int:movie_id>')
 def detalles(movie_id):
     """Muestra los detalles de una película y permite añadirla"""
@@ -819,6 +857,13 @@ def inicializar_aplicacion():
         with open('peliculas_filmoteca.json', 'w', encoding='utf-8') as f:
             json.dump([], f)
 
+    # Los scrapers mantienen al día los índices de las críticas al terminar cada ejecución;
+    # aquí solo se añade una vez lo que falte, para no recorrer el archivo en cada petición
+    busqueda_criticas.obtener_indice().sincronizar()
+    facetas = ficha_tecnica.obtener_indice()
+    facetas.sincronizar()
+    facetas.guardar()
+
 # Punto de entrada principal
 if __name__ == "__main__":
     # Verificar que existe TMDB_API_KEY
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Archivo empaquetado de las críticas de Ghost in the Blog.
+Los posts se guardan como líneas JSON añadidas al final de segmentos (archivo_posts/*.jsonl)
+y un índice compacto guarda, por id de post, el segmento, la posición y la longitud de su
+línea. La lectura de un post es un acceso directo sobre el segmento mapeado en memoria, y
+recorrer el archivo entero es leer unos pocos archivos secuencialmente, en lugar de abrir
+miles de JSON sueltos. Si el índice falta o no corresponde a los segmentos se reconstruye
+recorriéndolos.
+
+El id de un post es el nombre que tenía su archivo en posts/ sin la extensión, así que
+exportar regenera la estructura anterior (un JSON por post) para quien la siga usando.
+
+Uso:
+    python archivo_posts.py info
+    python archivo_posts.py leer "BLADE_RUNNER_2017-10-05"
+    python archivo_posts.py importar [--directorio posts]
+    python archivo_posts.py exportar [--directorio posts] [--todos]
+    python archivo_posts.py compactar
+"""
+
+import os
+import sys
+import glob
+import json
+import mmap
+import logging
+import argparse
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_ARCHIVO = "archivo_posts"
+DIRECTORIO_POSTS = "posts"
+ARCHIVO_INDICE = "indice.json"
+# Al superar este tamaño se empieza un segmento nuevo
+TAMANO_MAXIMO_SEGMENTO = 4 * 1024 * 1024
+
+_archivo = None
+_lock_archivo = threading.Lock()
+
+
+def id_post(pelicula: str, fecha: str) -> str:
+    """Id de un post a partir de la película y la fecha (ISO) del post"""
+    return f"{pelicula.replace(' ', '_')}_{fecha[:10]}"
+
+
+def id_de(post_data: dict) -> str:
+    return id_post(post_data['pelicula'], post_data['date'])
+
+
+def nombre_archivo(id_: str) -> str:
+    """Nombre del JSON suelto de un post al exportar (sin barras, que no valen en un nombre de archivo)"""
+    return f"{id_.replace('/', '-')}.json"
+
+
+def _nombre_segmento(numero: int) -> str:
+    return f"segmento_{numero:04d}.jsonl"
+
+
+class ArchivoPosts:
+    def __init__(self, directorio: str = DIRECTORIO_ARCHIVO):
+        self.directorio = directorio
+        self._lock = threading.Lock()
+        # id -> (número de segmento, posición, longitud)
+        self._posiciones: Dict[str, Tuple[int, int, int]] = {}
+        # Tamaño en bytes de cada segmento, por número
+        self._tamanos: Dict[int, int] = {}
+        self._mapas: Dict[int, mmap.mmap] = {}
+        self._indice_pendiente = False
+        os.makedirs(directorio, exist_ok=True)
+        self._cargar_indice()
+
+    def _ruta_segmento(self, numero: int) -> str:
+        return os.path.join(self.directorio, _nombre_segmento(numero))
+
+    def _segmentos_en_disco(self) -> Dict[int, int]:
+        segmentos = {}
+        for ruta in glob.glob(os.path.join(self.directorio, "segmento_*.jsonl")):
+            numero = int(os.path.basename(ruta)[len("segmento_"):-len(".jsonl")])
+            segmentos[numero] = os.path.getsize(ruta)
+        return segmentos
+
+    def _cargar_indice(self):
+        en_disco = self._segmentos_en_disco()
+        try:
+            with open(os.path.join(self.directorio, ARCHIVO_INDICE), 'r', encoding='utf-8') as f:
+                guardado = json.load(f)
+            tamanos = {int(numero): tamano for numero, tamano in guardado["segmentos"].items()}
+        except (OSError, json.JSONDecodeError, KeyError, ValueError):
+            guardado, tamanos = None, None
+
+        if guardado is not None and tamanos == en_disco:
+            self._tamanos = tamanos
+            self._posiciones = {id_: tuple(posicion) for id_, posicion in guardado["posts"].items()}
+            return
+        if en_disco:
+            logger.info("El índice del archivo de posts no corresponde a los segmentos; reconstruyéndolo")
+            self.reconstruir_indice()
+
+    def reconstruir_indice(self):
+        """Recorre los segmentos y vuelve a calcular la posición de cada post (gana la última versión)"""
+        with self._lock:
+            self._cerrar_mapas()
+            self._posiciones = {}
+            self._tamanos = self._segmentos_en_disco()
+            for numero in sorted(self._tamanos):
+                for posicion, linea in self._lineas(numero):
+                    try:
+                        post_data = json.loads(linea)
+                    except json.JSONDecodeError:
+                        # Línea a medio escribir por una ejecución interrumpida
+                        logger.warning(f"Línea ilegible en {_nombre_segmento(numero)}, posición {posicion}")
+                        continue
+                    self._posiciones[id_de(post_data)] = (numero, posicion, len(linea))
+            self._indice_pendiente = True
+        logger.info(f"Índice del archivo de posts reconstruido con {len(self._posiciones)} posts")
+
+    def _lineas(self, numero: int) -> Iterator[Tuple[int, bytes]]:
+        """(posición, línea sin salto) de cada línea de un segmento"""
+        posicion = 0
+        with open(self._ruta_segmento(numero), 'rb') as f:
+            for linea in f:
+                contenido = linea.rstrip(b'\n')
+                if contenido:
+                    yield posicion, contenido
+                posicion += len(linea)
+
+    def _escribir_indice(self):
+        ruta = os.path.join(self.directorio, ARCHIVO_INDICE)
+        ruta_temporal = f"{ruta}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                "segmentos": {str(numero): tamano for numero, tamano in sorted(self._tamanos.items())},
+                "posts": {id_: list(posicion) for id_, posicion in sorted(self._posiciones.items())},
+            }, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(ruta_temporal, ruta)
+        self._indice_pendiente = False
+
+    def guardar(self):
+        """Escribe el índice de posiciones si ha cambiado"""
+        with self._lock:
+            if self._indice_pendiente:
+                self._escribir_indice()
+
+    def __len__(self) -> int:
+        return len(self._posiciones)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._posiciones
+
+    def ids(self) -> List[str]:
+        return list(self._posiciones)
+
+    def _mapa(self, numero: int) -> mmap.mmap:
+        mapa = self._mapas.get(numero)
+        if mapa is None:
+            with open(self._ruta_segmento(numero), 'rb') as f:
+                mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapas[numero] = mapa
+        return mapa
+
+    def _cerrar_mapas(self):
+        for mapa in self._mapas.values():
+            mapa.close()
+        self._mapas = {}
+
+    def leer(self, id_: str) -> Optional[dict]:
+        """Post con el id dado, o None si no está en el archivo"""
+        with self._lock:
+            posicion = self._posiciones.get(id_)
+            if posicion is None:
+                return None
+            numero, inicio, longitud = posicion
+            linea = self._mapa(numero)[inicio:inicio + longitud]
+        return json.loads(linea)
+
+    def recorrer(self) -> Iterator[dict]:
+        """Todos los posts (la versión vigente de cada uno), leyendo los segmentos en orden"""
+        with self._lock:
+            vigentes = {(numero, inicio) for numero, inicio, _ in self._posiciones.values()}
+            numeros = sorted(self._tamanos)
+        for numero in numeros:
+            for inicio, linea in self._lineas(numero):
+                if (numero, inicio) in vigentes:
+                    yield json.loads(linea)
+
+    def añadir(self, post_data: dict) -> str:
+        """Añade un post al final del último segmento y devuelve su id"""
+        id_ = id_de(post_data)
+        linea = json.dumps(post_data, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            numero = max(self._tamanos, default=0)
+            if not self._tamanos or self._tamanos[numero] >= TAMANO_MAXIMO_SEGMENTO:
+                numero += 1
+                self._tamanos[numero] = 0
+            inicio = self._tamanos[numero]
+            with open(self._ruta_segmento(numero), 'ab') as f:
+                f.write(linea + b'\n')
+            mapa = self._mapas.pop(numero, None)
+            if mapa is not None:
+                # El segmento ha crecido: se vuelve a mapear en la siguiente lectura
+                mapa.close()
+            self._tamanos[numero] = inicio + len(linea) + 1
+            self._posiciones[id_] = (numero, inicio, len(linea))
+            self._indice_pendiente = True
+        return id_
+
+    def compactar(self) -> int:
+        """
+        Reescribe el archivo con solo la versión vigente de cada post y devuelve los bytes
+        liberados. Los segmentos nuevos se numeran a continuación de los actuales y los antiguos
+        se borran después de escribir el índice: si se interrumpe a medias, al abrir el archivo
+        se reconstruye el índice y, como los segmentos nuevos van detrás, ganan sus versiones.
+        """
+        with self._lock:
+            if not self._posiciones:
+                return 0
+            antiguos = sorted(self._tamanos)
+            tamano_anterior = sum(self._tamanos.values())
+            numero = max(antiguos, default=0) + 1
+            posiciones: Dict[str, Tuple[int, int, int]] = {}
+            tamanos: Dict[int, int] = {numero: 0}
+            salida = open(self._ruta_segmento(numero), 'wb')
+            try:
+                for id_, (segmento, inicio, longitud) in sorted(self._posiciones.items(), key=lambda x: x[1]):
+                    if tamanos[numero] >= TAMANO_MAXIMO_SEGMENTO:
+                        salida.close()
+                        numero += 1
+                        tamanos[numero] = 0
+                        salida = open(self._ruta_segmento(numero), 'wb')
+                    salida.write(self._mapa(segmento)[inicio:inicio + longitud] + b'\n')
+                    posiciones[id_] = (numero, tamanos[numero], longitud)
+                    tamanos[numero] += longitud + 1
+            finally:
+                salida.close()
+            self._cerrar_mapas()
+            self._posiciones, self._tamanos = posiciones, tamanos
+            self._escribir_indice()
+            for antiguo in antiguos:
+                os.remove(self._ruta_segmento(antiguo))
+        liberados = tamano_anterior - sum(tamanos.values())
+        logger.info(f"Archivo de posts compactado: {len(posiciones)} posts en {len(tamanos)} segmentos, "
+                    f"{liberados / 1024 / 1024:.1f} MB liberados")
+        return liberados
+
+    def importar_directorio(self, directorio: str = DIRECTORIO_POSTS) -> int:
+        """Añade los JSON sueltos de un directorio que aún no estén en el archivo, por orden de fecha"""
+        with self._lock:
+            conocidos = {f"{nombre_archivo(id_)}.json" for id_ in self._posiciones}
+        posts = []
+        for ruta in glob.glob(os.path.join(directorio, "*.json")):
+            if os.path.basename(ruta) in conocidos:
+                continue
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    posts.append(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"No se pudo importar {ruta}: {e}")
+        importados = 0
+        for post_data in sorted(posts, key=lambda p: (p.get('date', ''), p.get('pelicula', ''))):
+            if id_de(post_data) not in self:
+                self.añadir(post_data)
+                importados += 1
+        self.guardar()
+        if importados:
+            logger.info(f"Importados {importados} posts de {directorio}/ al archivo")
+        return importados
+
+    def exportar(self, directorio: str = DIRECTORIO_POSTS, todos: bool = False,
+                 ids: Optional[Set[str]] = None) -> int:
+        """
+        Escribe cada post (o solo los de ids) como JSON suelto (posts/<id>.json); sin todos, solo
+        los que faltan
+        """
+        os.makedirs(directorio, exist_ok=True)
+        exportados = 0
+        for post_data in self.recorrer():
+            id_ = id_de(post_data)
+            if ids is not None and id_ not in ids:
+                continue
+            ruta = os.path.join(directorio, nombre_archivo(id_))
+            if not todos and os.path.exists(ruta):
+                continue
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(post_data, f, ensure_ascii=False, indent=4)
+            exportados += 1
+        logger.info(f"Exportados {exportados} posts a {directorio}/")
+        return exportados
+
+    def cerrar(self):
+        self.guardar()
+        with self._lock:
+            self._cerrar_mapas()
+
+
+def abrir() -> ArchivoPosts:
+    """
+    Archivo de posts del proceso. posts/ es la copia que se guarda en git y el archivo, una copia
+    local: al abrirlo se importan los JSON sueltos que aún no tenga (todos, la primera vez).
+    """
+    global _archivo
+    with _lock_archivo:
+        if _archivo is None:
+            _archivo = ArchivoPosts(os.getenv("ARCHIVO_POSTS_DIR", DIRECTORIO_ARCHIVO))
+            if os.path.isdir(DIRECTORIO_POSTS):
+                _archivo.importar_directorio(DIRECTORIO_POSTS)
+        return _archivo
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Archivo empaquetado de las críticas de Ghost in the Blog")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("info", help="Número de posts y segmentos del archivo")
+    leer = subparsers.add_parser("leer", help="Mostrar un post por su id")
+    leer.add_argument("id")
+    importar = subparsers.add_parser("importar", help="Añadir al archivo los JSON sueltos de un directorio")
+    importar.add_argument("--directorio", default=DIRECTORIO_POSTS)
+    exportar = subparsers.add_parser("exportar", help="Regenerar un JSON suelto por post")
+    exportar.add_argument("--directorio", default=DIRECTORIO_POSTS)
+    exportar.add_argument("--todos", action="store_true", help="Reescribir también los que ya existen")
+    subparsers.add_parser("compactar", help="Reescribir los segmentos sin las versiones sustituidas de los posts")
+    args = parser.parse_args()
+
+    archivo = ArchivoPosts(os.getenv("ARCHIVO_POSTS_DIR", DIRECTORIO_ARCHIVO))
+    try:
+        if args.comando == "info":
+            print(f"{len(archivo)} posts en {len(archivo._tamanos)} segmentos ({archivo.directorio}/)")
+        elif args.comando == "leer":
+            post_data = archivo.leer(args.id)
+            if post_data is None:
+                logger.error(f"No hay ningún post con id {args.id}")
+                return 1
+            print(json.dumps(post_data, ensure_ascii=False, indent=4))
+        elif args.comando == "importar":
+            archivo.importar_directorio(args.directorio)
+        elif args.comando == "exportar":
+            archivo.exportar(args.directorio, todos=args.todos)
+        elif args.comando == "compactar":
+            archivo.compactar()
+    finally:
+        archivo.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Mide los scrapers de forma reproducible con la cassette HTTP de cliente_http.
+Primero se graba una ejecución real de cada scraper y después se reproduce tantas veces
+como se quiera sin red, con latencia simulada opcional. Cada ejecución se hace en un
+directorio temporal con copia de los JSON de entrada, de modo que no se tocan los datos
+del repositorio, y con cachés vacías para que grabación y reproducción hagan exactamente
+las mismas peticiones. La fecha de grabación de cada scraper se guarda en los metadatos de la
+cassette y al reproducir se fija como "hoy" (GOLEM_TODAY), porque Golem pide las páginas de
+los próximos días y en otra fecha pediría páginas que no están grabadas.
+
+Uso:
+    python benchmark_scrapers.py grabar golem yelmo filmoteca estrenos
+    python benchmark_scrapers.py reproducir --latencia-ms 50 --repeticiones 3
+"""
+
+import os
+import sys
+import glob
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import date
+
+import cliente_http
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_REPO = os.path.dirname(os.path.abspath(__file__))
+
+SCRAPERS = {
+    "golem": ["scraping_golem.py"],
+    "yelmo": ["scraping_yelmo.py"],
+    "filmoteca": ["scraper_modificado.py", "--archivo_salida=peliculas_filmoteca_scraping.json"],
+    "estrenos": ["proximos_estrenos.py", "--max-pages=10"],
+    "ghost": ["scrape_ghostintheblog.py"],
+}
+
+
+def preparar_directorio() -> str:
+    """Crea un directorio de trabajo temporal con copia de los JSON de entrada del repositorio"""
+    directorio = tempfile.mkdtemp(prefix="benchmark_scrapers_")
+    for ruta in glob.glob(os.path.join(DIRECTORIO_REPO, "*.json")):
+        # La memoria de resoluciones se deja fuera: cada ejecución empieza sin ella
+        if os.path.basename(ruta) != "resoluciones_tmdb.json":
+            shutil.copy(ruta, directorio)
+    return directorio
+
+
+def ejecutar(nombre: str, modo: str, directorio_cassette: str, latencia_ms: float) -> tuple:
+    """Ejecuta un scraper en un directorio temporal y devuelve (segundos, código de salida)"""
+    directorio = preparar_directorio()
+    metadatos = cliente_http.leer_metadatos_cassette(directorio_cassette)
+    if modo == "grabar":
+        fecha = date.today().isoformat()
+    else:
+        fecha = metadatos.get("fechas", {}).get(nombre)
+        if fecha is None:
+            logger.warning(f"La cassette no tiene la fecha de grabación de {nombre}; se usa la de hoy")
+    entorno = dict(
+        os.environ,
+        HTTP_CASSETTE=modo,
+        HTTP_CASSETTE_DIR=directorio_cassette,
+        HTTP_CASSETTE_LATENCIA_MS=str(latencia_ms),
+        TMDB_CACHE_RUTA=":memory:",
+    )
+    if fecha:
+        entorno["GOLEM_TODAY"] = fecha
+    if modo == "reproducir":
+        # La clave no viaja en la cassette; basta con que exista
+        entorno.setdefault("TMDB_API_KEY", "reproduccion")
+    comando = [sys.executable, os.path.join(DIRECTORIO_REPO, SCRAPERS[nombre][0])] + SCRAPERS[nombre][1:]
+    try:
+        inicio = time.perf_counter()
+        resultado = subprocess.run(comando, cwd=directorio, env=entorno,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if modo == "grabar":
+            metadatos.setdefault("fechas", {})[nombre] = fecha
+            cliente_http.guardar_metadatos_cassette(metadatos, directorio_cassette)
+        return time.perf_counter() - inicio, resultado.returncode
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grabar y reproducir ejecuciones de los scrapers para medirlas")
+    parser.add_argument("modo", choices=cliente_http.MODOS_CASSETTE)
+    parser.add_argument("scrapers", nargs="*", help=f"Scrapers a ejecutar: {', '.join(SCRAPERS)} (por defecto, todos)")
+    parser.add_argument("--cassette", default=os.path.join(DIRECTORIO_REPO, cliente_http.DIRECTORIO_CASSETTE),
+                        help="Directorio de la cassette")
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="Latencia simulada por petición al reproducir")
+    parser.add_argument("--repeticiones", type=int, default=1, help="Ejecuciones por scraper al reproducir")
+    args = parser.parse_args()
+
+    directorio_cassette = os.path.abspath(args.cassette)
+    repeticiones = args.repeticiones if args.modo == "reproducir" else 1
+    scrapers = args.scrapers or list(SCRAPERS)
+    desconocidos = [nombre for nombre in scrapers if nombre not in SCRAPERS]
+    if desconocidos:
+        parser.error(f"Scrapers desconocidos: {', '.join(desconocidos)}")
+
+    print(f"{'scraper':<10} {'mediana (s)':>12} {'mín (s)':>10} {'máx (s)':>10}  códigos")
+    for nombre in scrapers:
+        logger.info(f"{args.modo.capitalize()} {nombre} ({repeticiones} ejecuciones)")
+        tiempos, codigos = [], []
+        for _ in range(repeticiones):
+            segundos, codigo = ejecutar(nombre, args.modo, directorio_cassette, args.latencia_ms)
+            tiempos.append(segundos)
+            codigos.append(codigo)
+        print(f"{nombre:<10} {statistics.median(tiempos):>12.2f} {min(tiempos):>10.2f} {max(tiempos):>10.2f}  {codigos}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de texto completo en las críticas de Ghost in the Blog.
+Las críticas se indexan en una base SQLite con FTS5 (tokenizador unicode61 sin tildes, de modo
+que "accion" encuentra "acción") separando película, director, ficha técnica y crítica, para
+ordenar los resultados por relevancia dando más peso al título y al director. Los scrapers
+indexan los posts nuevos al terminar con sincronizar(), que añade los que falten del archivo de posts.
+
+Uso:
+    python busqueda_criticas.py buscar "Kubrick plano secuencia" [--limite 10]
+    python busqueda_criticas.py sincronizar
+    python busqueda_criticas.py reconstruir
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from typing import List, Optional
+
+import archivo_posts
+
+logger = logging.getLogger(__name__)
+
+RUTA_INDICE_POR_DEFECTO = os.path.join("cache", "criticas.sqlite")
+
+SEPARADOR_CRITICA = "CRÍTICA:"
+# Pesos de bm25 para (película, director, ficha técnica, crítica)
+PESOS_COLUMNAS = (10.0, 5.0, 2.0, 1.0)
+# Palabras de contexto alrededor de las coincidencias en el fragmento
+PALABRAS_FRAGMENTO = 24
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT UNIQUE NOT NULL,
+    titulo TEXT,
+    fecha TEXT,
+    url TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS criticas USING fts5(
+    pelicula, director, ficha, critica,
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _consulta_fts(texto: str) -> str:
+    """
+    Convierte lo que escribe el usuario en una consulta MATCH: todas las palabras (o frases
+    entre comillas) deben aparecer, y una palabra terminada en * busca por prefijo.
+    """
+    terminos = []
+    for termino in re.findall(r'"[^"]+"|\S+', texto):
+        prefijo = termino.endswith("*") and not termino.startswith('"')
+        termino = termino.strip('"*')
+        if termino:
+            terminos.append('"' + termino.replace('"', '""') + '"' + ("*" if prefijo else ""))
+    return " ".join(terminos)
+
+
+def separar_contenido(contenido: str) -> tuple:
+    """(ficha técnica, crítica) de un post; sin separador, todo es crítica"""
+    ficha, separador, critica = (contenido or "").partition(SEPARADOR_CRITICA)
+    if not separador:
+        return "", ficha.strip()
+    return ficha.strip(), critica.strip()
+
+
+class BusquedaCriticas:
+    def __init__(self, ruta: str = RUTA_INDICE_POR_DEFECTO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.executescript(_ESQUEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def _indexar(self, post_data: dict):
+        id_ = archivo_posts.id_de(post_data)
+        self._conexion.execute(
+            "INSERT INTO posts (id, titulo, fecha, url) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET titulo = excluded.titulo, fecha = excluded.fecha, url = excluded.url",
+            (id_, post_data.get('title'), (post_data.get('date') or '')[:10], post_data.get('url'))
+        )
+        rowid = self._conexion.execute("SELECT rowid FROM posts WHERE id = ?", (id_,)).fetchone()[0]
+        ficha, critica = separar_contenido(post_data.get('content'))
+        self._conexion.execute("DELETE FROM criticas WHERE rowid = ?", (rowid,))
+        self._conexion.execute(
+            "INSERT INTO criticas (rowid, pelicula, director, ficha, critica) VALUES (?, ?, ?, ?, ?)",
+            (rowid, post_data.get('pelicula'), post_data.get('director'), ficha, critica)
+        )
+
+    def indexar(self, *posts: dict):
+        """Añade (o actualiza) uno o varios posts en el índice, en una sola transacción"""
+        with self._lock:
+            with self._conexion:
+                for post_data in posts:
+                    self._indexar(post_data)
+
+    def sincronizar(self, archivo: Optional[archivo_posts.ArchivoPosts] = None) -> int:
+        """Indexa los posts del archivo que aún no están en el índice; devuelve cuántos"""
+        archivo = archivo or archivo_posts.abrir()
+        with self._lock:
+            indexados = {fila[0] for fila in self._conexion.execute("SELECT id FROM posts")}
+            faltan = [id_ for id_ in archivo.ids() if id_ not in indexados]
+            if not faltan:
+                return 0
+            with self._conexion:
+                for id_ in faltan:
+                    self._indexar(archivo.leer(id_))
+                self._conexion.execute("INSERT INTO criticas(criticas) VALUES ('optimize')")
+        logger.info(f"Índice de críticas: {len(faltan)} posts indexados")
+        return len(faltan)
+
+    def reconstruir(self, archivo: Optional[archivo_posts.ArchivoPosts] = None) -> int:
+        """Vacía el índice y vuelve a indexar todo el archivo de posts"""
+        with self._lock:
+            with self._conexion:
+                self._conexion.execute("DELETE FROM posts")
+                self._conexion.execute("DELETE FROM criticas")
+        return self.sincronizar(archivo)
+
+    def buscar(self, consulta: str, limite: int = 20, marca_inicio: str = "<mark>",
+               marca_fin: str = "</mark>") -> List[dict]:
+        """
+        Críticas que contienen todas las palabras de la consulta, de más a menos relevante.
+        Cada resultado incluye id, título, película, director, fecha, url, puntuación (bm25,
+        más baja es mejor) y un fragmento con las coincidencias entre marca_inicio y marca_fin.
+        """
+        expresion = _consulta_fts(consulta)
+        if not expresion:
+            return []
+        pesos = ", ".join(str(peso) for peso in PESOS_COLUMNAS)
+        with self._lock:
+            filas = self._conexion.execute(
+                f"SELECT p.id, p.titulo, c.pelicula, c.director, p.fecha, p.url, bm25(criticas, {pesos}) AS puntuacion, "
+                f"snippet(criticas, -1, ?, ?, '…', ?) "
+                f"FROM criticas c JOIN posts p ON p.rowid = c.rowid "
+                f"WHERE criticas MATCH ? ORDER BY puntuacion LIMIT ?",
+                (marca_inicio, marca_fin, PALABRAS_FRAGMENTO, expresion, limite)
+            ).fetchall()
+        return [
+            {"id": id_, "titulo": titulo, "pelicula": pelicula, "director": director, "fecha": fecha,
+             "url": url, "puntuacion": round(puntuacion, 4), "fragmento": fragmento}
+            for id_, titulo, pelicula, director, fecha, url, puntuacion, fragmento in filas
+        ]
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+_indice_compartido = None
+_lock_creacion = threading.Lock()
+
+
+def obtener_indice() -> BusquedaCriticas:
+    """Índice de críticas compartido del proceso (CRITICAS_INDICE_RUTA permite cambiar la ruta)"""
+    global _indice_compartido
+    with _lock_creacion:
+        if _indice_compartido is None:
+            _indice_compartido = BusquedaCriticas(os.getenv("CRITICAS_INDICE_RUTA", RUTA_INDICE_POR_DEFECTO))
+        return _indice_compartido
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Búsqueda de texto completo en las críticas de Ghost in the Blog")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    buscar = subparsers.add_parser("buscar", help="Buscar en las críticas")
+    buscar.add_argument("consulta")
+    buscar.add_argument("--limite", type=int, default=10)
+    subparsers.add_parser("sincronizar", help="Indexar los posts del archivo que falten")
+    subparsers.add_parser("reconstruir", help="Volver a indexar todo el archivo de posts")
+    args = parser.parse_args()
+
+    indice = obtener_indice()
+    if args.comando == "reconstruir":
+        indice.reconstruir()
+        return 0
+    indice.sincronizar()
+    if args.comando == "sincronizar":
+        return 0
+
+    inicio = time.perf_counter()
+    resultados = indice.buscar(args.consulta, limite=args.limite, marca_inicio="[", marca_fin="]")
+    duracion = (time.perf_counter() - inicio) * 1000
+    for r in resultados:
+        print(f"{r['puntuacion']:>8.2f}  {r['fecha']}  {r['titulo']}")
+        print(f"          {r['fragmento']}")
+    print(f"{len(resultados)} resultados en {duracion:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Caché en disco de páginas HTML con revalidación.
+Guarda el cuerpo de cada página junto con su ETag, Last-Modified y un hash del contenido,
+y en la siguiente descarga envía una petición condicional. Si el servidor responde 304, o
+devuelve exactamente el mismo cuerpo, la página se marca como no modificada para que el
+llamador pueda saltarse el parseo y reutilizar lo que derivó de ella la vez anterior
+(guardado con guardar_derivado y ligado a la versión de la página).
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+import cliente_http
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_CACHE = os.path.join("cache", "html")
+
+_lock = threading.Lock()
+
+
+@dataclass
+class Pagina:
+    url: str
+    texto: str
+    modificada: bool
+    # Hash del cuerpo: identifica la versión de la página para los datos derivados
+    version: str
+    # URL tras las redirecciones
+    url_final: Optional[str] = None
+
+
+def _activa() -> bool:
+    return os.getenv("HTML_CACHE_DESACTIVADA") != "1"
+
+
+def _ruta(clave: str, subdirectorio: str) -> str:
+    huella = hashlib.sha256(clave.encode("utf-8")).hexdigest()
+    return os.path.join(DIRECTORIO_CACHE, subdirectorio, f"{huella}.json")
+
+
+def _leer(ruta: str) -> Optional[dict]:
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _escribir(ruta: str, datos: dict):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    ruta_temporal = f"{ruta}.{threading.get_ident()}.tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(ruta_temporal, ruta)
+
+
+def obtener(url: str, **kwargs) -> Pagina:
+    """
+    Descarga una página con una petición condicional a partir de la versión guardada.
+    Lanza requests.exceptions.RequestException (incluido HTTPError) igual que cliente_http.
+    """
+    ruta = _ruta(url, urlsplit(url).hostname or "sin_host")
+    guardada = _leer(ruta) if _activa() else None
+
+    cabeceras = dict(kwargs.pop("headers", None) or {})
+    if guardada:
+        if guardada.get("etag"):
+            cabeceras["If-None-Match"] = guardada["etag"]
+        if guardada.get("last_modified"):
+            cabeceras["If-Modified-Since"] = guardada["last_modified"]
+
+    response = cliente_http.get(url, headers=cabeceras, **kwargs)
+    if response.status_code == 304 and guardada:
+        logger.info(f"Página sin cambios (304): {url}")
+        return Pagina(url, guardada["texto"], False, guardada["hash"], guardada.get("url_final", url))
+    response.raise_for_status()
+
+    version = hashlib.sha256(response.content).hexdigest()
+    texto = response.text
+    modificada = not guardada or guardada.get("hash") != version
+    if not modificada:
+        logger.info(f"Página sin cambios (mismo contenido): {url}")
+
+    if _activa():
+        _escribir(ruta, {
+            "url": url,
+            "url_final": response.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": version,
+            "texto": texto,
+            "guardado": time.time(),
+        })
+    return Pagina(url, texto, modificada, version, response.url)
+
+
+def texto_guardado(url: str) -> Optional[str]:
+    """Cuerpo de la última versión guardada de una página, sin hacer ninguna petición"""
+    guardada = _leer(_ruta(url, urlsplit(url).hostname or "sin_host"))
+    return guardada["texto"] if guardada else None
+
+
+def derivado(clave: str, *versiones: str) -> Optional[Any]:
+    """
+    Devuelve los datos guardados con guardar_derivado para la clave, solo si se obtuvieron
+    de las mismas versiones (páginas u otros datos de entrada) que se indican ahora.
+    """
+    if not _activa():
+        return None
+    guardado = _leer(_ruta(clave, "derivados"))
+    if not guardado or guardado.get("versiones") != list(versiones):
+        return None
+    return guardado["datos"]
+
+
+def guardar_derivado(clave: str, datos: Any, *versiones: str):
+    """Guarda datos obtenidos de una o varias páginas (p. ej. el resultado de parsearlas)"""
+    if not _activa():
+        return
+    with _lock:
+        _escribir(_ruta(clave, "derivados"), {"clave": clave, "versiones": list(versiones), "datos": datos})
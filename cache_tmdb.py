@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Caché persistente de respuestas de la API de TMDB.
+Todas las copias de TMDbAPI (Golem, Yelmo, Filmoteca, próximos estrenos y los
+administradores) comparten esta caché en SQLite, indexada por endpoint y parámetros,
+con caducidad por tipo de endpoint y servicio de datos caducados mientras se revalidan.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RUTA_CACHE_POR_DEFECTO = os.path.join("cache", "tmdb_cache.sqlite")
+
+HORA = 60 * 60
+DIA = 24 * HORA
+
+# Caducidad (en segundos) por prefijo de endpoint. Se aplica el prefijo más largo que coincida.
+TTL_POR_ENDPOINT = {
+    "search/movie": 7 * DIA,
+    "movie/now_playing": 6 * HORA,
+    "movie/upcoming": 6 * HORA,
+    "movie/": 3 * DIA,
+}
+TTL_POR_DEFECTO = DIA
+
+# Tiempo adicional, proporcional al TTL, durante el que se sirve el dato caducado
+# mientras se descarga la versión nueva en segundo plano
+FACTOR_VENTANA_CADUCADO = 1.0
+
+
+def _ttl_endpoint(endpoint: str) -> int:
+    """Devuelve la caducidad aplicable a un endpoint"""
+    mejor_prefijo = ""
+    for prefijo in TTL_POR_ENDPOINT:
+        if endpoint.startswith(prefijo) and len(prefijo) > len(mejor_prefijo):
+            mejor_prefijo = prefijo
+    return TTL_POR_ENDPOINT.get(mejor_prefijo, TTL_POR_DEFECTO)
+
+
+def _clave_cache(endpoint: str, params: Optional[dict]) -> str:
+    """Genera la clave de caché a partir del endpoint y los parámetros ordenados"""
+    params_normalizados = json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{endpoint}?{params_normalizados}".encode("utf-8")).hexdigest()
+
+
+class CacheTMDb:
+    def __init__(self, ruta: str = RUTA_CACHE_POR_DEFECTO):
+        self.ruta = ruta
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        if ruta != ":memory:":
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            """CREATE TABLE IF NOT EXISTS respuestas (
+                   clave TEXT PRIMARY KEY,
+                   endpoint TEXT NOT NULL,
+                   params TEXT NOT NULL,
+                   datos TEXT NOT NULL,
+                   guardado REAL NOT NULL
+               )"""
+        )
+        self._conexion.commit()
+        self._revalidando = set()
+        self._ejecutor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="revalidar_tmdb")
+        self._estadisticas = {"aciertos": 0, "caducados": 0, "fallos": 0}
+
+    def _contar(self, tipo: str):
+        with self._lock:
+            self._estadisticas[tipo] += 1
+
+    def estadisticas(self) -> dict:
+        """Aciertos, caducados revalidados y descargas desde que se abrió la caché"""
+        with self._lock:
+            return dict(self._estadisticas)
+
+    def _leer(self, clave: str) -> Optional[Tuple[dict, float]]:
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT datos, guardado FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+        if not fila:
+            return None
+        return json.loads(fila[0]), fila[1]
+
+    def guardar(self, endpoint: str, params: Optional[dict], datos: dict):
+        """Guarda una respuesta válida en la caché"""
+        clave = _clave_cache(endpoint, params)
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, endpoint, params, datos, guardado) VALUES (?, ?, ?, ?, ?)",
+                (clave, endpoint, json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str),
+                 json.dumps(datos, ensure_ascii=False), time.time())
+            )
+            self._conexion.commit()
+
+    def _revalidar(self, clave: str, endpoint: str, params: Optional[dict], descargar: Callable[[], Optional[dict]]):
+        """Descarga en segundo plano la versión nueva de una entrada caducada"""
+        with self._lock:
+            if clave in self._revalidando:
+                return
+            self._revalidando.add(clave)
+
+        def tarea():
+            try:
+                datos = descargar()
+                if datos:
+                    self.guardar(endpoint, params, datos)
+            except Exception as e:
+                logger.warning(f"Error revalidando {endpoint} en la caché de TMDB: {str(e)}")
+            finally:
+                with self._lock:
+                    self._revalidando.discard(clave)
+
+        self._ejecutor.submit(tarea)
+
+    def obtener(self, endpoint: str, params: Optional[dict], descargar: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """
+        Devuelve la respuesta de un endpoint usando la caché:
+        - Entrada vigente: se devuelve sin tocar la red.
+        - Entrada caducada dentro de la ventana de gracia: se devuelve y se revalida en segundo plano.
+        - Sin entrada o demasiado antigua: se descarga, se guarda y se devuelve.
+        """
+        clave = _clave_cache(endpoint, params)
+        entrada = self._leer(clave)
+        if entrada:
+            datos, guardado = entrada
+            edad = time.time() - guardado
+            ttl = _ttl_endpoint(endpoint)
+            if edad < ttl:
+                self._contar("aciertos")
+                return datos
+            if edad < ttl * (1 + FACTOR_VENTANA_CADUCADO):
+                self._contar("caducados")
+                self._revalidar(clave, endpoint, params, descargar)
+                return datos
+
+        self._contar("fallos")
+        datos = descargar()
+        if datos:
+            self.guardar(endpoint, params, datos)
+        return datos
+
+    def purgar(self):
+        """Elimina las entradas que ya no se pueden servir ni siquiera como caducadas"""
+        ahora = time.time()
+        with self._lock:
+            filas = self._conexion.execute("SELECT clave, endpoint, guardado FROM respuestas").fetchall()
+            caducadas = [
+                (clave,) for clave, endpoint, guardado in filas
+                if ahora - guardado >= _ttl_endpoint(endpoint) * (1 + FACTOR_VENTANA_CADUCADO)
+            ]
+            self._conexion.executemany("DELETE FROM respuestas WHERE clave = ?", caducadas)
+            self._conexion.commit()
+        return len(caducadas)
+
+    def cerrar(self):
+        """Espera a las revalidaciones pendientes y cierra la base de datos"""
+        self._ejecutor.shutdown(wait=True)
+        estadisticas = self.estadisticas()
+        with self._lock:
+            self._conexion.close()
+        logger.info(
+            f"Caché TMDB: {estadisticas['aciertos']} aciertos, "
+            f"{estadisticas['caducados']} caducados revalidados, {estadisticas['fallos']} descargas"
+        )
+
+
+class _SinCache:
+    """Sustituto de la caché cuando está desactivada con TMDB_CACHE_DESACTIVADA=1"""
+
+    def obtener(self, endpoint, params, descargar):
+        return descargar()
+
+    def guardar(self, endpoint, params, datos):
+        pass
+
+    def cerrar(self):
+        pass
+
+
+_cache_compartida = None
+_lock_creacion = threading.Lock()
+
+
+def obtener_cache():
+    """Devuelve la caché compartida del proceso, creándola la primera vez"""
+    global _cache_compartida
+    with _lock_creacion:
+        if _cache_compartida is None:
+            if os.getenv("TMDB_CACHE_DESACTIVADA") == "1":
+                _cache_compartida = _SinCache()
+            else:
+                ruta = os.getenv("TMDB_CACHE_RUTA", RUTA_CACHE_POR_DEFECTO)
+                try:
+                    _cache_compartida = CacheTMDb(ruta)
+                    _cache_compartida.purgar()
+                except sqlite3.Error as e:
+                    logger.warning(f"No se pudo abrir la caché de TMDB en {ruta}: {str(e)}. Se continúa sin caché")
+                    _cache_compartida = _SinCache()
+            atexit.register(_cache_compartida.cerrar)
+        return _cache_compartida
+
+
+def consultar(endpoint: str, params: Optional[dict], descargar: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """Atajo para consultar la caché compartida"""
+    return obtener_cache().obtener(endpoint, params, descargar)
+
+
+def cache_activa() -> bool:
+    """Indica si las respuestas se están guardando en una caché real"""
+    return not isinstance(obtener_cache(), _SinCache)
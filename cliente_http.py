@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Cliente HTTP compartido por todos los scrapers.
+Mantiene una única sesión de requests con conexiones persistentes (keep-alive),
+timeouts de conexión y lectura acotados, reintentos con espera exponencial y
+respeto de la cabecera Retry-After en las respuestas 429/503.
+
+También permite grabar todas las respuestas en una "cassette" en disco y reproducirlas
+después sin red (con latencia simulada opcional), para medir y comparar los scrapers de
+forma reproducible:
+    python scraping_golem.py --record[=cache/cassettes]
+    python scraping_golem.py --replay[=cache/cassettes] [--latency-ms=50]
+o con las variables HTTP_CASSETTE=grabar|reproducir, HTTP_CASSETTE_DIR y HTTP_CASSETTE_LATENCIA_MS.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+# (conexión, lectura) en segundos
+TIMEOUT_POR_DEFECTO = (5, 30)
+REINTENTOS_POR_DEFECTO = 3
+ESPERA_BASE = 1.0
+ESPERA_MAXIMA = 60.0
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+TAMANO_POOL = 20
+
+DIRECTORIO_CASSETTE = os.path.join("cache", "cassettes")
+# Datos de la grabación (p. ej. la fecha de cada scraper grabado), junto a las respuestas
+ARCHIVO_METADATOS_CASSETTE = "metadatos.json"
+MODOS_CASSETTE = ("grabar", "reproducir")
+# Cabeceras que no se guardan: el cuerpo se graba ya descomprimido y con su longitud real
+_CABECERAS_OMITIDAS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+
+class PeticionNoGrabada(requests.exceptions.ConnectionError):
+    """La petición no está en la cassette que se está reproduciendo (no se reintenta)"""
+
+
+def _config_desde_entorno():
+    modo = os.getenv("HTTP_CASSETTE")
+    if modo not in MODOS_CASSETTE:
+        return None
+    latencia_ms = float(os.getenv("HTTP_CASSETTE_LATENCIA_MS", "0"))
+    return modo, os.getenv("HTTP_CASSETTE_DIR", DIRECTORIO_CASSETTE), latencia_ms / 1000
+
+
+_sesion = None
+_lock_sesion = threading.Lock()
+_config_cassette = _config_desde_entorno()
+# Semáforos por host para no saturar las webs de los cines cuando se descarga en paralelo
+_limites_host = {}
+_lock_limites = threading.Lock()
+
+
+class AdaptadorCassette(HTTPAdapter):
+    """
+    Adaptador de transporte que graba cada respuesta en un archivo JSON (modo "grabar") o
+    la sirve desde ahí sin tocar la red (modo "reproducir"). Las peticiones se identifican
+    por método, URL completa y cuerpo; las cabeceras (p. ej. la clave de TMDB) no cuentan.
+    """
+
+    def __init__(self, modo: str, directorio: str = DIRECTORIO_CASSETTE, latencia: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.modo = modo
+        self.directorio = directorio
+        self.latencia = latencia
+
+    def _ruta(self, request) -> str:
+        cuerpo = request.body or b""
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode("utf-8")
+        huella = hashlib.sha256(f"{request.method} {request.url}\n".encode("utf-8") + cuerpo).hexdigest()
+        host = urlsplit(request.url).hostname or "sin_host"
+        return os.path.join(self.directorio, host, f"{huella}.json")
+
+    def send(self, request, **kwargs):
+        ruta = self._ruta(request)
+        if self.modo == "reproducir":
+            if self.latencia:
+                time.sleep(self.latencia)
+            if not os.path.exists(ruta):
+                raise PeticionNoGrabada(
+                    f"Petición no grabada en la cassette: {request.method} {request.url}", request=request
+                )
+            return self._reproducir(request, ruta)
+
+        response = super().send(request, **kwargs)
+        self._grabar(request, response, ruta)
+        return response
+
+    def _grabar(self, request, response, ruta: str):
+        datos = {
+            "método": request.method,
+            "url": request.url,
+            "estado": response.status_code,
+            "motivo": response.reason,
+            "cabeceras": {k: v for k, v in response.headers.items() if k.lower() not in _CABECERAS_OMITIDAS},
+            # Lee el cuerpo completo (también en descargas con stream=True); queda en memoria para el llamador
+            "cuerpo": base64.b64encode(response.content).decode("ascii"),
+        }
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        ruta_temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(ruta_temporal, ruta)
+
+    def _reproducir(self, request, ruta: str) -> requests.Response:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        cuerpo = base64.b64decode(datos["cuerpo"])
+        response = requests.Response()
+        response.status_code = datos["estado"]
+        response.reason = datos.get("motivo", "")
+        response.headers = CaseInsensitiveDict(datos["cabeceras"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(cuerpo)
+        response._content = cuerpo
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+def leer_metadatos_cassette(directorio: str = DIRECTORIO_CASSETTE) -> dict:
+    """Metadatos guardados con la cassette, o {} si no hay"""
+    try:
+        with open(os.path.join(directorio, ARCHIVO_METADATOS_CASSETTE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def guardar_metadatos_cassette(metadatos: dict, directorio: str = DIRECTORIO_CASSETTE):
+    """Sustituye los metadatos de la cassette"""
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, ARCHIVO_METADATOS_CASSETTE)
+    ruta_temporal = f"{ruta}.tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as f:
+        json.dump(metadatos, f, ensure_ascii=False, indent=4)
+    os.replace(ruta_temporal, ruta)
+
+
+def configurar_cassette(modo: Optional[str], directorio: str = DIRECTORIO_CASSETTE, latencia_ms: float = 0.0):
+    """Activa (o desactiva con modo=None) la cassette para la sesión compartida"""
+    global _sesion, _config_cassette
+    if modo is not None and modo not in MODOS_CASSETTE:
+        raise ValueError(f"Modo de cassette desconocido: {modo}")
+    with _lock_sesion:
+        _config_cassette = (modo, directorio, latencia_ms / 1000) if modo else None
+        # La próxima petición crea una sesión nueva con el adaptador que corresponda
+        _sesion = None
+    if modo:
+        logger.info(f"Cassette HTTP en modo {modo}: {directorio}" + (f" (latencia {latencia_ms:.0f} ms)" if latencia_ms else ""))
+
+
+def configurar_cassette_desde_argumentos(argv: Optional[List[str]] = None):
+    """
+    Interpreta y elimina de sys.argv las opciones --record[=DIR], --replay[=DIR] y
+    --latency-ms=N, para que funcionen en cualquier script (use o no argparse).
+    Sin opciones, se usan las variables de entorno HTTP_CASSETTE*.
+    """
+    argv = sys.argv if argv is None else argv
+    modo, directorio, latencia = _config_desde_entorno() or (None, DIRECTORIO_CASSETTE, 0.0)
+    latencia_ms = latencia * 1000
+    restantes = []
+    for argumento in argv:
+        nombre, _, valor = argumento.partition("=")
+        if nombre in ("--record", "--replay"):
+            modo = "grabar" if nombre == "--record" else "reproducir"
+            directorio = valor or directorio
+        elif nombre == "--latency-ms":
+            latencia_ms = float(valor)
+        else:
+            restantes.append(argumento)
+    argv[:] = restantes
+    if modo:
+        configurar_cassette(modo, directorio, latencia_ms)
+
+
+def obtener_sesion() -> requests.Session:
+    """Devuelve la sesión compartida del proceso, creándola la primera vez"""
+    global _sesion
+    with _lock_sesion:
+        if _sesion is None:
+            sesion = requests.Session()
+            # Los reintentos se gestionan en peticion() para poder respetar Retry-After con un límite
+            opciones = dict(pool_connections=TAMANO_POOL, pool_maxsize=TAMANO_POOL, max_retries=0)
+            if _config_cassette:
+                modo, directorio, latencia = _config_cassette
+                adaptador = AdaptadorCassette(modo, directorio, latencia, **opciones)
+            else:
+                adaptador = HTTPAdapter(**opciones)
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            _sesion = sesion
+        return _sesion
+
+
+def limitar_concurrencia(host: str, maximo: int):
+    """Limita las peticiones simultáneas a un host, sumando las de todos los hilos del proceso"""
+    with _lock_limites:
+        _limites_host[host] = threading.BoundedSemaphore(maximo)
+
+
+def _enviar(sesion: requests.Session, metodo: str, url: str, **kwargs) -> requests.Response:
+    semaforo = _limites_host.get(urlsplit(url).hostname)
+    if semaforo is None:
+        return sesion.request(metodo, url, **kwargs)
+    with semaforo:
+        return sesion.request(metodo, url, **kwargs)
+
+
+def _segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Interpreta la cabecera Retry-After, tanto en segundos como en fecha HTTP"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=timezone.utc)
+        return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _espera_exponencial(intento: int) -> float:
+    """Espera exponencial con jitter para el intento indicado (empezando en 0)"""
+    return min(ESPERA_MAXIMA, ESPERA_BASE * (2 ** intento)) * random.uniform(0.5, 1.0)
+
+
+def peticion(metodo: str, url: str, reintentos: int = REINTENTOS_POR_DEFECTO, **kwargs) -> requests.Response:
+    """
+    Realiza una petición HTTP con la sesión compartida.
+    Reintenta ante errores de red, timeouts y estados 429/5xx. Devuelve la última
+    respuesta obtenida (el llamador decide si llama a raise_for_status) o lanza la
+    última excepción de red si se agotan los reintentos.
+    """
+    kwargs.setdefault("timeout", TIMEOUT_POR_DEFECTO)
+    sesion = obtener_sesion()
+
+    for intento in range(reintentos + 1):
+        try:
+            response = _enviar(sesion, metodo, url, **kwargs)
+        except PeticionNoGrabada:
+            raise
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if intento >= reintentos:
+                raise
+            espera = _espera_exponencial(intento)
+            logger.warning(f"Error de red en {url} ({str(e)}). Reintento {intento + 1}/{reintentos} en {espera:.1f}s")
+            time.sleep(espera)
+            continue
+
+        if response.status_code not in ESTADOS_REINTENTABLES or intento >= reintentos:
+            return response
+
+        espera = _segundos_retry_after(response.headers.get("Retry-After"))
+        if espera is None:
+            espera = _espera_exponencial(intento)
+        espera = min(espera, ESPERA_MAXIMA)
+        logger.warning(f"HTTP {response.status_code} en {url}. Reintento {intento + 1}/{reintentos} en {espera:.1f}s")
+        response.close()
+        time.sleep(espera)
+
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET con la sesión compartida, timeouts y reintentos"""
+    return peticion("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST con la sesión compartida, timeouts y reintentos"""
+    return peticion("POST", url, **kwargs)
+
+
+def descargar_archivo(url: str, ruta: str, **kwargs) -> str:
+    """
+    Descarga un archivo a disco (sustituto de urllib.request.urlretrieve).
+    Escribe primero en un archivo temporal para no dejar imágenes a medias.
+    Lanza requests.exceptions.RequestException si la descarga falla.
+    """
+    response = get(url, stream=True, **kwargs)
+    try:
+        response.raise_for_status()
+        ruta_temporal = f"{ruta}.part"
+        with open(ruta_temporal, "wb") as f:
+            for bloque in response.iter_content(chunk_size=64 * 1024):
+                f.write(bloque)
+        os.replace(ruta_temporal, ruta)
+    finally:
+        response.close()
+    return ruta
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Motor común de comparación de títulos de películas.
+Sustituye a las copias de normalize_title / _title_similarity repartidas por los
+scrapers y el integrador: normalización memorizada con expresiones precompiladas,
+puntuación de una lista de candidatos en una sola pasada y un índice con
+prefiltro de trigramas de caracteres para comparar contra conjuntos grandes.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+_RE_NO_ALFANUMERICO = re.compile(r'[^a-zA-Z0-9\s]')
+
+
+@lru_cache(maxsize=65536)
+def normalizar_titulo(titulo: str) -> str:
+    """Normaliza un título para comparación: sin acentos, sin signos, en minúsculas"""
+    if not titulo:
+        return ""
+    # Normalizar unicode y convertir a ASCII
+    titulo = unicodedata.normalize('NFKD', titulo).encode('ASCII', 'ignore').decode('ASCII')
+    # Remover caracteres especiales y espacios extra
+    titulo = _RE_NO_ALFANUMERICO.sub('', titulo)
+    return ' '.join(titulo.lower().split())
+
+
+@lru_cache(maxsize=65536)
+def trigramas(titulo_normalizado: str) -> frozenset:
+    """Trigramas de caracteres de un título ya normalizado (con relleno en los bordes)"""
+    texto = f"  {titulo_normalizado} "
+    return frozenset(texto[i:i + 3] for i in range(len(texto) - 2))
+
+
+def similitud(titulo1: str, titulo2: str) -> float:
+    """Similitud entre 0 y 1 de dos títulos normalizados (ratio de SequenceMatcher)"""
+    return SequenceMatcher(None, normalizar_titulo(titulo1), normalizar_titulo(titulo2)).ratio()
+
+
+def puntuar_candidatos(titulo: str, candidatos: Iterable[Any],
+                       clave: Callable[[Any], str] = lambda c: c,
+                       umbral: float = 0.0) -> List[Tuple[float, Any]]:
+    """
+    Puntúa una lista de candidatos frente a un título en una sola pasada y los devuelve
+    ordenados de mayor a menor similitud (a igual puntuación se conserva el orden de entrada).
+    Los candidatos cuya cota superior de similitud no alcanza el umbral se descartan sin
+    calcular la puntuación completa.
+    """
+    matcher = SequenceMatcher(None)
+    # SequenceMatcher guarda los datos de la segunda secuencia: se fija el título buscado ahí
+    matcher.set_seq2(normalizar_titulo(titulo))
+    puntuados = []
+    for candidato in candidatos:
+        matcher.set_seq1(normalizar_titulo(clave(candidato) or ""))
+        if umbral and (matcher.real_quick_ratio() < umbral or matcher.quick_ratio() < umbral):
+            continue
+        puntuacion = matcher.ratio()
+        if puntuacion >= umbral:
+            puntuados.append((puntuacion, candidato))
+    puntuados.sort(key=lambda x: x[0], reverse=True)
+    return puntuados
+
+
+class IndiceTitulos:
+    """Índice de títulos con prefiltro por trigramas para búsquedas aproximadas rápidas"""
+
+    def __init__(self):
+        self._titulos: List[str] = []
+        self._valores: List[Any] = []
+        self._por_trigrama: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self):
+        return len(self._titulos)
+
+    def añadir(self, titulo: str, valor: Any = None):
+        """Añade un título (y el valor asociado que devolverán las búsquedas)"""
+        normalizado = normalizar_titulo(titulo)
+        if not normalizado:
+            return
+        posicion = len(self._titulos)
+        self._titulos.append(titulo)
+        self._valores.append(valor)
+        for trigrama in trigramas(normalizado):
+            self._por_trigrama[trigrama].append(posicion)
+
+    def buscar(self, titulo: str, limite: int = 5, umbral: float = 0.6,
+               max_candidatos: int = 50) -> List[Tuple[float, str, Any]]:
+        """
+        Devuelve hasta `limite` tuplas (puntuación, título, valor) con similitud >= umbral.
+        Solo se puntúan con SequenceMatcher los `max_candidatos` títulos que más trigramas
+        comparten con el buscado.
+        """
+        normalizado = normalizar_titulo(titulo)
+        if not normalizado:
+            return []
+        trigramas_buscados = trigramas(normalizado)
+        comunes: Dict[int, int] = defaultdict(int)
+        for trigrama in trigramas_buscados:
+            for posicion in self._por_trigrama.get(trigrama, ()):
+                comunes[posicion] += 1
+
+        # Coeficiente de Dice sobre trigramas como medida barata de parecido
+        def dice(posicion):
+            total = len(trigramas_buscados) + len(trigramas(normalizar_titulo(self._titulos[posicion])))
+            return 2 * comunes[posicion] / total
+
+        preseleccion = sorted(comunes, key=dice, reverse=True)[:max_candidatos]
+        puntuados = puntuar_candidatos(titulo, preseleccion, clave=lambda p: self._titulos[p], umbral=umbral)
+        return [(puntuacion, self._titulos[p], self._valores[p]) for puntuacion, p in puntuados[:limite]]
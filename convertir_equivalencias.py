@@ -5,19 +5,9 @@ Script para convertir equivalencias_peliculas.json de formato lista a diccionari
 
 import json
 import os
-import unicodedata
-import re
 from datetime import datetime
 
-def normalize_title(title):
-    """Normaliza un título para usarlo como clave"""
-    if not title:
-        return ""
-    # Normalizar unicode y convertir a ASCII
-    title = unicodedata.normalize('NFKD', title).encode('ASCII', 'ignore').decode('ASCII')
-    # Remover caracteres especiales
-    title = re.sub(r'[^a-zA-Z0-9\s]', '', title)
-    return ' '.join(title.lower().split())
+from coincidencia_titulos import normalizar_titulo
 
 def main():
     archivo = "equivalencias_peliculas.json"
@@ -60,7 +50,7 @@ def main():
         for i, pelicula in enumerate(datos):
             try:
                 if isinstance(pelicula, dict) and pelicula.get('título'):
-                    titulo_norm = normalize_title(pelicula['título'])
+                    titulo_norm = normalizar_titulo(pelicula['título'])
                     if titulo_norm and pelicula.get('tmdb_id'):
                         equivalencias_dict[titulo_norm] = {
                             'tmdb_id': pelicula.get('tmdb_id'),
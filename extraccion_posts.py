@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Reglas de extracción de los posts de Ghost in the Blog, compartidas por los dos scrapers y por
+reprocesar_posts.py: película y director a partir del título, y contenido (ficha técnica y
+crítica) a partir del HTML del post. Al mejorar estas reglas, reprocesar_posts.py las aplica a
+los posts ya guardados.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import parseo_html
+from ficha_tecnica import extraer_ficha
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_REQUERIDOS = ["title", "pelicula", "director", "url", "date", "content"]
+
+# Palabras con las que no empieza el nombre de un director (restos de texto mal separado)
+_PALABRAS_VACIAS = {"de", "del", "el", "la", "los", "las", "y", "e", "o", "en", "un", "una", "al",
+                    "a", "con", "por", "para", "que", "se", "su", "ha", "es", "lo"}
+
+
+def separar_titulo(titulo: str) -> Tuple[str, str]:
+    """(película, director) a partir del título del post: "película" + "de" + "director" """
+    partes = titulo.split(' de ')
+    if len(partes) == 2:
+        return partes[0].strip(), partes[1].strip()
+    return titulo, "Desconocido"
+
+
+def extraer_contenido(html: str) -> str:
+    """Ficha técnica y crítica ("<ficha>\\n\\nCRÍTICA:\\n<crítica>") del HTML de un post"""
+    soup = parseo_html.parsear(html, 'ghost_post')
+
+    # Extraer solo el contenido
+    contenido_div = soup.find('div', class_='entry-content')
+    if not contenido_div:
+        logger.error("No se encontró el div de contenido")
+        return ""
+
+    # Primero, reemplazar los enlaces con su texto plano
+    for a in contenido_div.find_all('a'):
+        a.replace_with(a.get_text())
+
+    # Obtener párrafos individuales
+    parrafos = contenido_div.find_all('p')
+    contenido_completo = ''
+
+    for p in parrafos:
+        # Obtener el texto del párrafo y limpiar espacios extra
+        texto_parrafo = ' '.join(p.get_text().split())
+        contenido_completo += texto_parrafo + '\n\n'
+
+    # Eliminar saltos de línea extra al final
+    contenido_completo = contenido_completo.rstrip()
+
+    # Buscar el índice de "Título Original"
+    indice_inicio = contenido_completo.find("Título Original")
+
+    if indice_inicio == -1:
+        logger.warning("No se encontró 'Título Original' en el contenido")
+        logger.info("Usando contenido completo como respaldo")
+        return contenido_completo
+
+    # Extraer desde "Título Original"
+    contenido_parcial = contenido_completo[indice_inicio:].strip()
+
+    # Buscar el final de la información técnica (después del último dato técnico)
+    datos_tecnicos = ["Dirección", "Guion", "Intérpretes", "País", "Duración"]
+    ultimo_indice = -1
+
+    for dato in datos_tecnicos:
+        indice = contenido_parcial.find(dato)
+        if indice != -1:
+            ultimo_indice = max(ultimo_indice,
+                contenido_parcial.find('\n', indice) if contenido_parcial.find('\n', indice) != -1
+                else len(contenido_parcial))
+
+    if ultimo_indice == -1:
+        logger.warning("No se pudo separar la ficha técnica de la crítica")
+        return contenido_parcial
+
+    # Extraer la ficha técnica
+    ficha_tecnica = contenido_parcial[:ultimo_indice].strip()
+
+    # Extraer el resto del contenido (la crítica)
+    critica = contenido_parcial[ultimo_indice:].strip()
+
+    # Combinar en formato estructurado
+    contenido = f"{ficha_tecnica}\n\nCRÍTICA:\n{critica}"
+
+    logger.info(f"Contenido extraído y estructurado ({len(contenido)} caracteres)")
+    logger.debug(f"Ficha técnica: {ficha_tecnica[:200]}")
+    return contenido
+
+
+def nombre_valido(nombre: str) -> bool:
+    """Si parece un nombre de persona: al menos dos palabras y no empieza por una palabra vacía"""
+    palabras = nombre.split()
+    return len(palabras) >= 2 and palabras[0].lower() not in _PALABRAS_VACIAS and palabras[0][0].isupper()
+
+
+def completar_director(director: str, contenido: str) -> str:
+    """Si el título no incluye el director, tomarlo de la ficha técnica (si los nombres parecen válidos)"""
+    if director == "Desconocido":
+        directores = extraer_ficha(contenido).directores
+        if directores and all(nombre_valido(nombre) for nombre in directores):
+            return " y ".join(directores)
+    return director
+
+
+def post_desde_html(titulo: str, fecha: str, url: str, html: str) -> dict:
+    """Post a partir de los datos del listado y del HTML de su página"""
+    pelicula, director = separar_titulo(titulo)
+    if director == "Desconocido":
+        logger.warning(f"No se pudo extraer director del título: {titulo}")
+    contenido = extraer_contenido(html)
+
+    post_data = {
+        "title": titulo,
+        "pelicula": pelicula,
+        "director": completar_director(director, contenido),
+        "url": url,
+        "date": fecha,
+        "content": contenido
+    }
+
+    # Verificar la estructura del post
+    for campo in CAMPOS_REQUERIDOS:
+        if not post_data.get(campo):
+            logger.warning(f"Campo {campo} vacío o no presente en el post")
+
+    return post_data
+
+
+def reextraer_post(post_data: dict, html: Optional[str] = None) -> dict:
+    """
+    Vuelve a aplicar las reglas a un post guardado: el contenido, desde el HTML de su página si
+    se tiene, y el director. La película y la fecha no cambian, porque forman el id del post.
+    """
+    contenido = extraer_contenido(html) if html is not None else post_data.get('content', '')
+    director = separar_titulo(post_data['title'])[1] if post_data.get('title') else post_data.get('director')
+    return dict(post_data, content=contenido, director=completar_director(director, contenido))
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Ficha técnica de las críticas de Ghost in the Blog como campos tipados, e índice por facetas.
+La ficha ("Título Original: … Dirección: … País: Francia. 2016 Duración: 100 min.") se separa
+por sus etiquetas en título original, directores, guion, intérpretes, países, año, duración y
+estreno. El índice agrupa los posts por director, país, año y tramo de duración y se guarda en
+facetas_criticas.json, que el frontend puede leer directamente (se publica con el resto de
+JSON) para listar y contar críticas sin cargar ningún post.
+
+Uso:
+    python ficha_tecnica.py sincronizar
+    python ficha_tecnica.py listar --director "Wes Anderson"
+    python ficha_tecnica.py listar --pais Francia --año 2016 --contar pais
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Set
+
+import archivo_posts
+
+logger = logging.getLogger(__name__)
+
+RUTA_FACETAS = "facetas_criticas.json"
+
+FACETAS = ("director", "pais", "año", "duracion")
+# Límites superiores (minutos) de los tramos de duración; el último tramo es abierto
+TRAMOS_DURACION = (90, 120, 150)
+
+# Etiquetas de la ficha (las compuestas antes que las simples que contienen)
+_ETIQUETAS = [
+    ("titulo_original", r"T[ií]tulo original"),
+    ("direccion_guion", r"Direcci[oó]n y gui[oó]n"),
+    ("direccion", r"Direcci[oó]n"),
+    ("guion", r"Gui[oó]n"),
+    ("interpretes", r"Int[eé]rpretes|Reparto"),
+    ("musica", r"M[uú]sica"),
+    ("fotografia", r"Fotograf[ií]a"),
+    ("pais", r"Pa[ií]s|Nacionalidad"),
+    ("duracion", r"Duraci[oó]n"),
+    ("estreno", r"Estreno"),
+]
+_PATRON_ETIQUETA = re.compile(
+    "|".join(f"(?P<{nombre}>{patron})" for nombre, patron in _ETIQUETAS) + r"\s*:", re.IGNORECASE
+)
+_PATRON_AÑO = re.compile(r"\b(19\d{2}|20\d{2})\b")
+_PATRON_ESTRENO = re.compile(r"[A-Za-zé]+\.?\s+(?:de\s+)?(?:19|20)\d{2}")
+_SEPARADOR_NOMBRES = re.compile(r"\s*(?:,|;|/|\s+y\s+|\s+e\s+)\s*")
+# Lo que sigue a los nombres de la dirección ("a partir de la novela de…", "(Historia: …)").
+# El punto no cuenta como fin: separa las iniciales ("M. Night Shyamalan", "J.A. Bayona")
+_FIN_NOMBRES = re.compile(
+    r"\s+(?:a partir|partir|basad[oa]|sobre|seg[uú]n|novela|historia|producci[oó]n)\b|[;(]",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class FichaTecnica:
+    titulo_original: Optional[str] = None
+    directores: List[str] = field(default_factory=list)
+    guion: Optional[str] = None
+    interpretes: List[str] = field(default_factory=list)
+    paises: List[str] = field(default_factory=list)
+    año: Optional[int] = None
+    # Minutos
+    duracion: Optional[int] = None
+    estreno: Optional[str] = None
+
+
+def _limpiar(valor: str) -> str:
+    return " ".join(valor.split()).strip(" .:")
+
+
+def _nombres(valor: str) -> List[str]:
+    return [nombre for nombre in (_limpiar(n) for n in _SEPARADOR_NOMBRES.split(valor)) if nombre]
+
+
+def _directores(valor: str) -> List[str]:
+    """Nombres de la dirección; en "Danny y Michael Philippou" el apellido es de los dos"""
+    nombres = _nombres(_FIN_NOMBRES.split(valor)[0])
+    for i in range(len(nombres) - 1):
+        siguiente = nombres[i + 1].split()
+        if len(nombres[i].split()) == 1 and len(siguiente) > 1:
+            nombres[i] = f"{nombres[i]} {siguiente[-1]}"
+    return nombres
+
+
+def extraer_ficha(contenido: str) -> FichaTecnica:
+    """
+    Ficha técnica de un post a partir de su contenido: la parte anterior a "CRÍTICA:" o, sin
+    separador, el primer párrafo. Solo hay ficha si el contenido empieza por una de sus
+    etiquetas; si no, el texto es la crítica y se devuelve una ficha vacía.
+    """
+    ficha = FichaTecnica()
+    texto, separador, _ = (contenido or "").strip().partition("CRÍTICA:")
+    if not _PATRON_ETIQUETA.match(texto):
+        return ficha
+    if not separador:
+        texto = texto.split("\n\n")[0]
+    coincidencias = list(_PATRON_ETIQUETA.finditer(texto))
+    for i, coincidencia in enumerate(coincidencias):
+        fin = coincidencias[i + 1].start() if i + 1 < len(coincidencias) else len(texto)
+        etiqueta = coincidencia.lastgroup
+        valor = texto[coincidencia.end():fin]
+        if etiqueta == "titulo_original":
+            ficha.titulo_original = _limpiar(valor) or None
+        elif etiqueta in ("direccion", "direccion_guion"):
+            ficha.directores = ficha.directores or _directores(valor)
+            if etiqueta == "direccion_guion":
+                ficha.guion = _limpiar(valor) or None
+        elif etiqueta == "guion":
+            ficha.guion = _limpiar(valor) or None
+        elif etiqueta == "interpretes":
+            ficha.interpretes = _nombres(valor)
+        elif etiqueta == "pais":
+            año = _PATRON_AÑO.search(valor)
+            if año:
+                ficha.año = int(año.group(1))
+                valor = valor[:año.start()]
+            ficha.paises = _nombres(valor)
+        elif etiqueta == "duracion":
+            minutos = re.search(r"\d+", valor)
+            ficha.duracion = int(minutos.group()) if minutos else None
+        elif etiqueta == "estreno":
+            # Tras la fecha de estreno puede empezar la crítica si no hay separador
+            estreno = _PATRON_ESTRENO.search(valor)
+            ficha.estreno = _limpiar(estreno.group()) if estreno else None
+    return ficha
+
+
+def tramo_duracion(minutos: Optional[int]) -> Optional[str]:
+    """Tramo de duración para la faceta: "<90", "90-120", "120-150" o ">150" """
+    if not minutos:
+        return None
+    inferior = 0
+    for superior in TRAMOS_DURACION:
+        if minutos < superior:
+            return f"<{superior}" if not inferior else f"{inferior}-{superior}"
+        inferior = superior
+    return f">{inferior}"
+
+
+def valores_faceta(registro: dict, faceta: str) -> List[str]:
+    if faceta == "director":
+        return registro["directores"]
+    if faceta == "pais":
+        return registro["paises"]
+    if faceta == "año":
+        return [str(registro["año"])] if registro["año"] else []
+    if faceta == "duracion":
+        tramo = tramo_duracion(registro["duracion"])
+        return [tramo] if tramo else []
+    raise ValueError(f"Faceta desconocida: {faceta}")
+
+
+def registro_post(post_data: dict) -> dict:
+    """Datos de un post para el índice: los del listado más su ficha técnica"""
+    return dict(
+        titulo=post_data.get('title'),
+        pelicula=post_data.get('pelicula'),
+        fecha=(post_data.get('date') or '')[:10],
+        url=post_data.get('url'),
+        **asdict(extraer_ficha(post_data.get('content'))),
+    )
+
+
+class IndiceFacetas:
+    def __init__(self, ruta: str = RUTA_FACETAS):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._posts: Dict[str, dict] = {}
+        self._facetas: Dict[str, Dict[str, Set[str]]] = {faceta: {} for faceta in FACETAS}
+        self._pendiente = False
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                for id_, registro in json.load(f)["posts"].items():
+                    self._añadir(id_, registro)
+
+    def __len__(self) -> int:
+        return len(self._posts)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._posts
+
+    def _añadir(self, id_: str, registro: dict):
+        anterior = self._posts.get(id_)
+        if anterior is not None:
+            for faceta in FACETAS:
+                for valor in valores_faceta(anterior, faceta):
+                    self._facetas[faceta][valor].discard(id_)
+        self._posts[id_] = registro
+        for faceta in FACETAS:
+            for valor in valores_faceta(registro, faceta):
+                self._facetas[faceta].setdefault(valor, set()).add(id_)
+
+    def añadir(self, post_data: dict):
+        """Añade (o actualiza) un post en el índice"""
+        with self._lock:
+            self._añadir(archivo_posts.id_de(post_data), registro_post(post_data))
+            self._pendiente = True
+
+    def sincronizar(self, archivo: Optional[archivo_posts.ArchivoPosts] = None) -> int:
+        """Añade los posts del archivo que aún no están en el índice; devuelve cuántos"""
+        archivo = archivo or archivo_posts.abrir()
+        with self._lock:
+            faltan = [id_ for id_ in archivo.ids() if id_ not in self._posts]
+            for id_ in faltan:
+                self._añadir(id_, registro_post(archivo.leer(id_)))
+            self._pendiente = self._pendiente or bool(faltan)
+        if faltan:
+            logger.info(f"Índice de facetas: {len(faltan)} posts añadidos")
+        return len(faltan)
+
+    def _coincidentes(self, filtros: Dict[str, str]) -> Set[str]:
+        ids = set(self._posts)
+        for faceta, valor in filtros.items():
+            if valor is not None:
+                ids &= self._facetas[faceta].get(str(valor), set())
+        return ids
+
+    def listar(self, **filtros) -> List[dict]:
+        """
+        Posts que cumplen todos los filtros (director, pais, año, duracion), del más reciente
+        al más antiguo, cada uno con su id.
+        """
+        with self._lock:
+            ids = self._coincidentes(filtros)
+            return sorted(({"id": id_, **self._posts[id_]} for id_ in ids),
+                          key=lambda r: r["fecha"], reverse=True)
+
+    def contar(self, faceta: str, **filtros) -> Dict[str, int]:
+        """Número de posts por valor de una faceta entre los que cumplen los filtros"""
+        with self._lock:
+            ids = self._coincidentes(filtros)
+            cuentas = {valor: len(ids & miembros) for valor, miembros in self._facetas[faceta].items()}
+        return dict(sorted(((v, n) for v, n in cuentas.items() if n), key=lambda x: (-x[1], x[0])))
+
+    def guardar(self):
+        """Escribe el índice si ha cambiado (posts y, por faceta, los ids de cada valor)"""
+        with self._lock:
+            if not self._pendiente:
+                return
+            datos = {
+                "posts": dict(sorted(self._posts.items())),
+                "facetas": {
+                    faceta: {valor: sorted(ids) for valor, ids in sorted(valores.items()) if ids}
+                    for faceta, valores in self._facetas.items()
+                },
+            }
+            ruta_temporal = f"{self.ruta}.tmp"
+            with open(ruta_temporal, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False, indent=1)
+            os.replace(ruta_temporal, self.ruta)
+            self._pendiente = False
+        logger.info(f"Índice de facetas guardado con {len(self._posts)} posts")
+
+
+_indice_compartido = None
+_lock_creacion = threading.Lock()
+
+
+def obtener_indice() -> IndiceFacetas:
+    """Índice de facetas compartido del proceso"""
+    global _indice_compartido
+    with _lock_creacion:
+        if _indice_compartido is None:
+            _indice_compartido = IndiceFacetas()
+        return _indice_compartido
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Ficha técnica e índice por facetas de las críticas")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("sincronizar", help="Añadir al índice los posts del archivo que falten")
+    listar = subparsers.add_parser("listar", help="Listar y contar críticas por facetas")
+    listar.add_argument("--director")
+    listar.add_argument("--pais")
+    listar.add_argument("--año")
+    listar.add_argument("--duracion", help="Tramo de duración, p. ej. 90-120")
+    listar.add_argument("--contar", choices=FACETAS, help="Mostrar en su lugar el número de críticas por valor")
+    args = parser.parse_args()
+
+    indice = IndiceFacetas()
+    indice.sincronizar()
+    indice.guardar()
+    if args.comando == "sincronizar":
+        return 0
+
+    filtros = {faceta: getattr(args, faceta) for faceta in FACETAS}
+    if args.contar:
+        for valor, numero in indice.contar(args.contar, **filtros).items():
+            print(f"{numero:>5}  {valor}")
+        return 0
+    resultados = indice.listar(**filtros)
+    for r in resultados:
+        print(f"{r['fecha']}  {r['titulo']}  ({', '.join(r['directores'])}; {', '.join(r['paises'])} {r['año'] or ''})")
+    print(f"{len(resultados)} críticas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
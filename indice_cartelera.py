@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Índice de candidatos de la cartelera actual.
+Casi todas las películas en VOSE de Golem, Yelmo y la Filmoteca están en cartelera
+(movie/now_playing de la región) o entre los próximos estrenos que ya guarda
+proximos_estrenos.json. Este índice reúne ambos conjuntos con unas pocas peticiones
+paginadas para que el resolutor los compare antes de lanzar ninguna búsqueda por título.
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from coincidencia_titulos import IndiceTitulos
+
+logger = logging.getLogger(__name__)
+
+RUTA_ESTRENOS = "proximos_estrenos.json"
+REGION = "ES"
+IDIOMA = "es-ES"
+MAX_PAGINAS = 5
+
+
+class IndiceCartelera:
+    def __init__(self, consultar: Callable[[str, dict], Optional[dict]], region: str = REGION,
+                 idioma: str = IDIOMA, max_paginas: int = MAX_PAGINAS, ruta_estrenos: str = RUTA_ESTRENOS):
+        """consultar: función (endpoint, params) -> respuesta de TMDB (normalmente TMDbAPI._make_request)"""
+        self.consultar = consultar
+        self.region = region
+        self.idioma = idioma
+        self.max_paginas = max_paginas
+        self.ruta_estrenos = ruta_estrenos
+        self._indice = None
+        self._lock = threading.Lock()
+
+    def _cartelera(self) -> List[dict]:
+        """Películas de movie/now_playing en la región (la primera página indica cuántas hay)"""
+        peliculas = []
+        total_paginas = 1
+        pagina = 1
+        while pagina <= min(total_paginas, self.max_paginas):
+            respuesta = self.consultar("movie/now_playing", {"region": self.region, "language": self.idioma, "page": pagina})
+            if not respuesta:
+                break
+            total_paginas = respuesta.get("total_pages", 1)
+            peliculas.extend(respuesta.get("results", []))
+            pagina += 1
+        return peliculas
+
+    def _estrenos(self) -> List[dict]:
+        """Próximos estrenos ya guardados por proximos_estrenos.py, con los campos de TMDB"""
+        if not os.path.exists(self.ruta_estrenos):
+            return []
+        try:
+            with open(self.ruta_estrenos, "r", encoding="utf-8") as f:
+                estrenos = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"No se pudieron leer los próximos estrenos de {self.ruta_estrenos}: {str(e)}")
+            return []
+        return [
+            {
+                "id": e.get("tmdb_id") or e.get("id"),
+                "title": e.get("título", ""),
+                "original_title": e.get("título_original", ""),
+                "release_date": (e.get("fecha_estreno") or "")[:10],
+            }
+            for e in estrenos
+        ]
+
+    def _construir(self) -> IndiceTitulos:
+        indice = IndiceTitulos()
+        vistas = set()
+        for pelicula in self._cartelera() + self._estrenos():
+            movie_id = pelicula.get("id")
+            if not movie_id or movie_id in vistas:
+                continue
+            vistas.add(movie_id)
+            info = {"id": movie_id, "release_date": pelicula.get("release_date", "")}
+            for titulo in {pelicula.get("title"), pelicula.get("original_title")}:
+                if titulo:
+                    indice.añadir(titulo, info)
+        logger.info(f"Índice de cartelera con {len(vistas)} películas ({len(indice)} títulos)")
+        return indice
+
+    def buscar(self, titulo: str, limite: int = 3, umbral: float = 0.85) -> List[dict]:
+        """
+        Devuelve hasta `limite` películas de la cartelera o de próximos estrenos parecidas al
+        título, como diccionarios con id, release_date y similitud. El índice se construye en la
+        primera búsqueda.
+        """
+        with self._lock:
+            if self._indice is None:
+                self._indice = self._construir()
+        resultados = []
+        vistos = set()
+        # Se piden más coincidencias de las necesarias porque cada película tiene dos títulos
+        for puntuacion, _, info in self._indice.buscar(titulo, limite=limite * 2, umbral=umbral):
+            if info["id"] not in vistos:
+                vistos.add(info["id"])
+                resultados.append(dict(info, similitud=puntuacion))
+        return resultados[:limite]
+
+
+_indice_compartido = None
+_lock_creacion = threading.Lock()
+
+
+def obtener_cartelera(consultar: Callable[[str, dict], Optional[dict]]) -> Optional[IndiceCartelera]:
+    """
+    Devuelve el índice de cartelera compartido del proceso (o None si se ha desactivado con
+    TMDB_CARTELERA_DESACTIVADA=1). Se crea con la función de consulta del primer llamador.
+    """
+    global _indice_compartido
+    if os.getenv("TMDB_CARTELERA_DESACTIVADA") == "1":
+        return None
+    with _lock_creacion:
+        if _indice_compartido is None:
+            _indice_compartido = IndiceCartelera(consultar)
+        return _indice_compartido
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Índice de las críticas de Ghost in the Blog (index.json).
+Se carga una vez por ejecución en un diccionario por (título, fecha del post), acumula las
+entradas nuevas y se escribe una sola vez al final, de forma atómica, en lugar de leer,
+ordenar y reescribir el archivo entero por cada post guardado.
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, Tuple
+
+import archivo_posts
+
+logger = logging.getLogger(__name__)
+
+RUTA_INDICE = "index.json"
+
+
+def entrada_indice(post_data: dict) -> dict:
+    """Entrada del índice para un post (archivo: su JSON suelto al exportar el archivo de posts)"""
+    fecha_post = post_data['date'][:10]
+    return {
+        "título": post_data['pelicula'],
+        "director": post_data['director'],
+        "fecha_post": fecha_post,
+        "archivo": f"{archivo_posts.DIRECTORIO_POSTS}/{archivo_posts.nombre_archivo(archivo_posts.id_de(post_data))}"
+    }
+
+
+class IndiceCriticas:
+    def __init__(self, ruta: str = RUTA_INDICE):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._entradas: Dict[Tuple[str, str], dict] = {}
+        self._pendientes = 0
+        if os.path.exists(ruta):
+            with open(ruta, 'r', encoding='utf-8') as f:
+                for entrada in json.load(f):
+                    self._entradas[(entrada['título'], entrada['fecha_post'])] = entrada
+            logger.info(f"Índice existente cargado con {len(self._entradas)} películas")
+        else:
+            logger.info("Creando nuevo índice")
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def __contains__(self, clave: Tuple[str, str]) -> bool:
+        return clave in self._entradas
+
+    def añadir(self, post_data: dict) -> bool:
+        """Añade el post si no estaba en el índice; devuelve si se ha añadido"""
+        entrada = entrada_indice(post_data)
+        clave = (entrada['título'], entrada['fecha_post'])
+        with self._lock:
+            if clave in self._entradas:
+                logger.info(f"La película ya existe en el índice: {entrada['título']}")
+                return False
+            self._entradas[clave] = entrada
+            self._pendientes += 1
+        logger.info(f"Película agregada al índice: {entrada['título']}")
+        return True
+
+    def actualizar(self, post_data: dict) -> bool:
+        """Añade el post o sustituye su entrada si ha cambiado (p. ej. al reprocesarlo)"""
+        entrada = entrada_indice(post_data)
+        clave = (entrada['título'], entrada['fecha_post'])
+        with self._lock:
+            if self._entradas.get(clave) == entrada:
+                return False
+            self._entradas[clave] = entrada
+            self._pendientes += 1
+        return True
+
+    def guardar(self):
+        """Escribe el índice ordenado por título si hay entradas nuevas"""
+        with self._lock:
+            if not self._pendientes:
+                return
+            entradas = sorted(self._entradas.values(), key=lambda x: (x['título'], x['fecha_post']))
+            ruta_temporal = f"{self.ruta}.tmp"
+            with open(ruta_temporal, 'w', encoding='utf-8') as f:
+                json.dump(entradas, f, ensure_ascii=False, indent=4)
+            os.replace(ruta_temporal, self.ruta)
+            logger.info(f"Índice guardado con {len(entradas)} películas ({self._pendientes} nuevas)")
+            self._pendientes = 0
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Índice local de títulos de TMDB construido a partir de las exportaciones diarias de IDs.
+TMDB publica cada día un volcado (JSON por líneas comprimido con gzip) con el id, el título
+original y la popularidad de todas las películas. Este módulo lo importa en una base SQLite
+con búsqueda por trigramas (FTS5) para que el resolutor encuentre candidatos sin llamar a
+search/movie; la API solo se usa después para los detalles.
+
+Uso:
+    python indice_tmdb_local.py importar --archivo movie_ids_05_15_2025.json.gz
+    python indice_tmdb_local.py importar --descargar [--max-edad-dias 7]
+    python indice_tmdb_local.py buscar "Blade Runner"
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import requests
+
+import cliente_http
+from coincidencia_titulos import normalizar_titulo, puntuar_candidatos
+
+logger = logging.getLogger(__name__)
+
+RUTA_INDICE_POR_DEFECTO = os.path.join("cache", "tmdb_indice_local.sqlite")
+URL_EXPORTACION = "https://files.tmdb.org/p/exports/movie_ids_{fecha:%m_%d_%Y}.json.gz"
+
+FILAS_POR_LOTE = 10000
+# Número de filas que se puntúan con SequenceMatcher tras el prefiltro de trigramas
+MAX_CANDIDATOS = 200
+
+
+def _consulta_fts(texto: str) -> str:
+    """Convierte un texto en una cadena entre comillas para MATCH de FTS5"""
+    return '"' + texto.replace('"', '""') + '"'
+
+
+class IndiceTMDbLocal:
+    def __init__(self, ruta: str = RUTA_INDICE_POR_DEFECTO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+
+    def metadatos(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conexion.execute("SELECT clave, valor FROM metadatos").fetchall())
+
+    def buscar(self, titulo: str, limite: int = 10, umbral: float = 0.6,
+               max_candidatos: int = MAX_CANDIDATOS) -> List[dict]:
+        """
+        Devuelve hasta `limite` películas cuyo título original se parece al buscado, ordenadas por
+        similitud y, a igual similitud, por popularidad. Cada resultado es un diccionario con
+        id, original_title, popularity y similitud.
+        """
+        normalizado = normalizar_titulo(titulo)
+        # El tokenizador de trigramas no puede buscar textos de menos de tres caracteres
+        if len(normalizado) < 3:
+            return []
+
+        # Primero el título completo como subcadena (muy selectivo); si no basta, cualquier trigrama
+        filas = self._consultar(_consulta_fts(normalizado), max_candidatos)
+        puntuados = puntuar_candidatos(titulo, filas, clave=lambda f: f[1], umbral=umbral)
+        if not puntuados:
+            trigramas = {normalizado[i:i + 3] for i in range(len(normalizado) - 2)}
+            filas = self._consultar(" OR ".join(_consulta_fts(t) for t in sorted(trigramas)), max_candidatos)
+            puntuados = puntuar_candidatos(titulo, filas, clave=lambda f: f[1], umbral=umbral)
+
+        puntuados.sort(key=lambda x: (x[0], x[1][3]), reverse=True)
+        return [
+            {"id": fila[2], "original_title": fila[1], "popularity": fila[3], "similitud": puntuacion}
+            for puntuacion, fila in puntuados[:limite]
+        ]
+
+    def _consultar(self, expresion: str, limite: int) -> list:
+        with self._lock:
+            return self._conexion.execute(
+                "SELECT titulo_normalizado, original_title, tmdb_id, popularidad FROM titulos "
+                "WHERE titulos MATCH ? ORDER BY rank LIMIT ?",
+                (expresion, limite)
+            ).fetchall()
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+def importar_exportacion(ruta_volcado: str, ruta_indice: str = RUTA_INDICE_POR_DEFECTO,
+                         popularidad_minima: float = 0.0) -> int:
+    """
+    Construye el índice a partir de un volcado de IDs de TMDB (.json.gz o .json por líneas).
+    Se escribe en un archivo temporal que sustituye al índice anterior al terminar, de modo
+    que los scrapers nunca ven un índice a medio construir. Devuelve el número de películas.
+    """
+    os.makedirs(os.path.dirname(ruta_indice) or ".", exist_ok=True)
+    ruta_temporal = f"{ruta_indice}.tmp"
+    if os.path.exists(ruta_temporal):
+        os.remove(ruta_temporal)
+
+    conexion = sqlite3.connect(ruta_temporal)
+    conexion.execute(
+        "CREATE VIRTUAL TABLE titulos USING fts5("
+        "titulo_normalizado, original_title UNINDEXED, tmdb_id UNINDEXED, popularidad UNINDEXED, "
+        "tokenize='trigram')"
+    )
+    conexion.execute("CREATE TABLE metadatos (clave TEXT PRIMARY KEY, valor TEXT)")
+
+    abrir = gzip.open if ruta_volcado.endswith(".gz") else open
+    total = 0
+    lote = []
+    with abrir(ruta_volcado, "rt", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                pelicula = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            if pelicula.get("adult") or pelicula.get("video"):
+                continue
+            popularidad = pelicula.get("popularity") or 0.0
+            normalizado = normalizar_titulo(pelicula.get("original_title", ""))
+            if not normalizado or popularidad < popularidad_minima:
+                continue
+            lote.append((normalizado, pelicula["original_title"], pelicula["id"], popularidad))
+            if len(lote) >= FILAS_POR_LOTE:
+                conexion.executemany("INSERT INTO titulos VALUES (?, ?, ?, ?)", lote)
+                total += len(lote)
+                lote = []
+    if lote:
+        conexion.executemany("INSERT INTO titulos VALUES (?, ?, ?, ?)", lote)
+        total += len(lote)
+
+    conexion.executemany("INSERT INTO metadatos VALUES (?, ?)", [
+        ("origen", os.path.basename(ruta_volcado)),
+        ("importado", datetime.now().isoformat()),
+        ("peliculas", str(total)),
+    ])
+    conexion.execute("INSERT INTO titulos(titulos) VALUES ('optimize')")
+    conexion.commit()
+    conexion.close()
+    os.replace(ruta_temporal, ruta_indice)
+    logger.info(f"Índice local de TMDB creado en {ruta_indice} con {total} películas")
+    return total
+
+
+def descargar_exportacion(destino: str = "cache") -> str:
+    """Descarga el último volcado de IDs disponible (el de hoy o, si aún no existe, el de ayer)"""
+    os.makedirs(destino, exist_ok=True)
+    ultimo_error = None
+    for dias in (0, 1, 2):
+        fecha = datetime.now(timezone.utc) - timedelta(days=dias)
+        url = URL_EXPORTACION.format(fecha=fecha)
+        ruta = os.path.join(destino, os.path.basename(url))
+        try:
+            cliente_http.descargar_archivo(url, ruta)
+            logger.info(f"Volcado de TMDB descargado: {url}")
+            return ruta
+        except requests.exceptions.RequestException as e:
+            ultimo_error = e
+            logger.warning(f"No se pudo descargar {url}: {str(e)}")
+    raise RuntimeError(f"No hay ningún volcado de TMDB disponible: {str(ultimo_error)}")
+
+
+def edad_indice(ruta: str = RUTA_INDICE_POR_DEFECTO) -> Optional[float]:
+    """Antigüedad del índice en días, o None si no existe"""
+    if not os.path.exists(ruta):
+        return None
+    return (time.time() - os.path.getmtime(ruta)) / (24 * 60 * 60)
+
+
+_indice_compartido = None
+_lock_creacion = threading.Lock()
+
+
+def obtener_indice() -> Optional[IndiceTMDbLocal]:
+    """
+    Devuelve el índice local compartido del proceso, o None si no se ha importado ningún
+    volcado (o si se ha desactivado con TMDB_INDICE_LOCAL_DESACTIVADO=1).
+    """
+    global _indice_compartido
+    with _lock_creacion:
+        if _indice_compartido is None:
+            ruta = os.getenv("TMDB_INDICE_LOCAL_RUTA", RUTA_INDICE_POR_DEFECTO)
+            if os.getenv("TMDB_INDICE_LOCAL_DESACTIVADO") == "1" or not os.path.exists(ruta):
+                return None
+            try:
+                _indice_compartido = IndiceTMDbLocal(ruta)
+                _indice_compartido.metadatos()
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo abrir el índice local de TMDB en {ruta}: {str(e)}")
+                _indice_compartido = None
+        return _indice_compartido
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Índice local de títulos de TMDB a partir de los volcados diarios")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    importar = subparsers.add_parser("importar", help="Construir el índice a partir de un volcado")
+    origen = importar.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--archivo", help="Volcado local (movie_ids_MM_DD_YYYY.json.gz)")
+    origen.add_argument("--descargar", action="store_true", help="Descargar el último volcado de files.tmdb.org")
+    importar.add_argument("--indice", default=RUTA_INDICE_POR_DEFECTO, help="Ruta del índice SQLite")
+    importar.add_argument("--popularidad-minima", type=float, default=0.0,
+                          help="Descartar películas por debajo de esta popularidad (índice más pequeño)")
+    importar.add_argument("--max-edad-dias", type=float, default=None,
+                          help="No hacer nada si el índice existente es más reciente que esto")
+
+    buscar = subparsers.add_parser("buscar", help="Buscar un título en el índice")
+    buscar.add_argument("titulo")
+    buscar.add_argument("--indice", default=RUTA_INDICE_POR_DEFECTO, help="Ruta del índice SQLite")
+    buscar.add_argument("--limite", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.comando == "importar":
+        edad = edad_indice(args.indice)
+        if args.max_edad_dias is not None and edad is not None and edad < args.max_edad_dias:
+            logger.info(f"El índice local tiene {edad:.1f} días; no es necesario reconstruirlo")
+            return 0
+        ruta_volcado = descargar_exportacion() if args.descargar else args.archivo
+        importar_exportacion(ruta_volcado, args.indice, args.popularidad_minima)
+        if args.descargar:
+            os.remove(ruta_volcado)
+        return 0
+
+    if not os.path.exists(args.indice):
+        logger.error(f"No existe el índice {args.indice}. Ejecuta primero el comando importar")
+        return 1
+    indice = IndiceTMDbLocal(args.indice)
+    inicio = time.perf_counter()
+    resultados = indice.buscar(args.titulo, limite=args.limite)
+    duracion = (time.perf_counter() - inicio) * 1000
+    for r in resultados:
+        print(f"{r['similitud']:.2f}  {r['id']:>8}  {r['popularity']:>8.2f}  {r['original_title']}")
+    print(f"{len(resultados)} resultados en {duracion:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
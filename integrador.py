@@ -8,25 +8,15 @@ Reemplaza al integrador.py original con lógica robusta de fusión de datos.
 import json
 import os
 import logging
-import unicodedata
-import re
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
+from coincidencia_titulos import normalizar_titulo
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def normalize_title(title: str) -> str:
-    """Normaliza un título para comparación"""
-    if not title:
-        return ""
-    # Normalizar unicode y convertir a ASCII
-    title = unicodedata.normalize('NFKD', title).encode('ASCII', 'ignore').decode('ASCII')
-    # Remover caracteres especiales y espacios extra
-    title = re.sub(r'[^a-zA-Z0-9\s]', '', title)
-    return ' '.join(title.lower().split())
-
 def cargar_archivo_json(archivo: str) -> List[Dict[str, Any]]:
     """Carga un archivo JSON, retorna lista vacía si no existe"""
     try:
@@ -50,7 +40,7 @@ def cargar_equivalencias(archivo: str = "equivalencias_peliculas.json") -> Dict[
                     logger.info(f"Convirtiendo equivalencias de formato lista a diccionario")
                     equivalencias_dict = {}
                     for pelicula in datos:
-                        titulo_norm = normalize_title(pelicula.get('título', ''))
+                        titulo_norm = normalizar_titulo(pelicula.get('título', ''))
                         if titulo_norm and pelicula.get('tmdb_id'):
                             equivalencias_dict[titulo_norm] = {
                                 'tmdb_id': pelicula.get('tmdb_id'),
@@ -98,7 +88,7 @@ def generar_id_unico(pelicula: Dict[str, Any]) -> str:
     if pelicula.get('tmdb_id'):
         return f"tmdb_{pelicula['tmdb_id']}"
     else:
-        titulo_norm = normalize_title(pelicula.get('título', ''))
+        titulo_norm = normalizar_titulo(pelicula.get('título', ''))
         return f"titulo_{titulo_norm}"
 
 def tiene_horarios_futuros(pelicula: Dict[str, Any]) -> bool:
@@ -190,7 +180,7 @@ def sincronizar_equivalencias(peliculas: List[Dict], equivalencias: Dict) -> Dic
     
     for pelicula in peliculas:
         if pelicula.get('tmdb_id'):
-            titulo_norm = normalize_title(pelicula.get('título', ''))
+            titulo_norm = normalizar_titulo(pelicula.get('título', ''))
             if titulo_norm:
                 equivalencia_nueva = {
                     'tmdb_id': pelicula['tmdb_id'],
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Parseo de HTML restringido a las partes de cada página que usan los scrapers.
+En lugar de construir el árbol completo de la página, BeautifulSoup solo crea los
+elementos que cumplen el filtro de la página (y su contenido), y usa lxml como
+constructor cuando está instalado (HTML_PARSER permite forzar otro).
+
+Uso (comparar el rendimiento con las páginas guardadas en cache/html):
+    python parseo_html.py benchmark [--repeticiones 20]
+    python parseo_html.py benchmark --archivo pagina.html --filtro golem
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+import importlib.util
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:
+    # beautifulsoup4 < 4.13: los filtros se expresan con una función (nombre, atributos)
+    ElementFilter = None
+
+logger = logging.getLogger(__name__)
+
+CONSTRUCTOR = os.getenv("HTML_PARSER") or ("lxml" if importlib.util.find_spec("lxml") else "html.parser")
+
+# Una regla es un nombre de etiqueta o (nombre, {atributo: valor exacto o función(valor) -> bool})
+Regla = Union[str, Tuple[str, Dict[str, Union[str, Callable[[Optional[str]], bool]]]]]
+
+
+def _coincide(regla: Tuple[str, dict], nombre: str, atributos: dict) -> bool:
+    nombre_regla, atributos_regla = regla
+    if nombre != nombre_regla:
+        return False
+    for atributo, esperado in atributos_regla.items():
+        valor = atributos.get(atributo)
+        if isinstance(valor, list):
+            valor = " ".join(valor)
+        if not (esperado(valor) if callable(esperado) else valor == esperado):
+            return False
+    return True
+
+
+if ElementFilter is not None:
+    class _FiltroReglas(ElementFilter):
+        """Filtro de parse_only para beautifulsoup4 >= 4.13"""
+
+        def __init__(self, admite: Callable[[str, dict], bool]):
+            super().__init__()
+            self.admite = admite
+
+        def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+            return self.admite(name, attrs or {})
+
+        def allow_string_creation(self, string) -> bool:
+            # Solo se consulta para el texto que queda fuera de los elementos conservados
+            return False
+
+
+def solo(*reglas: Regla):
+    """
+    Filtro para parsear solo los elementos que cumplen alguna de las reglas, con todo su
+    contenido. El resto de la página no llega a convertirse en objetos de BeautifulSoup.
+    """
+    reglas = [(regla, {}) if isinstance(regla, str) else regla for regla in reglas]
+
+    def admite(nombre: str, atributos: Optional[dict]) -> bool:
+        return any(_coincide(regla, nombre, atributos or {}) for regla in reglas)
+
+    if ElementFilter is None:
+        return SoupStrainer(admite)
+    return _FiltroReglas(admite)
+
+
+def _contiene_clase(clase: str) -> Callable[[Optional[str]], bool]:
+    return lambda valor: bool(valor) and clase in valor.split()
+
+
+# Partes de cada página que leen los scrapers
+FILTROS = {
+    # Bloques de película de las páginas diarias de Golem
+    "golem": solo(("table", {"background": "#AEAEAE"})),
+    # Título, fecha, idioma, cartel y enlace de compra de un evento de la Filmoteca
+    "filmoteca": solo(
+        "h1", "h2",
+        ("div", {"class": "txt txt22"}),
+        ("div", {"class": _contiene_clase("dcha")}),
+        ("a", {"href": lambda valor: bool(valor) and "bacantix.com" in valor.lower()}),
+    ),
+    # Listado de posts y contenido de un post de Ghost in the Blog
+    "ghost_portada": solo("article"),
+    "ghost_post": solo(("div", {"class": _contiene_clase("entry-content")})),
+}
+
+
+def parsear(html: str, filtro: Optional[str] = None, constructor: Optional[str] = None) -> BeautifulSoup:
+    """Parsea una página, solo con las partes del filtro indicado de FILTROS si se da"""
+    parse_only = FILTROS[filtro] if filtro else None
+    return BeautifulSoup(html, constructor or CONSTRUCTOR, parse_only=parse_only)
+
+
+def _filtro_para_url(url: str) -> Optional[str]:
+    """Filtro que corresponde a una página guardada en cache/html, según su URL"""
+    if "golem.es" in url:
+        return "golem"
+    if "filmotecanavarra.com" in url and "evento.asp" in url:
+        return "filmoteca"
+    if "ghostintheblog.com" in url:
+        return "ghost_portada" if url.rstrip("/").endswith("ghostintheblog.com") else "ghost_post"
+    return None
+
+
+def _paginas_guardadas(directorio: str) -> list:
+    paginas = []
+    for ruta in glob.glob(os.path.join(directorio, "*", "*.json")):
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                guardada = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        filtro = _filtro_para_url(guardada.get("url", ""))
+        if filtro and "texto" in guardada:
+            paginas.append((filtro, guardada["texto"]))
+    return paginas
+
+
+def _medir(paginas: list, constructor: str, filtrar: bool, repeticiones: int) -> float:
+    """Milisegundos por página"""
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for filtro, html in paginas:
+            parsear(html, filtro if filtrar else None, constructor)
+    return (time.perf_counter() - inicio) * 1000 / (repeticiones * len(paginas))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Parseo restringido de las páginas de los scrapers")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    benchmark = subparsers.add_parser("benchmark", help="Comparar el parseo completo y el restringido")
+    benchmark.add_argument("--directorio", default=os.path.join("cache", "html"),
+                           help="Directorio de páginas guardadas por cache_html")
+    benchmark.add_argument("--archivo", help="Medir un archivo HTML concreto en vez de las páginas guardadas")
+    benchmark.add_argument("--filtro", choices=sorted(FILTROS), help="Filtro a aplicar con --archivo")
+    benchmark.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.archivo:
+        if not args.filtro:
+            parser.error("--archivo necesita --filtro")
+        with open(args.archivo, "r", encoding="utf-8") as f:
+            paginas = [(args.filtro, f.read())]
+    else:
+        paginas = _paginas_guardadas(args.directorio)
+    if not paginas:
+        logger.error(f"No hay páginas que medir en {args.directorio}. Ejecuta antes algún scraper")
+        return 1
+
+    constructores = ["html.parser"] + (["lxml"] if importlib.util.find_spec("lxml") else [])
+    print(f"{len(paginas)} páginas, {args.repeticiones} repeticiones (constructor por defecto: {CONSTRUCTOR})")
+    print(f"{'constructor':<12} {'completo (ms)':>14} {'filtrado (ms)':>14} {'mejora':>8}")
+    for constructor in constructores:
+        completo = _medir(paginas, constructor, False, args.repeticiones)
+        filtrado = _medir(paginas, constructor, True, args.repeticiones)
+        print(f"{constructor:<12} {completo:>14.2f} {filtrado:>14.2f} {completo / filtrado:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,11 +11,14 @@ import logging
 import argparse
 from datetime import datetime
 import requests
-import urllib.request
 import re
 import hashlib
 from dotenv import load_dotenv
 
+import cache_tmdb
+import cliente_http
+from tmdb_async import TMDbBatchClient, precarga_disponible
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -37,10 +40,14 @@ class TMDbAPI:
         self.base_url = "https://api.themoviedb.org/3"
     
     def _make_request(self, endpoint, params=None):
-        """Realiza una petición a la API de TMDB"""
+        """Realiza una petición a la API de TMDB a través de la caché compartida"""
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint, params=None):
+        """Descarga una respuesta de la API de TMDB, sin caché"""
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -91,7 +98,7 @@ class TMDbAPI:
         # Descargar el póster
         poster_url = f"https://image.tmdb.org/t/p/{size}{poster_path}"
         try:
-            urllib.request.urlretrieve(poster_url, file_path)
+            cliente_http.descargar_archivo(poster_url, file_path)
             logger.info(f"Póster descargado: {file_path}")
             return file_path
         except Exception as e:
@@ -120,7 +127,7 @@ class TMDbAPI:
         # Descargar el backdrop
         backdrop_url = f"https://image.tmdb.org/t/p/{size}{backdrop_path}"
         try:
-            urllib.request.urlretrieve(backdrop_url, file_path)
+            cliente_http.descargar_archivo(backdrop_url, file_path)
             logger.info(f"Backdrop descargado: {file_path}")
             return file_path
         except Exception as e:
@@ -157,6 +164,38 @@ def should_update_movie(new_movie, existing_movie):
     
     return False
 
+def prefetch_upcoming_movies(api, existing_map, max_pages=5, region="ES", language="es-ES"):
+    """Descarga en paralelo las páginas de estrenos, detalles e imágenes necesarios para dejar la caché caliente"""
+    if not precarga_disponible():
+        return
+    try:
+        first_page = api.get_upcoming_movies(region, language, 1)
+        if not first_page or "results" not in first_page:
+            return
+        total_pages = min(first_page.get("total_pages", 1), max_pages)
+        
+        batch = TMDbBatchClient(api.api_key)
+        other_pages = batch.get_many(
+            ("movie/upcoming", {"region": region, "language": language, "page": page})
+            for page in range(2, total_pages + 1)
+        )
+        movies = first_page["results"] + [m for p in other_pages for m in (p or {}).get("results", [])]
+        
+        # Solo las películas que el bucle principal va a consultar
+        ids = [
+            m["id"] for m in movies
+            if m["id"] not in existing_map or should_update_movie(m, existing_map[m["id"]])
+        ]
+        logger.info(f"Precargando {total_pages} páginas y {len(ids)} películas de TMDB en paralelo")
+        batch.details_many(ids, language=language, fallback_language=None,
+                           append_to_response="credits,release_dates")
+        batch.get_many(
+            (f"movie/{movie_id}/images", {"language": language, "include_image_language": f"{language},null"})
+            for movie_id in ids
+        )
+    except Exception as e:
+        logger.warning(f"Error en la precarga de TMDB, se continúa con consultas secuenciales: {str(e)}")
+
 def process_upcoming_movies(api, existing_movies=None, max_pages=5, region="ES", language="es-ES", 
                            download_images=True, images_folder="imagenes_estrenos"):
     """Procesa los próximos estrenos teniendo en cuenta datos existentes"""
@@ -166,6 +205,9 @@ def process_upcoming_movies(api, existing_movies=None, max_pages=5, region="ES",
     # Crear un mapa de películas existentes por ID para búsqueda rápida
     existing_map = {movie.get('id'): movie for movie in existing_movies if 'id' in movie}
     
+    # Lanzar en lote todas las peticiones a TMDB; el bucle siguiente las lee de la caché
+    prefetch_upcoming_movies(api, existing_map, max_pages, region, language)
+    
     all_movies = []
     updated_count = 0
     new_count = 0
@@ -352,6 +394,7 @@ def save_to_json(movies, filename):
 
 def main():
     """Función principal del script"""
+    cliente_http.configurar_cassette_desde_argumentos()
     parser = argparse.ArgumentParser(description="Obtener próximos estrenos de películas en España")
     parser.add_argument("--region", default="ES", help="Código de región (default: ES para España)")
     parser.add_argument("--language", default="es-ES", help="Código de idioma (default: es-ES)")
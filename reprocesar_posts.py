@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Vuelve a aplicar las reglas de extracción de extraccion_posts.py a todos los posts guardados,
+para que las mejoras lleguen también a los antiguos. Los posts se leen del archivo de posts y
+se reparten entre varios procesos. El contenido se vuelve a extraer del HTML de la página si
+está guardado en cache/html (los scrapers guardan ahí cada post que descargan); si no, se
+rederiva del post guardado (p. ej. el director a partir de la ficha técnica). No se hace
+ninguna petición.
+
+Los posts que cambian se añaden al archivo a medida que llegan, y se actualizan la búsqueda,
+las facetas, index.json y su JSON suelto en posts/. Al final se compacta el archivo para que
+las versiones sustituidas no se acumulen.
+
+Uso:
+    python reprocesar_posts.py [--procesos 4] [--simular]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import multiprocessing
+
+import archivo_posts
+import busqueda_criticas
+import cache_html
+import extraccion_posts
+from ficha_tecnica import IndiceFacetas, RUTA_FACETAS
+from indice_criticas import IndiceCriticas
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Posts que recibe cada proceso de una vez
+POSTS_POR_TAREA = 32
+# Cada cuántos posts se informa del progreso
+PROGRESO_CADA = 500
+
+
+def _iniciar_proceso():
+    # Los avisos de extracción por post de miles de posts no aportan nada en el log
+    logging.getLogger(extraccion_posts.__name__).setLevel(logging.ERROR)
+
+
+def _reprocesar(post_data: dict) -> tuple:
+    """(id, post nuevo o None si no cambia, si se ha usado el HTML guardado); en los procesos del pool"""
+    html = cache_html.texto_guardado(post_data['url']) if post_data.get('url') else None
+    nuevo = extraccion_posts.reextraer_post(post_data, html)
+    return archivo_posts.id_de(post_data), (nuevo if nuevo != post_data else None), html is not None
+
+
+def reprocesar(procesos: int = None, simular: bool = False) -> dict:
+    """Reprocesa todo el archivo y devuelve el resumen (posts, cambiados, con HTML, segundos)"""
+    archivo = archivo_posts.abrir()
+    if not simular:
+        busqueda = busqueda_criticas.obtener_indice()
+        facetas = IndiceFacetas(os.path.join(script_dir, RUTA_FACETAS))
+        indice = IndiceCriticas(os.path.join(script_dir, 'index.json'))
+    procesos = procesos or os.cpu_count() or 1
+    logger.info(f"Reprocesando {len(archivo)} posts con {procesos} procesos{' (simulación)' if simular else ''}")
+
+    total = con_html = 0
+    cambiados = set()
+    # Posts cambiados pendientes de indexar para la búsqueda (se indexan por lotes)
+    por_indexar = []
+    inicio = time.perf_counter()
+    with multiprocessing.Pool(procesos, initializer=_iniciar_proceso) as pool:
+        resultados = pool.imap_unordered(_reprocesar, archivo.recorrer(), chunksize=POSTS_POR_TAREA)
+        for id_, nuevo, desde_html in resultados:
+            total += 1
+            con_html += desde_html
+            if nuevo is not None:
+                cambiados.add(id_)
+                if not simular:
+                    archivo.añadir(nuevo)
+                    por_indexar.append(nuevo)
+                    facetas.añadir(nuevo)
+                    indice.actualizar(nuevo)
+            if total % PROGRESO_CADA == 0:
+                if por_indexar:
+                    busqueda.indexar(*por_indexar)
+                    por_indexar = []
+                segundos = time.perf_counter() - inicio
+                logger.info(f"{total} posts ({total / segundos:.0f} posts/s), {len(cambiados)} cambiados")
+
+    if not simular:
+        busqueda.indexar(*por_indexar)
+        archivo.guardar()
+        facetas.guardar()
+        indice.guardar()
+        if cambiados:
+            archivo.exportar(todos=True, ids=cambiados)
+            # Las versiones sustituidas solo ocupan sitio
+            archivo.compactar()
+    segundos = time.perf_counter() - inicio
+    logger.info(f"Reprocesados {total} posts en {segundos:.1f} s ({total / max(segundos, 1e-9):.0f} posts/s): "
+                f"{len(cambiados)} cambiados, {con_html} desde el HTML guardado")
+    return {"posts": total, "cambiados": len(cambiados), "con_html": con_html, "segundos": segundos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volver a extraer todos los posts con las reglas actuales")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--simular", action="store_true", help="Solo contar los posts que cambiarían")
+    args = parser.parse_args()
+    reprocesar(procesos=args.procesos, simular=args.simular)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
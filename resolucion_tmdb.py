@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Resolución de títulos a películas de TMDB.
+MemoriaResoluciones guarda las decisiones confirmadas (título → tmdb_id) y los veredictos
+de "no encontrada" de todos los scrapers, para no repetir búsquedas en TMDB en cada
+ejecución. Las entradas negativas caducan y se vuelven a intentar con una espera creciente;
+las equivalencias manuales de equivalencias_peliculas.json tienen prioridad sobre lo aprendido.
+ResolutorTMDb aprovecha las pistas que traen las fuentes (año, director, título original)
+probando estrategias de búsqueda de la más barata a la más cara.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+import atexit
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from coincidencia_titulos import normalizar_titulo, puntuar_candidatos, similitud
+from indice_cartelera import IndiceCartelera, obtener_cartelera
+from indice_tmdb_local import IndiceTMDbLocal, obtener_indice
+
+logger = logging.getLogger(__name__)
+
+RUTA_RESOLUCIONES = "resoluciones_tmdb.json"
+RUTA_EQUIVALENCIAS = "equivalencias_peliculas.json"
+
+DIA = 24 * 60 * 60
+
+# Una resolución positiva se vuelve a comprobar pasado este tiempo (remakes, títulos reutilizados)
+TTL_POSITIVA = 90 * DIA
+# Primera espera antes de reintentar un título no encontrado; se duplica en cada fallo
+TTL_NEGATIVA = 3 * DIA
+TTL_NEGATIVA_MAXIMA = 60 * DIA
+
+
+def _cargar_equivalencias(ruta: str) -> dict:
+    """Lee las equivalencias manuales (formato diccionario o lista antigua) como {título normalizado: tmdb_id}"""
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"No se pudieron leer las equivalencias de {ruta}: {str(e)}")
+        return {}
+
+    if isinstance(datos, dict):
+        pares = ((titulo, entrada) for titulo, entrada in datos.items() if isinstance(entrada, dict))
+    else:
+        pares = ((entrada.get("título", ""), entrada) for entrada in datos if isinstance(entrada, dict))
+
+    manuales = {}
+    for titulo, entrada in pares:
+        tmdb_id = entrada.get("tmdb_id")
+        clave = normalizar_titulo(titulo)
+        if tmdb_id and clave:
+            manuales[clave] = int(tmdb_id)
+    return manuales
+
+
+class MemoriaResoluciones:
+    def __init__(self, ruta: str = RUTA_RESOLUCIONES, ruta_equivalencias: str = RUTA_EQUIVALENCIAS):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._modificada = False
+        self._entradas = {}
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    self._entradas = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"No se pudo leer {ruta}: {str(e)}. Se empieza con la memoria vacía")
+        self._manuales = _cargar_equivalencias(ruta_equivalencias)
+
+    def consultar(self, titulo: str) -> Optional[dict]:
+        """
+        Devuelve la resolución vigente de un título, o None si hay que buscarlo en TMDB.
+        La resolución es un diccionario con "tmdb_id" (None si el título no se encontró).
+        """
+        clave = normalizar_titulo(titulo)
+        if not clave:
+            return None
+        if clave in self._manuales:
+            return {"tmdb_id": self._manuales[clave], "fuente": "manual"}
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if not entrada:
+            return None
+        if time.time() >= entrada.get("reintentar", 0):
+            return None
+        return entrada
+
+    def recordar(self, titulo: str, tmdb_id: int, fuente: str = ""):
+        """Guarda una resolución confirmada"""
+        self._anotar(titulo, {"tmdb_id": int(tmdb_id), "reintentar": time.time() + TTL_POSITIVA}, fuente)
+
+    def recordar_no_encontrada(self, titulo: str, fuente: str = ""):
+        """Guarda que un título no tiene coincidencia en TMDB, con espera creciente hasta el próximo intento"""
+        clave = normalizar_titulo(titulo)
+        with self._lock:
+            anterior = self._entradas.get(clave) or {}
+        intentos = anterior.get("intentos", 0) + 1 if anterior.get("tmdb_id") is None else 1
+        ttl = min(TTL_NEGATIVA * 2 ** (intentos - 1), TTL_NEGATIVA_MAXIMA)
+        self._anotar(titulo, {"tmdb_id": None, "intentos": intentos, "reintentar": time.time() + ttl}, fuente)
+
+    def _anotar(self, titulo: str, entrada: dict, fuente: str):
+        clave = normalizar_titulo(titulo)
+        if not clave:
+            return
+        entrada.update({"título": titulo, "fuente": fuente, "fecha": datetime.now().isoformat()})
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._modificada = True
+
+    def guardar(self):
+        """Escribe la memoria a disco si ha cambiado"""
+        with self._lock:
+            if not self._modificada:
+                return
+            ruta_temporal = f"{self.ruta}.tmp"
+            with open(ruta_temporal, "w", encoding="utf-8") as f:
+                json.dump(self._entradas, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(ruta_temporal, self.ruta)
+            self._modificada = False
+        logger.info(f"Guardadas {len(self._entradas)} resoluciones de títulos en {self.ruta}")
+
+
+_memoria_compartida = None
+_lock_creacion = threading.Lock()
+
+
+def obtener_memoria() -> MemoriaResoluciones:
+    """Devuelve la memoria compartida del proceso, creándola la primera vez"""
+    global _memoria_compartida
+    with _lock_creacion:
+        if _memoria_compartida is None:
+            _memoria_compartida = MemoriaResoluciones(os.getenv("TMDB_RESOLUCIONES_RUTA", RUTA_RESOLUCIONES))
+            atexit.register(_memoria_compartida.guardar)
+        return _memoria_compartida
+
+
+def consultar(titulo: str) -> Optional[dict]:
+    """Atajo para consultar la memoria compartida"""
+    return obtener_memoria().consultar(titulo)
+
+
+def recordar(titulo: str, tmdb_id: int, fuente: str = ""):
+    """Atajo para guardar una resolución confirmada en la memoria compartida"""
+    obtener_memoria().recordar(titulo, tmdb_id, fuente)
+
+
+def recordar_no_encontrada(titulo: str, fuente: str = ""):
+    """Atajo para guardar un título sin coincidencia en la memoria compartida"""
+    obtener_memoria().recordar_no_encontrada(titulo, fuente)
+
+
+# Resolutor por estrategias
+
+UMBRAL_SIMILITUD = 0.6
+# La cartelera es pequeña, pero convive con reposiciones de títulos parecidos ("Batman" / "The Batman")
+UMBRAL_CARTELERA = 0.85
+# El índice local solo tiene títulos originales: se exige una coincidencia casi exacta
+UMBRAL_INDICE_LOCAL = 0.9
+# Sin año ni director que confirmar, un candidato del índice local (todo TMDB, con muchísimas
+# películas desconocidas) solo se acepta si es al menos así de popular
+POPULARIDAD_MINIMA_INDICE_LOCAL = 5.0
+UMBRAL_DIRECTOR = 0.8
+CANDIDATOS_POR_RONDA = 3
+
+_RE_PARENTESIS_FINAL = re.compile(r'\s*\(([^()]*)\)\s*$')
+_RE_ANIO = re.compile(r'^(18|19|20)\d{2}$')
+
+# Fuentes cuyos títulos terminan en "(País, Año)" o "(Título original, País, Año)"
+FUENTES_CON_PARENTESIS = {"filmoteca"}
+# Fuentes cuyos títulos son "PELÍCULA de Director"
+FUENTES_CON_DIRECTOR = {"ghostintheblog"}
+# Países que aparecen en los paréntesis de la Filmoteca (normalizados), para no tomarlos por títulos
+_PAISES = frozenset(normalizar_titulo(pais) for pais in (
+    "EEUU", "EE.UU.", "USA", "Estados Unidos", "España", "Francia", "Italia", "Alemania", "RFA", "RDA",
+    "Reino Unido", "Gran Bretaña", "Irlanda", "Portugal", "Bélgica", "Holanda", "Países Bajos",
+    "Luxemburgo", "Suiza", "Austria", "Dinamarca", "Suecia", "Noruega", "Finlandia", "Islandia",
+    "Polonia", "Checoslovaquia", "República Checa", "Chequia", "Eslovaquia", "Hungría", "Rumanía",
+    "Bulgaria", "Grecia", "Turquía", "Yugoslavia", "Serbia", "Croacia", "Bosnia", "Eslovenia",
+    "URSS", "Rusia", "Ucrania", "Georgia", "Armenia", "Israel", "Palestina", "Líbano", "Irán", "Irak",
+    "Egipto", "Marruecos", "Argelia", "Túnez", "Senegal", "Mali", "Burkina Faso", "Sudáfrica", "Nigeria",
+    "India", "Pakistán", "China", "Hong Kong", "Taiwán", "Japón", "Corea", "Corea del Sur", "Tailandia",
+    "Filipinas", "Indonesia", "Vietnam", "Australia", "Nueva Zelanda", "Canadá", "México", "Cuba",
+    "Argentina", "Brasil", "Chile", "Colombia", "Perú", "Uruguay", "Venezuela", "Bolivia",
+))
+
+# Marca de que una estrategia no pudo completarse por un error en las peticiones
+_ERROR = object()
+
+
+@dataclass
+class PistasTitulo:
+    titulo: str
+    anio: Optional[int] = None
+    titulo_original: Optional[str] = None
+    director: Optional[str] = None
+    # Título tal como viene de la fuente, si se le han quitado las pistas
+    titulo_completo: Optional[str] = None
+
+    def titulos(self) -> List[str]:
+        """Títulos con los que buscar: el completo antes que el recortado"""
+        return list(dict.fromkeys(t for t in (self.titulo_completo, self.titulo) if t))
+
+    def consultas(self, original_primero: bool = False) -> List[str]:
+        """Los títulos y el título original, este al final o, si se indica, al principio"""
+        titulos = self.titulos()
+        if self.titulo_original:
+            titulos = [self.titulo_original] + titulos if original_primero else titulos + [self.titulo_original]
+        return list(dict.fromkeys(titulos))
+
+
+def _a_entero(valor) -> Optional[int]:
+    try:
+        return int(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _anio_cercano(fecha_estreno: str, anio: int) -> bool:
+    """Admite un año de diferencia entre el año de la fuente y el estreno en TMDB"""
+    anio_estreno = _a_entero((fecha_estreno or "")[:4])
+    return not anio_estreno or abs(anio_estreno - anio) <= 1
+
+
+def separar_director(titulo: str) -> Tuple[str, Optional[str]]:
+    """Separa los títulos del tipo "PELÍCULA de Director" (título en mayúsculas, director no)"""
+    if " de " in titulo:
+        pelicula, director = titulo.rsplit(" de ", 1)
+        if pelicula.isupper() and not director.isupper():
+            return pelicula.strip(), director.strip()
+    return titulo, None
+
+
+def _pistas_parentesis(contenido: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    (título original, año) de un paréntesis de la Filmoteca: "(EEUU, 1989)", "(Italia, Francia, 1960)"
+    o "(Ghostbusters, EEUU, 1984)". None si no tiene esa forma ("(Sentencia final)").
+    """
+    partes = [p.strip() for p in contenido.split(",") if p.strip()]
+    anio = partes.pop() if partes and _RE_ANIO.match(partes[-1]) else None
+    if not partes:
+        return (None, anio) if anio else None
+    paises = [normalizar_titulo(p) in _PAISES for p in partes]
+    if all(paises):
+        return None, anio
+    # Solo el primero puede ser el título original, y detrás tiene que venir al menos un país
+    if anio and not paises[0] and len(partes) >= 2 and all(paises[1:]):
+        return partes[0], anio
+    return None
+
+
+def extraer_pistas(titulo: str, anio=None, director: Optional[str] = None,
+                   titulo_original: Optional[str] = None, fuente: str = "") -> PistasTitulo:
+    """
+    Extrae las pistas que acompañan al título en las fuentes que las traen: "Batman (EEUU, 1989)"
+    o "Los cazafantasmas (Ghostbusters, EEUU, 1984)" en la Filmoteca y "PELÍCULA de Director" en
+    Ghost in the Blog. Los títulos de otras fuentes no se tocan, porque un paréntesis final suele
+    ser parte del título ("Misión: Imposible (Sentencia final)"). Las pistas recibidas
+    explícitamente tienen prioridad.
+    """
+    limpio = titulo.strip()
+    if not director and fuente in FUENTES_CON_DIRECTOR:
+        limpio, director = separar_director(limpio)
+
+    coincidencia = _RE_PARENTESIS_FINAL.search(limpio) if fuente in FUENTES_CON_PARENTESIS else None
+    pistas = _pistas_parentesis(coincidencia.group(1)) if coincidencia and coincidencia.start() > 0 else None
+    completo = None
+    if pistas:
+        original_parentesis, anio_parentesis = pistas
+        titulo_original = titulo_original or original_parentesis
+        anio = anio or anio_parentesis
+        completo = limpio
+        limpio = limpio[:coincidencia.start()].strip()
+
+    if director and director.strip().lower() == "desconocido":
+        director = None
+    return PistasTitulo(limpio, _a_entero(anio), titulo_original or None, director or None, completo)
+
+
+def clasificar_candidatos(consulta: str, resultados: List[dict], umbral: float = UMBRAL_SIMILITUD) -> List[dict]:
+    """
+    Ordena los resultados de una búsqueda por parecido con la consulta (contra el título
+    traducido y el original) y descarta los que no superan el umbral. A igual parecido
+    van primero los estrenos más recientes.
+    """
+    resultados = sorted(resultados, key=lambda x: x.get("release_date", "1900-01-01"), reverse=True)
+    # Cada resultado entra dos veces, por su título y por el original; se queda con la mejor puntuación,
+    # que es la primera en aparecer (la ordenación es estable, así que se conserva el orden por fecha)
+    titulos = [(r.get(campo, ""), r) for r in resultados for campo in ("title", "original_title")]
+    clasificados, vistos = [], set()
+    for puntuacion, (_, r) in puntuar_candidatos(consulta, titulos, clave=lambda t: t[0], umbral=umbral):
+        if puntuacion > umbral and id(r) not in vistos:
+            vistos.add(id(r))
+            clasificados.append(r)
+    return clasificados
+
+
+class ResolutorTMDb:
+    """
+    Resuelve un título de una fuente a un tmdb_id probando, hasta que una funciona:
+    1. La memoria de resoluciones (y las equivalencias manuales).
+    2. La cartelera de la región y los próximos estrenos ya guardados.
+    3. El índice local de títulos originales, si se ha importado un volcado de TMDB.
+    4. Búsqueda acotada al año (primary_release_year) cuando la fuente lo indica.
+    5. Búsqueda sin año, confirmando el director en los créditos si se conoce.
+    6. Búsqueda por el título original entre paréntesis.
+    7. Búsqueda en inglés.
+    """
+
+    def __init__(self, consultar: Callable[[str, dict], Optional[dict]], fuente: str,
+                 validar: Optional[Callable[[dict], bool]] = None,
+                 detalles_lote: Optional[Callable[[List[int]], Dict[int, dict]]] = None,
+                 umbral: float = UMBRAL_SIMILITUD, candidatos_por_ronda: int = CANDIDATOS_POR_RONDA,
+                 indice_local: Optional[IndiceTMDbLocal] = None, cartelera: Optional[IndiceCartelera] = None):
+        """
+        consultar: función (endpoint, params) -> respuesta de TMDB (normalmente TMDbAPI._make_request).
+        validar: comprobación opcional sobre los detalles de un candidato (p. ej. descartar cortos).
+        detalles_lote: función opcional ids -> {id: detalles} para verificar candidatos en paralelo.
+        indice_local: índice de volcados de TMDB; por defecto el compartido, si existe.
+        cartelera: índice de cartelera y próximos estrenos; por defecto el compartido.
+        """
+        self.consultar = consultar
+        self.fuente = fuente
+        self.validar = validar
+        self.detalles_lote = detalles_lote
+        self.umbral = umbral
+        self.candidatos_por_ronda = candidatos_por_ronda
+        self.indice_local = indice_local or obtener_indice()
+        self.cartelera = cartelera or obtener_cartelera(consultar)
+
+    def resolver(self, titulo: str, anio=None, director: Optional[str] = None,
+                 titulo_original: Optional[str] = None, clave: Optional[str] = None) -> Optional[int]:
+        """Devuelve el tmdb_id del título, o None si no se encuentra"""
+        # La clave estable de la fuente (p. ej. la Key de Yelmo) resiste cambios en el título
+        claves_memoria = ([f"{self.fuente}:{clave}"] if clave else []) + [titulo]
+        for clave_memoria in claves_memoria:
+            resolucion = consultar(clave_memoria)
+            if resolucion is not None:
+                if not resolucion["tmdb_id"]:
+                    logger.info(f"Se omite la búsqueda de '{titulo}': no se encontró en TMDB en una ejecución anterior")
+                    return None
+                logger.info(f"Usando el ID de TMDB recordado para '{titulo}': {resolucion['tmdb_id']}")
+                return resolucion["tmdb_id"]
+
+        pistas = extraer_pistas(titulo, anio, director, titulo_original, self.fuente)
+        locales = [("cartelera", self.cartelera, self._probar_cartelera),
+                   ("índice local", self.indice_local, self._probar_indice_local)]
+        for descripcion, indice, probar in locales:
+            if indice is None:
+                continue
+            resultado = probar(pistas)
+            if resultado:
+                logger.info(f"'{titulo}' resuelto como ID {resultado} ({descripcion})")
+                self._recordar(claves_memoria, resultado)
+                return resultado
+
+        hubo_errores = False
+        probadas = set()
+        for descripcion, consulta, idioma, anio_busqueda in self._estrategias(pistas):
+            if (consulta, idioma, anio_busqueda) in probadas:
+                continue
+            probadas.add((consulta, idioma, anio_busqueda))
+            logger.info(f"Buscando '{titulo}' en TMDB ({descripcion}): {consulta}")
+            resultado = self._probar(consulta, idioma, anio_busqueda, pistas)
+            if resultado is _ERROR:
+                hubo_errores = True
+            elif resultado:
+                logger.info(f"'{titulo}' resuelto como ID {resultado} ({descripcion})")
+                self._recordar(claves_memoria, resultado)
+                return resultado
+
+        logger.warning(f"No good match found for: {titulo}")
+        # Solo se recuerda el fallo si todas las peticiones llegaron a responder
+        if not hubo_errores:
+            for clave_memoria in claves_memoria:
+                recordar_no_encontrada(clave_memoria, self.fuente)
+        return None
+
+    def candidatos_locales(self, titulo: str, clave: Optional[str] = None) -> Optional[List[int]]:
+        """
+        IDs que resolver() comprobaría sin buscar en TMDB, para precargar sus detalles en lote:
+        el recordado, o los candidatos de la cartelera y del índice local. Devuelve [] si el
+        título está recordado como no encontrado y None si habrá que buscarlo.
+        """
+        for clave_memoria in ([f"{self.fuente}:{clave}"] if clave else []) + [titulo]:
+            resolucion = consultar(clave_memoria)
+            if resolucion is not None:
+                return [resolucion["tmdb_id"]] if resolucion["tmdb_id"] else []
+
+        pistas = extraer_pistas(titulo, fuente=self.fuente)
+        consultas = pistas.consultas()
+        ids = []
+        if self.cartelera is not None:
+            for consulta in consultas:
+                ids.extend(c["id"] for c in self.cartelera.buscar(consulta, limite=self.candidatos_por_ronda, umbral=UMBRAL_CARTELERA))
+        if not ids and self.indice_local is not None:
+            for consulta in consultas:
+                ids.extend(c["id"] for c in self._buscar_indice_local(consulta, pistas))
+        return list(dict.fromkeys(ids)) or None
+
+    def _buscar_indice_local(self, consulta: str, pistas: PistasTitulo) -> List[dict]:
+        candidatos = self.indice_local.buscar(consulta, limite=self.candidatos_por_ronda, umbral=UMBRAL_INDICE_LOCAL)
+        if pistas.anio or pistas.director:
+            return candidatos
+        return [c for c in candidatos if (c.get("popularity") or 0) >= POPULARIDAD_MINIMA_INDICE_LOCAL]
+
+    def _recordar(self, claves_memoria: List[str], movie_id: int):
+        for clave_memoria in claves_memoria:
+            recordar(clave_memoria, movie_id, self.fuente)
+
+    def _probar_cartelera(self, pistas: PistasTitulo) -> Optional[int]:
+        """Compara el título con la cartelera y los próximos estrenos, sin búsquedas en TMDB"""
+        for consulta in pistas.consultas():
+            candidatos = self.cartelera.buscar(consulta, limite=self.candidatos_por_ronda, umbral=UMBRAL_CARTELERA)
+            if pistas.anio:
+                candidatos = [c for c in candidatos if _anio_cercano(c["release_date"], pistas.anio)]
+            # El índice ya trae la fecha de estreno: solo hacen falta detalles para validar o confirmar el director
+            movie_id = self._elegir(candidatos, pistas, bool(self.validar or pistas.director))
+            if movie_id:
+                return movie_id
+        return None
+
+    def _probar_indice_local(self, pistas: PistasTitulo) -> Optional[int]:
+        """
+        Busca candidatos en el índice local (primero por el título original) y los confirma con
+        sus detalles, que get_movie_info_by_id leerá después de la caché. Sin año ni director que
+        comprobar, solo se aceptan películas populares.
+        """
+        for consulta in pistas.consultas(original_primero=True):
+            candidatos = self._buscar_indice_local(consulta, pistas)
+            movie_id = self._elegir(candidatos, pistas, True)
+            if movie_id:
+                return movie_id
+        return None
+
+    def _elegir(self, candidatos: List[dict], pistas: PistasTitulo, con_detalles: bool) -> Optional[int]:
+        """
+        Elige entre candidatos {id, similitud[, release_date]} el más parecido y, a igual
+        similitud, el estreno más reciente (como en las búsquedas de la API). Con detalles,
+        descarta además los que no cuadran con el año, el director o la validación.
+        """
+        if not candidatos:
+            return None
+        if not con_detalles:
+            return max((c["similitud"], c.get("release_date") or "", c["id"]) for c in candidatos)[2]
+
+        detalles = self._detalles([c["id"] for c in candidatos])
+        aceptados = []
+        for candidato in candidatos:
+            d = detalles.get(candidato["id"])
+            if not d:
+                continue
+            if pistas.anio and not _anio_cercano(d.get("release_date"), pistas.anio):
+                continue
+            if pistas.director and not self._confirma_director(d, pistas.director):
+                continue
+            if self.validar and not self.validar(d):
+                continue
+            aceptados.append((candidato["similitud"], d.get("release_date") or "", candidato["id"]))
+        return max(aceptados)[2] if aceptados else None
+
+    def _estrategias(self, pistas: PistasTitulo):
+        """
+        Estrategias de búsqueda (descripción, consulta, idioma, año) de la más barata a la más cara.
+        Si a título se le han quitado pistas, se busca antes tal como venía de la fuente.
+        """
+        for titulo in pistas.titulos():
+            if pistas.anio:
+                yield "año", titulo, "es", pistas.anio
+            yield "director" if pistas.director else "título", titulo, "es", None
+        if pistas.titulo_original:
+            if pistas.anio:
+                yield "título original y año", pistas.titulo_original, "es", pistas.anio
+            yield "título original", pistas.titulo_original, "es", None
+        yield "inglés", pistas.titulo, "en", None
+
+    def _probar(self, consulta: str, idioma: str, anio: Optional[int], pistas: PistasTitulo):
+        """Lanza una búsqueda y devuelve el primer candidato aceptable, None o _ERROR"""
+        params = {"query": consulta, "language": idioma}
+        if anio:
+            params["primary_release_year"] = anio
+        respuesta = self.consultar("search/movie", params)
+        if not respuesta:
+            return _ERROR
+
+        resultados = respuesta.get("results") or []
+        if pistas.anio and not anio:
+            # Fuera de la búsqueda por año se admite un año de diferencia con el estreno en TMDB
+            resultados = [r for r in resultados if _anio_cercano(r.get("release_date"), pistas.anio)]
+
+        candidatos = [r["id"] for r in clasificar_candidatos(consulta, resultados, self.umbral)]
+        if not candidatos:
+            return None
+        if not self.validar and not pistas.director:
+            return candidatos[0]
+
+        incompleto = False
+        for inicio in range(0, len(candidatos), self.candidatos_por_ronda):
+            ronda = candidatos[inicio:inicio + self.candidatos_por_ronda]
+            detalles = self._detalles(ronda)
+            for movie_id in ronda:
+                if not detalles.get(movie_id):
+                    incompleto = True
+                    continue
+                if pistas.director and not self._confirma_director(detalles[movie_id], pistas.director):
+                    continue
+                if self.validar and not self.validar(detalles[movie_id]):
+                    continue
+                return movie_id
+        return _ERROR if incompleto else None
+
+    def _detalles(self, ids: List[int]) -> Dict[int, dict]:
+        """Detalles con créditos de varios candidatos (mismos parámetros que get_movie_info_by_id)"""
+        if self.detalles_lote and len(ids) > 1:
+            return self.detalles_lote(ids)
+        detalles = {}
+        for movie_id in ids:
+            detalles[movie_id] = (
+                self.consultar(f"movie/{movie_id}", {"language": "es", "append_to_response": "credits"})
+                or self.consultar(f"movie/{movie_id}", {"language": "en", "append_to_response": "credits"})
+            )
+        return detalles
+
+    @staticmethod
+    def _confirma_director(detalles: dict, director: str) -> bool:
+        """Comprueba que alguno de los directores acreditados coincide con el de la fuente"""
+        creditos = detalles.get("credits") or {}
+        directores = [c["name"] for c in creditos.get("crew", []) if c.get("job") == "Director"]
+        return any(similitud(director, nombre) >= UMBRAL_DIRECTOR for nombre in directores)
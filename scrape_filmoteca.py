@@ -4,11 +4,15 @@ from bs4 import BeautifulSoup
 import json
 import os
 from datetime import datetime
-import urllib.request
 import re
 import time
 import logging
-from difflib import SequenceMatcher
+
+import cache_html
+import cache_tmdb
+import cliente_http
+import parseo_html
+from resolucion_tmdb import ResolutorTMDb
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -23,77 +27,39 @@ class TMDbAPI:
             "Content-Type": "application/json;charset=utf-8"
         }
         self.base_url = "https://api.themoviedb.org/3"
+        self.resolver = ResolutorTMDb(self._make_request, "filmoteca")
 
     def _make_request(self, endpoint: str, params: dict = None) -> dict:
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint: str, params: dict = None) -> dict:
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error making request to TMDb: {str(e)}")
             return {}
 
-    def _normalize_title(self, title: str) -> str:
-        import unicodedata
-        title = unicodedata.normalize('NFKD', title).encode('ASCII', 'ignore').decode('ASCII')
-        title = re.sub(r'[^a-zA-Z0-9\s]', '', title)
-        return ' '.join(title.lower().split())
-
-    def _title_similarity(self, title1: str, title2: str) -> float:
-        return SequenceMatcher(None, self._normalize_title(title1), self._normalize_title(title2)).ratio()
-
-    def get_movie_info(self, title: str) -> dict:
-        logger.info(f"Searching TMDb for title: {title}")
-
-        # Realizar una búsqueda con el título original
-        search_results = self._make_request("search/movie", params={"query": title, "language": "es"})
-
-        if not search_results or not search_results.get("results"):
-            # Si no hay resultados, intentar en inglés
-            logger.warning(f"No results found for '{title}' in Spanish. Trying English search...")
-            search_results = self._make_request("search/movie", params={"query": title, "language": "en"})
-
-        if not search_results or not search_results.get("results"):
-            logger.warning(f"No results found for: {title} in any language.")
-            return {}
-
-        # Ordenar por fecha de lanzamiento (más reciente primero)
-        results = sorted(search_results["results"], key=lambda x: x.get("release_date", "1900-01-01"), reverse=True)
-
-        # Buscar el mejor match por similitud
-        best_match = None
-        highest_similarity = 0
-
-        for result in results:
-            similarity = self._title_similarity(title, result.get("title", ""))
-            if similarity > highest_similarity:
-                highest_similarity = similarity
-                best_match = result
-
-        if best_match and highest_similarity > 0.6:
-            movie_id = best_match["id"]
-            logger.info(f"Found match: {best_match.get('title')} (ID: {movie_id}, Similarity: {highest_similarity})")
-
-            # Asegurarnos de obtener todos los detalles usando el ID encontrado
-            return self.get_movie_info_by_id(movie_id)
-
-        logger.warning(f"No good match found for: {title}")
-        return {}
+    def get_movie_info(self, title: str, year=None, director: str = None,
+                       original_title: str = None, key: str = None) -> dict:
+        # Memoria de resoluciones, búsqueda por año, director, título original e inglés
+        movie_id = self.resolver.resolver(title, anio=year, director=director,
+                                          titulo_original=original_title, clave=key)
+        return self.get_movie_info_by_id(movie_id) if movie_id else {}
     
     def get_movie_info_by_id(self, movie_id: int) -> dict:
         logger.info(f"Fetching movie by TMDb ID: {movie_id}")
 
-        details = self._make_request(f"movie/{movie_id}", params={"language": "es"})
+        # Detalles y créditos en una sola petición
+        details = self._make_request(f"movie/{movie_id}", params={"language": "es", "append_to_response": "credits"})
         if not details:
-            details = self._make_request(f"movie/{movie_id}", params={"language": "en"})
-
-        credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "es"})
-        if not credits:
-            credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
+            details = self._make_request(f"movie/{movie_id}", params={"language": "en", "append_to_response": "credits"})
 
-        if not details or not credits:
+        if not details:
             return {}
+        credits = details.get("credits") or {}
 
         return {
             "tmdb_id": movie_id,
@@ -132,14 +98,15 @@ def guardar_equivalencias(equivalencias):
     logger.info(f"Se han guardado {len(equivalencias)} películas en equivalencias_peliculas.json")
 
 # Inicio del script
+cliente_http.configurar_cassette_desde_argumentos()
 print("Scraping filmotecanavarra.com...")
 
 # Cargar equivalencias existentes
 equivalencias_peliculas = cargar_equivalencias()
 
 url = "https://www.filmotecanavarra.com/es/comprar-entradas.asp"
-response = requests.get(url)
-soup = BeautifulSoup(response.text, 'html.parser')
+response = cliente_http.get(url)
+soup = BeautifulSoup(response.text, parseo_html.CONSTRUCTOR)
 links = soup.find_all('a', href=True)
 
 processed_urls = set()
@@ -156,9 +123,10 @@ for link in links:
         try:
             if link['href'] not in processed_urls:
                 processed_urls.add(link['href'])
-                response = requests.get(f"https://www.filmotecanavarra.com/es/{link['href']}")
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                # Petición condicional: este script siempre reprocesa el evento porque de él
+                # dependen las equivalencias que se completan y se guardan al final
+                pagina = cache_html.obtener(f"https://www.filmotecanavarra.com/es/{link['href']}")
+                soup = parseo_html.parsear(pagina.texto, 'filmoteca')
 
                 title = soup.find('h1').text.strip()
                 divtxt22 = soup.find('div', class_='txt txt22')
@@ -236,7 +204,7 @@ for link in links:
                                 nombre_archivo = re.sub(r'[^a-zA-Z0-9]', '_', title) + '.jpg'
                                 ruta_imagen = os.path.join('imagenes_filmoteca', nombre_archivo)
                                 try:
-                                    urllib.request.urlretrieve(url_imagen, ruta_imagen)
+                                    cliente_http.descargar_archivo(url_imagen, ruta_imagen)
                                     print(f"Cartel guardado en: {ruta_imagen}")
                                 except Exception as e:
                                     print(f"Error al descargar la imagen: {str(e)}")
@@ -279,7 +247,7 @@ for link in links:
                                         tmdb_poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
                                         tmdb_poster_filename = os.path.join('imagenes_filmoteca', f"tmdb_{re.sub(r'[^a-zA-Z0-9]', '_', title)}.jpg")
                                         try:
-                                            urllib.request.urlretrieve(tmdb_poster_url, tmdb_poster_filename)
+                                            cliente_http.descargar_archivo(tmdb_poster_url, tmdb_poster_filename)
                                             pelicula['cartel'] = tmdb_poster_filename
                                         except Exception as e:
                                             logger.error(f"Error al descargar poster de TMDb: {str(e)}")
@@ -307,14 +275,8 @@ for link in links:
                                 # Si existe en equivalencias pero le faltan datos y no tiene ID, intentar actualizarla
                                 logger.info(f"La película '{title}' existe en equivalencias pero le faltan datos. Intentando actualizar...")
                                 
-                                # Buscar en TMDb (incluyendo título entre paréntesis)
-                                tmdb_info = tmdb_api.get_movie_info(title)
-                                if not tmdb_info:
-                                    match = re.search(r'\((.*?)\)', title)
-                                    if match:
-                                        titulo_original = match.group(1).strip()
-                                        logger.info(f"Intentando buscar con título original: {titulo_original}")
-                                        tmdb_info = tmdb_api.get_movie_info(titulo_original)
+                                # Buscar en TMDb (el resolutor usa también el año y el título entre paréntesis)
+                                tmdb_info = tmdb_api.get_movie_info(title, year=equivalencia.get("año"))
                                 
                                 if tmdb_info:
                                     # Actualizar la película con la información de TMDb
@@ -330,7 +292,7 @@ for link in links:
                                         tmdb_poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
                                         tmdb_poster_filename = os.path.join('imagenes_filmoteca', f"tmdb_{re.sub(r'[^a-zA-Z0-9]', '_', title)}.jpg")
                                         try:
-                                            urllib.request.urlretrieve(tmdb_poster_url, tmdb_poster_filename)
+                                            cliente_http.descargar_archivo(tmdb_poster_url, tmdb_poster_filename)
                                             pelicula['cartel'] = tmdb_poster_filename
                                         except Exception as e:
                                             logger.error(f"Error al descargar poster de TMDb: {str(e)}")
@@ -351,18 +313,10 @@ for link in links:
                                     nueva_pelicula["horarios"] = pelicula["horarios"]
                                     pelicula = nueva_pelicula
                         else:
-                            # Si no hay equivalencia, buscar en TMDb
+                            # Si no hay equivalencia, buscar en TMDb (el resolutor prueba con el año
+                            # y el título original entre paréntesis antes de darla por no encontrada)
                             tmdb_info = tmdb_api.get_movie_info(title)
                             
-                            # Si no encuentra resultados, intentar buscar con el título original (entre paréntesis)
-                            if not tmdb_info:
-                                # Buscar título entre paréntesis que podría ser el título original
-                                match = re.search(r'\((.*?)\)', title)
-                                if match:
-                                    titulo_original = match.group(1).strip()
-                                    logger.info(f"Intentando buscar con título original: {titulo_original}")
-                                    tmdb_info = tmdb_api.get_movie_info(titulo_original)
-                            
                             if tmdb_info:
                                 # Actualizar la película con la información de TMDb
                                 pelicula["tmdb_id"] = tmdb_info.get("tmdb_id")
@@ -377,7 +331,7 @@ for link in links:
                                     tmdb_poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
                                     tmdb_poster_filename = os.path.join('imagenes_filmoteca', f"tmdb_{re.sub(r'[^a-zA-Z0-9]', '_', title)}.jpg")
                                     try:
-                                        urllib.request.urlretrieve(tmdb_poster_url, tmdb_poster_filename)
+                                        cliente_http.descargar_archivo(tmdb_poster_url, tmdb_poster_filename)
                                         pelicula['cartel'] = tmdb_poster_filename
                                     except Exception as e:
                                         logger.error(f"Error al descargar poster de TMDb: {str(e)}")
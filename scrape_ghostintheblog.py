@@ -15,12 +15,18 @@
 # posts nuevos, si no hay, no borrar los archivos json anteriores.
 # 
 
-import requests
-from bs4 import BeautifulSoup
-import json
+import cache_html
+import cliente_http
+import parseo_html
+import archivo_posts
+import busqueda_criticas
+import extraccion_posts
+from ficha_tecnica import IndiceFacetas, RUTA_FACETAS
+from indice_criticas import IndiceCriticas
 import os
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Configurar logging
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -46,13 +52,19 @@ logger.setLevel(logging.INFO)
 logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
-def obtener_posts():
-    url = "https://ghostintheblog.com/"
+# Descargas simultáneas de páginas y posts, como máximo, a ghostintheblog.com
+MAX_DESCARGAS_SIMULTANEAS = 4
+# Páginas del listado que se recorren como mucho si todos los posts son nuevos (el resto es cosa
+# de scrape_ghostintheblog_resto.py)
+MAX_PAGINAS_NUEVAS = 5
+
+def obtener_posts(url="https://ghostintheblog.com/"):
     logging.info(f"Intentando obtener posts desde: {url}")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Aunque la portada no haya cambiado, sus posts se comparan con el archivo: si la ejecución
+        # anterior falló a mitad, alguno puede no haberse guardado
+        pagina = cache_html.obtener(url)
+        soup = parseo_html.parsear(pagina.texto, 'ghost_portada')
         posts = soup.find_all('article')
         logging.info(f"Se encontraron {len(posts)} posts")
         return posts
@@ -60,6 +72,19 @@ def obtener_posts():
         logging.error(f"Error al obtener posts: {str(e)}")
         return []
 
+def id_post_listado(post):
+    """Id en el archivo de posts de un post del listado"""
+    titulo = post.find('h2').text.strip()
+    fecha = post.find('time')['datetime']
+    pelicula, _ = extraccion_posts.separar_titulo(titulo)
+    return archivo_posts.id_post(pelicula, fecha)
+
+def post_archivado(post):
+    try:
+        return id_post_listado(post) in archivo_posts.abrir()
+    except Exception:
+        return False
+
 def extraer_info_post(post):
     logging.info("Comenzando extracción de información del post")
     try:
@@ -67,17 +92,8 @@ def extraer_info_post(post):
         titulo = post.find('h2').text.strip()
         fecha = post.find('time')['datetime']
         
-        # Crear el nombre del archivo que tendría
-        partes = titulo.split(' de ')
-        if len(partes) == 2:
-            pelicula = partes[0].strip()
-        else:
-            pelicula = titulo
-            
-        nombre_archivo = f"posts/{pelicula.replace(' ', '_')}_{fecha[:10]}.json"
-        
         # Verificar si ya existe
-        if os.path.exists(nombre_archivo):
+        if id_post_listado(post) in archivo_posts.abrir():
             logging.info(f"Post ya existente, saltando: {titulo}")
             return None
             
@@ -86,194 +102,71 @@ def extraer_info_post(post):
         logging.info(f"Título del post: {titulo}")
         logging.info(f"Fecha del post: {fecha}")
         
-        # Extraer película y director del título
-        partes = titulo.split(' de ')
-        if len(partes) == 2:
-            pelicula = partes[0].strip()
-            director = partes[1].strip()
-        else:
-            pelicula = titulo
-            director = "Desconocido"
-            logging.warning(f"No se pudo extraer director del título: {titulo}")
-        
-        # Obtener contenido del post completo
+        # Obtener contenido del post completo (la página queda guardada para poder reprocesarla)
         logging.info(f"Obteniendo contenido completo de: {url_original}")
-        response = requests.get(url_original, allow_redirects=True)
-        response.raise_for_status()
-        url_final = response.url
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extraer solo el contenido
-        contenido_div = soup.find('div', class_='entry-content')
-        if contenido_div:
-            # Primero, reemplazar los enlaces con su texto plano
-            for a in contenido_div.find_all('a'):
-                a.replace_with(a.get_text())
-            
-            # Obtener párrafos individuales
-            parrafos = contenido_div.find_all('p')
-            contenido_completo = ''
-            
-            for p in parrafos:
-                # Obtener el texto del párrafo y limpiar espacios extra
-                texto_parrafo = ' '.join(p.get_text().split())
-                contenido_completo += texto_parrafo + '\n\n'
-            
-            # Eliminar saltos de línea extra al final
-            contenido_completo = contenido_completo.rstrip()
-            
-            # Buscar el índice de "Título Original"
-            indice_inicio = contenido_completo.find("Título Original")
-            
-            if indice_inicio != -1:
-                # Extraer desde "Título Original"
-                contenido_parcial = contenido_completo[indice_inicio:].strip()
-                
-                # Buscar el final de la información técnica (después del último dato técnico)
-                datos_tecnicos = ["Dirección", "Guion", "Intérpretes", "País", "Duración"]
-                ultimo_indice = -1
-                
-                for dato in datos_tecnicos:
-                    indice = contenido_parcial.find(dato)
-                    if indice != -1:
-                        ultimo_indice = max(ultimo_indice, 
-                            contenido_parcial.find('\n', indice) if contenido_parcial.find('\n', indice) != -1 
-                            else len(contenido_parcial))
-                
-                if ultimo_indice != -1:
-                    # Extraer la ficha técnica
-                    ficha_tecnica = contenido_parcial[:ultimo_indice].strip()
-                    
-                    # Extraer el resto del contenido (la crítica)
-                    critica = contenido_parcial[ultimo_indice:].strip()
-                    
-                    # Combinar en formato estructurado
-                    contenido = f"{ficha_tecnica}\n\nCRÍTICA:\n{critica}"
-                    
-                    logging.info(f"Contenido extraído y estructurado ({len(contenido)} caracteres)")
-                    logging.debug(f"Ficha técnica: {ficha_tecnica[:200]}")
-                else:
-                    contenido = contenido_parcial
-                    logging.warning("No se pudo separar la ficha técnica de la crítica")
-            else:
-                logging.warning("No se encontró 'Título Original' en el contenido")
-                contenido = contenido_completo
-                logging.info("Usando contenido completo como respaldo")
-        else:
-            logging.error("No se encontró el div de contenido")
-            contenido = ""
-        
-        post_data = {
-            "title": titulo,
-            "pelicula": pelicula,
-            "director": director,
-            "url": url_final,
-            "date": fecha,
-            "content": contenido
-        }
-        
-        # Verificar la estructura del post
-        campos_requeridos = ["title", "pelicula", "director", "url", "date", "content"]
-        for campo in campos_requeridos:
-            if not post_data.get(campo):
-                logging.warning(f"Campo {campo} vacío o no presente en el post")
-        
-        return post_data
+        pagina = cache_html.obtener(url_original, allow_redirects=True)
+        return extraccion_posts.post_desde_html(titulo, fecha, pagina.url_final, pagina.texto)
         
     except Exception as e:
         logging.error(f"Error procesando post: {str(e)}")
         return None
 
-def actualizar_indice(post_data):
-    logging.info("Actualizando índice de películas")
+def guardar_post(post_data, indice):
     try:
-        index_file = os.path.join(script_dir, 'index.json')
-        logging.info(f"Archivo de índice: {index_file}")
+        id_post = archivo_posts.abrir().añadir(post_data)
+        logging.info(f"Post guardado en el archivo: {id_post}")
         
-        # Crear estructura del índice
-        pelicula_index = {
-            "título": post_data['pelicula'],
-            "director": post_data['director'],
-            "fecha_post": post_data['date'][:10],
-            "archivo": f"posts/{post_data['pelicula'].replace(' ', '_')}_{post_data['date'][:10]}.json"
-        }
-        
-        # Cargar índice existente o crear uno nuevo
-        if os.path.exists(index_file):
-            with open(index_file, 'r', encoding='utf-8') as f:
-                index = json.load(f)
-                logging.info(f"Índice existente cargado con {len(index)} películas")
-        else:
-            index = []
-            logging.info("Creando nuevo índice")
-            
-        # Verificar si la película ya existe en el índice
-        existe = False
-        for item in index:
-            if item['título'] == pelicula_index['título']:
-                existe = True
-                break
-                
-        # Agregar solo si no existe
-        if not existe:
-            index.append(pelicula_index)
-            # Ordenar por título
-            index.sort(key=lambda x: x['título'])
-            
-            # Guardar índice actualizado
-            with open(index_file, 'w', encoding='utf-8') as f:
-                json.dump(index, f, ensure_ascii=False, indent=4)
-            logging.info(f"Película agregada al índice: {pelicula_index['título']}")
-        else:
-            logging.info(f"La película ya existe en el índice: {pelicula_index['título']}")
-            
-    except Exception as e:
-        logging.error(f"Error actualizando el índice: {str(e)}")
-        raise
-
-def guardar_post(post_data):
-    try:
-        filename = f"posts/{post_data['pelicula'].replace(' ', '_')}_{post_data['date'][:10]}.json"
-        os.makedirs('posts', exist_ok=True)
-        
-        logging.info(f"Guardando post en: {filename}")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(post_data, f, ensure_ascii=False, indent=4)
-        logging.info("Post guardado exitosamente")
-        
-        # Actualizar el índice después de guardar el post
-        actualizar_indice(post_data)
+        # Añadir al índice (se escribe una sola vez al final)
+        indice.añadir(post_data)
         
     except Exception as e:
         logging.error(f"Error guardando post: {str(e)}")
 
 def main():
+    cliente_http.configurar_cassette_desde_argumentos()
     logging.info("Iniciando proceso de scraping")
     
     # Obtener posts existentes
-    posts_existentes = set()
-    if os.path.exists('posts'):
-        for archivo in os.listdir('posts'):
-            if archivo.endswith('.json'):
-                posts_existentes.add(archivo)
-    logging.info(f"Posts existentes encontrados: {len(posts_existentes)}")
+    archivo = archivo_posts.abrir()
+    logging.info(f"Posts existentes encontrados: {len(archivo)}")
+    
+    indice = IndiceCriticas(os.path.join(script_dir, 'index.json'))
     
     # Obtener posts nuevos
+    cliente_http.limitar_concurrencia("ghostintheblog.com", MAX_DESCARGAS_SIMULTANEAS)
     posts = obtener_posts()
+    pagina_num = 1
     
     posts_nuevos = 0
-    for post in posts:
-        info_post = extraer_info_post(post)
-        if info_post:
-            nombre_archivo = f"{info_post['pelicula'].replace(' ', '_')}_{info_post['date'][:10]}.json"
+    with ThreadPoolExecutor(max_workers=MAX_DESCARGAS_SIMULTANEAS) as executor:
+        while posts:
+            pendientes = [post for post in posts if not post_archivado(post)]
             
-            # Solo guardar si es un post nuevo
-            if nombre_archivo not in posts_existentes:
-                guardar_post(info_post)
-                posts_nuevos += 1
-                logging.info(f"Nuevo post guardado: {info_post['title']}")
+            # Los posts se descargan en paralelo y se guardan en orden desde este hilo
+            for info_post in executor.map(extraer_info_post, pendientes):
+                if info_post:
+                    # Solo guardar si es un post nuevo
+                    if archivo_posts.id_de(info_post) not in archivo:
+                        guardar_post(info_post, indice)
+                        posts_nuevos += 1
+                        logging.info(f"Nuevo post guardado: {info_post['title']}")
+            
+            # Una página con algún post ya archivado es donde se quedó la ejecución anterior
+            if len(pendientes) < len(posts):
+                break
+            pagina_num += 1
+            if pagina_num > MAX_PAGINAS_NUEVAS:
+                logging.warning(f"Más de {MAX_PAGINAS_NUEVAS} páginas de posts nuevos; usa scrape_ghostintheblog_resto.py para el resto")
+                break
+            posts = obtener_posts(f"https://ghostintheblog.com/page/{pagina_num}")
     
+    archivo.guardar()
+    indice.guardar()
+    # Indexar para la búsqueda los posts nuevos (la primera vez, todo el archivo)
+    busqueda_criticas.obtener_indice().sincronizar(archivo)
+    facetas = IndiceFacetas(os.path.join(script_dir, RUTA_FACETAS))
+    facetas.sincronizar(archivo)
+    facetas.guardar()
     logging.info(f"Proceso completado. Posts nuevos guardados: {posts_nuevos}")
 
 if __name__ == "__main__":
@@ -1,10 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
+import cache_html
+import cliente_http
+import parseo_html
+import archivo_posts
+import busqueda_criticas
+import extraccion_posts
+from ficha_tecnica import IndiceFacetas, RUTA_FACETAS
+from indice_criticas import IndiceCriticas
 import json
 import os
 from datetime import datetime
 import logging
 import time
+import atexit
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # Configurar logging similar al script original
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,19 +30,55 @@ logging.basicConfig(
     ]
 )
 
+RUTA_CHECKPOINT = os.path.join(script_dir, 'cache', 'ghost_paginas.json')
+# Páginas del listado que se piden a la vez y descargas simultáneas como máximo
+PAGINAS_POR_LOTE = 4
+MAX_DESCARGAS_SIMULTANEAS = 4
+
+def cargar_checkpoint():
+    """Última página recorrida por el backfill y si ha llegado al final del blog"""
+    try:
+        with open(RUTA_CHECKPOINT, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def guardar_checkpoint(checkpoint):
+    os.makedirs(os.path.dirname(RUTA_CHECKPOINT), exist_ok=True)
+    ruta_temporal = f"{RUTA_CHECKPOINT}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=4)
+    os.replace(ruta_temporal, RUTA_CHECKPOINT)
+
 def obtener_posts_de_pagina(url):
-    """Obtener posts de una página específica"""
+    """Obtener posts de una página específica ([] pasada la última página, None si hay un error)"""
     logging.info(f"Intentando obtener posts desde: {url}")
     try:
-        response = requests.get(url, timeout=10)
+        response = cliente_http.get(url, timeout=10)
+        # Pasada la última página el blog responde 404
+        if response.status_code == 404:
+            return []
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = parseo_html.parsear(response.text, 'ghost_portada')
         posts = soup.find_all('article')
         logging.info(f"Se encontraron {len(posts)} posts en la página")
         return posts
     except Exception as e:
         logging.error(f"Error al obtener posts de {url}: {str(e)}")
-        return []
+        return None
+
+def id_post_listado(post):
+    """Id en el archivo de posts de un post del listado"""
+    titulo = post.find('h2').text.strip()
+    fecha = post.find('time')['datetime']
+    pelicula, _ = extraccion_posts.separar_titulo(titulo)
+    return archivo_posts.id_post(pelicula, fecha)
+
+def post_archivado(post):
+    try:
+        return id_post_listado(post) in archivo_posts.abrir()
+    except Exception:
+        return False
 
 def extraer_info_post(post):
     """Extracción de información de un post (igual que en el script original)"""
@@ -42,17 +87,8 @@ def extraer_info_post(post):
         titulo = post.find('h2').text.strip()
         fecha = post.find('time')['datetime']
         
-        # Crear el nombre del archivo que tendría
-        partes = titulo.split(' de ')
-        if len(partes) == 2:
-            pelicula = partes[0].strip()
-        else:
-            pelicula = titulo
-            
-        nombre_archivo = f"posts/{pelicula.replace(' ', '_')}_{fecha[:10]}.json"
-        
         # Verificar si ya existe
-        if os.path.exists(nombre_archivo):
+        if id_post_listado(post) in archivo_posts.abrir():
             logging.info(f"Post ya existente, saltando: {titulo}")
             return None
             
@@ -61,203 +97,116 @@ def extraer_info_post(post):
         logging.info(f"Título del post: {titulo}")
         logging.info(f"Fecha del post: {fecha}")
         
-        # Extraer película y director del título
-        partes = titulo.split(' de ')
-        if len(partes) == 2:
-            pelicula = partes[0].strip()
-            director = partes[1].strip()
-        else:
-            pelicula = titulo
-            director = "Desconocido"
-            logging.warning(f"No se pudo extraer director del título: {titulo}")
-        
-        # Obtener contenido del post completo
+        # Obtener contenido del post completo (la página queda guardada para poder reprocesarla)
         logging.info(f"Obteniendo contenido completo de: {url_original}")
-        response = requests.get(url_original, allow_redirects=True, timeout=10)
-        response.raise_for_status()
-        url_final = response.url
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extraer solo el contenido
-        contenido_div = soup.find('div', class_='entry-content')
-        if contenido_div:
-            # Primero, reemplazar los enlaces con su texto plano
-            for a in contenido_div.find_all('a'):
-                a.replace_with(a.get_text())
-            
-            # Obtener párrafos individuales
-            parrafos = contenido_div.find_all('p')
-            contenido_completo = ''
-            
-            for p in parrafos:
-                # Obtener el texto del párrafo y limpiar espacios extra
-                texto_parrafo = ' '.join(p.get_text().split())
-                contenido_completo += texto_parrafo + '\n\n'
-            
-            # Eliminar saltos de línea extra al final
-            contenido_completo = contenido_completo.rstrip()
-            
-            # Buscar el índice de "Título Original"
-            indice_inicio = contenido_completo.find("Título Original")
-            
-            if indice_inicio != -1:
-                # Extraer desde "Título Original"
-                contenido_parcial = contenido_completo[indice_inicio:].strip()
-                
-                # Buscar el final de la información técnica (después del último dato técnico)
-                datos_tecnicos = ["Dirección", "Guion", "Intérpretes", "País", "Duración"]
-                ultimo_indice = -1
-                
-                for dato in datos_tecnicos:
-                    indice = contenido_parcial.find(dato)
-                    if indice != -1:
-                        ultimo_indice = max(ultimo_indice, 
-                            contenido_parcial.find('\n', indice) if contenido_parcial.find('\n', indice) != -1 
-                            else len(contenido_parcial))
-                
-                if ultimo_indice != -1:
-                    # Extraer la ficha técnica
-                    ficha_tecnica = contenido_parcial[:ultimo_indice].strip()
-                    
-                    # Extraer el resto del contenido (la crítica)
-                    critica = contenido_parcial[ultimo_indice:].strip()
-                    
-                    # Combinar en formato estructurado
-                    contenido = f"{ficha_tecnica}\n\nCRÍTICA:\n{critica}"
-                    
-                    logging.info(f"Contenido extraído y estructurado ({len(contenido)} caracteres)")
-                    logging.debug(f"Ficha técnica: {ficha_tecnica[:200]}")
-                else:
-                    contenido = contenido_parcial
-                    logging.warning("No se pudo separar la ficha técnica de la crítica")
-            else:
-                logging.warning("No se encontró 'Título Original' en el contenido")
-                contenido = contenido_completo
-                logging.info("Usando contenido completo como respaldo")
-        else:
-            logging.error("No se encontró el div de contenido")
-            contenido = ""
-        
-        post_data = {
-            "title": titulo,
-            "pelicula": pelicula,
-            "director": director,
-            "url": url_final,
-            "date": fecha,
-            "content": contenido
-        }
-        
-        # Verificar la estructura del post
-        campos_requeridos = ["title", "pelicula", "director", "url", "date", "content"]
-        for campo in campos_requeridos:
-            if not post_data.get(campo):
-                logging.warning(f"Campo {campo} vacío o no presente en el post")
-        
-        return post_data
+        pagina = cache_html.obtener(url_original, allow_redirects=True, timeout=10)
+        return extraccion_posts.post_desde_html(titulo, fecha, pagina.url_final, pagina.texto)
         
     except Exception as e:
         logging.error(f"Error procesando post: {str(e)}")
         return None
 
 def guardar_post(post_data):
-    """Guardar post en archivo JSON"""
+    """Guardar post en el archivo de posts"""
     try:
-        filename = f"posts/{post_data['pelicula'].replace(' ', '_')}_{post_data['date'][:10]}.json"
-        os.makedirs('posts', exist_ok=True)
-        
-        logging.info(f"Guardando post en: {filename}")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(post_data, f, ensure_ascii=False, indent=4)
-        logging.info("Post guardado exitosamente")
+        id_post = archivo_posts.abrir().añadir(post_data)
+        logging.info(f"Post guardado en el archivo: {id_post}")
         
     except Exception as e:
         logging.error(f"Error guardando post: {str(e)}")
 
-def actualizar_indice(post_data):
-    """Actualizar índice de películas"""
-    logging.info("Actualizando índice de películas")
-    try:
-        index_file = os.path.join(script_dir, 'index.json')
-        logging.info(f"Archivo de índice: {index_file}")
-        
-        # Crear estructura del índice
-        pelicula_index = {
-            "título": post_data['pelicula'],
-            "director": post_data['director'],
-            "fecha_post": post_data['date'][:10],
-            "archivo": f"posts/{post_data['pelicula'].replace(' ', '_')}_{post_data['date'][:10]}.json"
-        }
-        
-        # Cargar índice existente o crear uno nuevo
-        if os.path.exists(index_file):
-            with open(index_file, 'r', encoding='utf-8') as f:
-                index = json.load(f)
-                logging.info(f"Índice existente cargado con {len(index)} películas")
-        else:
-            index = []
-            logging.info("Creando nuevo índice")
-            
-        # Verificar si la película ya existe en el índice
-        existe = False
-        for item in index:
-            if item['título'] == pelicula_index['título']:
-                existe = True
-                break
-                
-        # Agregar solo si no existe
-        if not existe:
-            index.append(pelicula_index)
-            # Ordenar por título
-            index.sort(key=lambda x: x['título'])
-            
-            # Guardar índice actualizado
-            with open(index_file, 'w', encoding='utf-8') as f:
-                json.dump(index, f, ensure_ascii=False, indent=4)
-            logging.info(f"Película agregada al índice: {pelicula_index['título']}")
-        else:
-            logging.info(f"La película ya existe en el índice: {pelicula_index['título']}")
-            
-    except Exception as e:
-        logging.error(f"Error actualizando el índice: {str(e)}")
-        raise
-
-def scrape_blog_pages():
-    """Scrape páginas del blog comenzando desde la página 2"""
+def scrape_blog_pages(reiniciar=False, hasta_conocidos=False):
+    """
+    Scrape páginas del blog comenzando desde la página 2.
+    Las páginas se piden por lotes y los posts de cada página en paralelo. Mientras se recorre
+    el blog entero (backfill), tras cada página se guarda un checkpoint, de modo que una
+    ejecución interrumpida continúa donde se quedó. Una vez recorrido el blog entero (o con
+    hasta_conocidos), se empieza siempre por la página 2 y se para en la primera página cuyos
+    posts ya están todos guardados; estas ejecuciones no tocan el checkpoint del backfill.
+    """
     base_url = "https://ghostintheblog.com/page/{}"
-    pagina_num = 2  # Comenzar desde la página 2
+    checkpoint = {} if reiniciar else cargar_checkpoint()
+    if checkpoint.get('completado'):
+        hasta_conocidos = True
+    # Comenzar desde la página 2 (o desde donde se quedó el backfill)
+    pagina_num = 2 if hasta_conocidos else checkpoint.get('ultima_pagina', 1) + 1
+    if pagina_num > 2:
+        logging.info(f"Continuando el backfill desde la página {pagina_num}")
     posts_totales = 0
+    terminado = False
     
-    while True:
-        url_actual = base_url.format(pagina_num)
-        logging.info(f"Scrapeando página {pagina_num}: {url_actual}")
-        
-        # Obtener posts de la página actual
-        posts = obtener_posts_de_pagina(url_actual)
-        
-        if not posts:
-            logging.info(f"No se encontraron posts en la página {pagina_num}. Terminando scraping.")
-            break
-        
-        # Procesar cada post
-        for post in posts:
-            info_post = extraer_info_post(post)
-            if info_post:
-                guardar_post(info_post)
-                actualizar_indice(info_post)
-                posts_totales += 1
-        
-        # Pausar brevemente para no sobrecargar el servidor
-        time.sleep(1)
-        
-        # Incrementar número de página
-        pagina_num += 1
+    # El índice se escribe una sola vez, al terminar (o al interrumpirse la ejecución)
+    indice = IndiceCriticas(os.path.join(script_dir, 'index.json'))
+    atexit.register(indice.guardar)
+    atexit.register(archivo_posts.abrir().guardar)
+    
+    cliente_http.limitar_concurrencia("ghostintheblog.com", MAX_DESCARGAS_SIMULTANEAS)
+    with ThreadPoolExecutor(max_workers=MAX_DESCARGAS_SIMULTANEAS) as executor:
+        while not terminado:
+            lote = list(range(pagina_num, pagina_num + PAGINAS_POR_LOTE))
+            logging.info(f"Scrapeando páginas {lote[0]}-{lote[-1]}")
+            
+            # Obtener los posts de todas las páginas del lote a la vez
+            paginas = executor.map(obtener_posts_de_pagina, [base_url.format(n) for n in lote])
+            
+            for num, posts in zip(lote, paginas):
+                if posts is None:
+                    # Error al descargar: la próxima ejecución continuará desde el checkpoint
+                    logging.error(f"No se pudo obtener la página {num}. Terminando scraping.")
+                    terminado = True
+                    break
+                if not posts:
+                    logging.info(f"No se encontraron posts en la página {num}. Terminando scraping.")
+                    guardar_checkpoint({"ultima_pagina": num - 1, "completado": True})
+                    terminado = True
+                    break
+                
+                # Procesar los posts nuevos de la página en paralelo y guardarlos en orden
+                pendientes = [post for post in posts if not post_archivado(post)]
+                for info_post in executor.map(extraer_info_post, pendientes):
+                    if info_post:
+                        guardar_post(info_post)
+                        indice.añadir(info_post)
+                        posts_totales += 1
+                
+                # Los datos se escriben antes que el checkpoint, para que este nunca vaya por delante
+                # (atexit no se ejecuta si el proceso muere con SIGKILL)
+                archivo_posts.abrir().guardar()
+                indice.guardar()
+                if not hasta_conocidos:
+                    # Una ejecución incremental interrumpida vuelve a empezar por la página 2
+                    guardar_checkpoint({"ultima_pagina": num, "completado": False})
+                
+                if hasta_conocidos and not pendientes:
+                    logging.info(f"Todos los posts de la página {num} ya estaban guardados. Terminando scraping.")
+                    terminado = True
+                    break
+            
+            if not terminado:
+                # Pausar brevemente para no sobrecargar el servidor
+                time.sleep(1)
+                
+                # Siguiente lote de páginas
+                pagina_num += PAGINAS_POR_LOTE
     
+    archivo_posts.abrir().guardar()
+    indice.guardar()
+    # Indexar para la búsqueda los posts nuevos (la primera vez, todo el archivo)
+    busqueda_criticas.obtener_indice().sincronizar()
+    facetas = IndiceFacetas(os.path.join(script_dir, RUTA_FACETAS))
+    facetas.sincronizar()
+    facetas.guardar()
     logging.info(f"Scraping completado. Total de posts guardados: {posts_totales}")
 
 def main():
+    cliente_http.configurar_cassette_desde_argumentos()
+    parser = argparse.ArgumentParser(description='Scraping del archivo de Ghost in the Blog (páginas 2 en adelante)')
+    parser.add_argument('--reiniciar', action='store_true', help='Ignorar el checkpoint y empezar por la página 2')
+    parser.add_argument('--hasta-conocidos', action='store_true',
+                        help='Parar en la primera página cuyos posts ya están todos guardados')
+    args = parser.parse_args()
     logging.info("Iniciando scraping de páginas del blog")
-    scrape_blog_pages()
+    scrape_blog_pages(reiniciar=args.reiniciar, hasta_conocidos=args.hasta_conocidos)
     logging.info("Proceso de scraping finalizado")
 
 if __name__ == "__main__":
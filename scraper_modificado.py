@@ -9,15 +9,20 @@ from dotenv import load_dotenv
 import requests
 from bs4 import BeautifulSoup
 import json
+import hashlib
 import os
 from datetime import datetime
-import urllib.request
 import re
 import time
 import logging
-from difflib import SequenceMatcher
 import argparse
 
+import cache_html
+import cache_tmdb
+import cliente_http
+import parseo_html
+from resolucion_tmdb import ResolutorTMDb
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -31,96 +36,39 @@ class TMDbAPI:
             "Content-Type": "application/json;charset=utf-8"
         }
         self.base_url = "https://api.themoviedb.org/3"
+        self.resolver = ResolutorTMDb(self._make_request, "filmoteca")
 
     def _make_request(self, endpoint: str, params: dict = None) -> dict:
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint: str, params: dict = None) -> dict:
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error making request to TMDb: {str(e)}")
             return {}
 
-    def _normalize_title(self, title: str) -> str:
-        import unicodedata
-        title = unicodedata.normalize('NFKD', title).encode('ASCII', 'ignore').decode('ASCII')
-        title = re.sub(r'[^a-zA-Z0-9\s]', '', title)
-        return ' '.join(title.lower().split())
-
-    def _title_similarity(self, title1: str, title2: str) -> float:
-        return SequenceMatcher(None, self._normalize_title(title1), self._normalize_title(title2)).ratio()
-
-    def get_movie_info(self, title: str) -> dict:
-        logger.info(f"Searching TMDb for title: {title}")
-
-        # Realizar una búsqueda con el título original
-        search_results = self._make_request("search/movie", params={"query": title, "language": "es"})
-
-        if not search_results or not search_results.get("results"):
-            # Si no hay resultados, intentar en inglés
-            logger.warning(f"No results found for '{title}' in Spanish. Trying English search...")
-            search_results = self._make_request("search/movie", params={"query": title, "language": "en"})
-
-        if not search_results or not search_results.get("results"):
-            logger.warning(f"No results found for: {title} in any language.")
-            return {}
-
-        # Ordenar por fecha de lanzamiento (más reciente primero)
-        results = sorted(search_results["results"], key=lambda x: x.get("release_date", "1900-01-01"), reverse=True)
-
-        # Buscar el mejor match por similitud
-        best_match = None
-        highest_similarity = 0
-
-        for result in results:
-            similarity = self._title_similarity(title, result.get("title", ""))
-            if similarity > highest_similarity:
-                highest_similarity = similarity
-                best_match = result
-
-        if best_match and highest_similarity > 0.6:
-            movie_id = best_match["id"]
-            logger.info(f"Found match: {best_match.get('title')} (ID: {movie_id}, Similarity: {highest_similarity})")
-
-            # Obtener detalles adicionales
-            details = self._make_request(f"movie/{movie_id}", params={"language": "es"})
-            if not details:
-                details = self._make_request(f"movie/{movie_id}", params={"language": "en"})
-
-            credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "es"})
-            if not credits:
-                credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
-
-            if not details or not credits:
-                return {}
-
-            return {
-                "tmdb_id": movie_id,
-                "director": ", ".join(c["name"] for c in credits.get("crew", []) if c["job"] == "Director"),
-                "duración": f"{details.get('runtime', 'Desconocido')} min",
-                "actores": ", ".join(a["name"] for a in credits.get("cast", [])[:5]),
-                "sinopsis": details.get("overview"),
-                "año": details.get("release_date", "")[:4],
-                "poster_path": details.get("poster_path")
-            }
-
-        logger.warning(f"No good match found for: {title}")
-        return {}
+    def get_movie_info(self, title: str, year=None, director: str = None,
+                       original_title: str = None, key: str = None) -> dict:
+        # Memoria de resoluciones, búsqueda por año, director, título original e inglés
+        movie_id = self.resolver.resolver(title, anio=year, director=director,
+                                          titulo_original=original_title, clave=key)
+        return self.get_movie_info_by_id(movie_id) if movie_id else {}
     
     def get_movie_info_by_id(self, movie_id: int) -> dict:
         logger.info(f"Fetching movie by TMDb ID: {movie_id}")
 
-        details = self._make_request(f"movie/{movie_id}", params={"language": "es"})
+        # Detalles y créditos en una sola petición
+        details = self._make_request(f"movie/{movie_id}", params={"language": "es", "append_to_response": "credits"})
         if not details:
-            details = self._make_request(f"movie/{movie_id}", params={"language": "en"})
+            details = self._make_request(f"movie/{movie_id}", params={"language": "en", "append_to_response": "credits"})
 
-        credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "es"})
-        if not credits:
-            credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
-
-        if not details or not credits:
+        if not details:
             return {}
+        credits = details.get("credits") or {}
 
         return {
             "tmdb_id": movie_id,
@@ -132,6 +80,74 @@ class TMDbAPI:
             "poster_path": details.get("poster_path")
         }
 
+# Estado de los eventos ya procesados (persistido entre ejecuciones con la caché del workflow)
+RUTA_ESTADO_EVENTOS = os.path.join("cache", "filmoteca_eventos.json")
+# Pasado este tiempo se vuelve a pedir la página del evento aunque el listado no haya cambiado
+DIAS_REVALIDACION_EVENTO = 7
+
+
+class EstadoEventos:
+    """
+    Estado de los eventos de la Filmoteca por id de evento: huella de su entrada en el listado,
+    versión de su página y película ya procesada (o None si no es VOSE).
+    """
+
+    def __init__(self, ruta: str = RUTA_ESTADO_EVENTOS, dias_revalidacion: float = DIAS_REVALIDACION_EVENTO):
+        self.ruta = ruta
+        self.dias_revalidacion = dias_revalidacion
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                self.eventos = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.eventos = {}
+
+    def obtener(self, id_evento: str) -> dict:
+        return self.eventos.get(id_evento)
+
+    def reciente(self, evento: dict) -> bool:
+        return time.time() - evento.get("comprobado", 0) < self.dias_revalidacion * 24 * 60 * 60
+
+    def registrar(self, id_evento: str, huella: str, version: str, titulo: str, equivalencia: dict, pelicula: dict):
+        self.eventos[id_evento] = {
+            "huella": huella,
+            "version": version,
+            "título": titulo,
+            "equivalencia": equivalencia,
+            "pelicula": pelicula,
+            "comprobado": time.time(),
+        }
+
+    def expirar(self, ids_actuales: set) -> int:
+        """Elimina los eventos que ya no aparecen en el listado y devuelve cuántos eran"""
+        retirados = [id_evento for id_evento in self.eventos if id_evento not in ids_actuales]
+        for id_evento in retirados:
+            del self.eventos[id_evento]
+        return len(retirados)
+
+    def guardar(self):
+        os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        ruta_temporal = f"{self.ruta}.tmp"
+        with open(ruta_temporal, "w", encoding="utf-8") as f:
+            json.dump(self.eventos, f, ensure_ascii=False)
+        os.replace(ruta_temporal, self.ruta)
+
+
+def id_evento(href: str) -> str:
+    """Id del evento en un enlace a evento.asp (o el propio enlace si no lo lleva)"""
+    coincidencia = re.search(r'[?&]id(?:evento)?=(\d+)', href, re.IGNORECASE)
+    return coincidencia.group(1) if coincidencia else href
+
+
+def huella_listado(link) -> str:
+    """Huella de la entrada del evento en el listado (título, fecha...) para detectar cambios sin abrirlo"""
+    bloque = link.find_parent(['li', 'article', 'tr']) or link.parent
+    texto = bloque.get_text(" ", strip=True) if bloque else ""
+    # Si el bloque abarca medio listado, solo se usa el propio enlace
+    if len(texto) > 1000:
+        texto = link.get_text(" ", strip=True)
+    return hashlib.sha256(f"{link['href']}\n{texto}".encode("utf-8")).hexdigest()
+
+
 def scrapear_filmoteca():
     """Realiza el scraping de la web de Filmoteca de Navarra"""
     logger.info("Iniciando scraping de filmotecanavarra.com...")
@@ -146,10 +162,15 @@ def scrapear_filmoteca():
 
     # Inicializar variables
     url = "https://www.filmotecanavarra.com/es/comprar-entradas.asp"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    try:
+        listado = cache_html.obtener(url)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"No se pudo descargar el listado de eventos: {str(e)}")
+        return []
+    soup = BeautifulSoup(listado.texto, parseo_html.CONSTRUCTOR)
     links = soup.find_all('a', href=True)
 
+    estado = EstadoEventos()
     processed_urls = set()
     peliculas = []
     sugerencias_equivalencias = {}
@@ -178,11 +199,38 @@ def scrapear_filmoteca():
             try:
                 if link['href'] not in processed_urls:
                     processed_urls.add(link['href'])
-                    response = requests.get(f"https://www.filmotecanavarra.com/es/{link['href']}")
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    evento = id_evento(link['href'])
+                    huella = huella_listado(link)
+
+                    # La película ya procesada sirve mientras no cambie su equivalencia manual
+                    anterior = estado.obtener(evento)
+                    if anterior and anterior["equivalencia"] != resolver_equivalencia_tmdb(anterior["título"]):
+                        anterior = None
+
+                    # Evento conocido con la misma entrada en el listado: no se abre su página
+                    if anterior and anterior["huella"] == huella and estado.reciente(anterior):
+                        logger.info(f"Evento sin cambios en el listado: {anterior['título']}")
+                        if anterior["pelicula"]:
+                            peliculas.append(anterior["pelicula"])
+                        continue
+
+                    url_evento = f"https://www.filmotecanavarra.com/es/{link['href']}"
+                    pagina = cache_html.obtener(url_evento)
+
+                    # Página sin cambios: no hace falta parsearla ni volver a consultar TMDB
+                    if anterior and anterior["version"] == pagina.version:
+                        logger.info(f"Evento sin cambios: {anterior['título']}")
+                        estado.registrar(evento, huella, pagina.version, anterior["título"],
+                                         anterior["equivalencia"], anterior["pelicula"])
+                        if anterior["pelicula"]:
+                            peliculas.append(anterior["pelicula"])
+                        time.sleep(1)
+                        continue
+
+                    soup = parseo_html.parsear(pagina.texto, 'filmoteca')
 
                     title = soup.find('h1').text.strip()
+                    pelicula = None
                     divtxt22 = soup.find('div', class_='txt txt22')
                     idioma = ""
 
@@ -253,17 +301,18 @@ def scrapear_filmoteca():
                                     nombre_archivo = re.sub(r'[^a-zA-Z0-9]', '_', title) + '.jpg'
                                     ruta_imagen = os.path.join('imagenes_filmoteca', nombre_archivo)
                                     try:
-                                        urllib.request.urlretrieve(url_imagen, ruta_imagen)
+                                        cliente_http.descargar_archivo(url_imagen, ruta_imagen)
                                         logger.info(f"Cartel guardado en: {ruta_imagen}")
                                     except Exception as e:
                                         logger.error(f"Error al descargar la imagen: {str(e)}")
                             
                             equivalencia = resolver_equivalencia_tmdb(title)
-                            if "tmdb_id" in equivalencia:
+                            if equivalencia.get("tmdb_id"):
                                 logger.info(f"Usando equivalencia TMDB para '{title}': ID {equivalencia['tmdb_id']}")
                                 tmdb_info = tmdb_api.get_movie_info_by_id(equivalencia["tmdb_id"])
                             else:
-                                tmdb_info = tmdb_api.get_movie_info(title)
+                                tmdb_info = tmdb_api.get_movie_info(title, year=equivalencia.get("anio"),
+                                                                    original_title=equivalencia.get("titulo_original"))
                                 if not tmdb_info:
                                     sugerencias_equivalencias.setdefault(title.strip().lower(), {
                                         "tmdb_id": None,
@@ -275,7 +324,7 @@ def scrapear_filmoteca():
                                 if tmdb_info.get('poster_path'):
                                     tmdb_poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
                                     tmdb_poster_filename = os.path.join('imagenes_filmoteca', f"tmdb_{re.sub(r'[^a-zA-Z0-9]', '_', title)}.jpg")
-                                    urllib.request.urlretrieve(tmdb_poster_url, tmdb_poster_filename)
+                                    cliente_http.descargar_archivo(tmdb_poster_url, tmdb_poster_filename)
                                     pelicula['cartel'] = tmdb_poster_filename
 
                                 pelicula['tmdb_id'] = tmdb_info.get('tmdb_id')
@@ -288,11 +337,22 @@ def scrapear_filmoteca():
                             peliculas.append(pelicula)
                             logger.info(f"Película añadida: {title}")
 
+                    # Las películas sin resolver no se guardan para volver a intentarlo y sugerir su equivalencia
+                    if pelicula is None or pelicula.get('tmdb_id'):
+                        estado.registrar(evento, huella, pagina.version, title,
+                                         resolver_equivalencia_tmdb(title), pelicula)
+
                 time.sleep(1)  # Pausa para evitar saturar el servidor
 
             except Exception as e:
                 logger.error(f"Error procesando {link['href']}: {str(e)}")
 
+    # Los eventos que ya no están en el listado se olvidan
+    retirados = estado.expirar({id_evento(href) for href in processed_urls})
+    if retirados:
+        logger.info(f"Se han retirado {retirados} eventos que ya no están en el listado")
+    estado.guardar()
+
     # Guardar sugerencias de equivalencias
     if sugerencias_equivalencias:
         with open('equivalencias_peliculas.json', 'w', encoding='utf-8') as f:
@@ -304,6 +364,7 @@ def scrapear_filmoteca():
 
 def ejecutar_scraping():
     """Función principal para ejecutar el scraping"""
+    cliente_http.configurar_cassette_desde_argumentos()
     parser = argparse.ArgumentParser(description='Scraper de Filmoteca de Navarra')
     parser.add_argument('--archivo_salida', default='peliculas_filmoteca_scraping.json',
                         help='Nombre del archivo de salida temporal (default: peliculas_filmoteca_scraping.json)')
@@ -1,16 +1,25 @@
 import os
 import requests
-from bs4 import BeautifulSoup
 import json
 from datetime import datetime, timedelta
 import logging
+import threading
 from pathlib import Path
 from dataclasses import dataclass
 import re
 import unicodedata
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
 
+import cache_html
+import cache_tmdb
+import cliente_http
+import parseo_html
+from coincidencia_titulos import normalizar_titulo
+from resolucion_tmdb import ResolutorTMDb, clasificar_candidatos
+from tmdb_async import TMDbBatchClient, precarga_disponible
+
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +28,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# TMDb matching: minimum title similarity, candidates verified per round, shortest feature film
+MIN_SIMILARITY = 0.6
+VERIFY_TOP_K = 3
+MIN_RUNTIME = 40
+# Day pages fetched in parallel, and at most this many requests to golem.es at a time
+PAGE_WORKERS = 8
+GOLEM_MAX_CONCURRENT = 4
+# TMDb data carried over from the previous run is refreshed after this many days
+ENRICHMENT_REFRESH_DAYS = 7
+ENRICHED_FIELDS = ('cartel', 'director', 'duración', 'actores', 'sinopsis', 'año', 'última_actualización')
+
+
+def today() -> datetime:
+    """
+    First day of the schedule. GOLEM_TODAY=YYYY-MM-DD pins it, so that a run recorded in an
+    HTTP cassette requests the same day pages when it is replayed on another day.
+    """
+    pinned = os.getenv("GOLEM_TODAY")
+    return datetime.strptime(pinned, "%Y-%m-%d") if pinned else datetime.now()
+
 @dataclass
 class MovieSchedule:
     fecha: str
@@ -36,6 +65,7 @@ class Movie:
     actores: Optional[str] = None
     sinopsis: Optional[str] = None
     año: Optional[str] = None
+    última_actualización: Optional[str] = None
 
 class TMDbAPI:
     def __init__(self, api_key: str):
@@ -45,83 +75,100 @@ class TMDbAPI:
             "Content-Type": "application/json;charset=utf-8"
         }
         self.base_url = "https://api.themoviedb.org/3"
+        self._batch = None
+        self.resolver = ResolutorTMDb(
+            self._make_request, "golem",
+            validar=self._is_feature_film,
+            detalles_lote=self._get_details_many,
+            umbral=MIN_SIMILARITY,
+            candidatos_por_ronda=VERIFY_TOP_K,
+        )
+
+    def _batch_client(self) -> TMDbBatchClient:
+        if self._batch is None:
+            self._batch = TMDbBatchClient(self.api_key)
+        return self._batch
     
     def _make_request(self, endpoint: str, params: dict = None) -> Optional[dict]:
-        """Make a request to TMDb API with error handling"""
+        """Make a request to TMDb API through the shared response cache"""
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint: str, params: dict = None) -> Optional[dict]:
+        """Download a TMDb response, without cache"""
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error making request to TMDb: {str(e)}")
             return None
 
-    def _normalize_title(self, title: str) -> str:
-        """Normalize title for better matching"""
-        # Normalize unicode characters
-        title = unicodedata.normalize('NFKD', title).encode('ASCII', 'ignore').decode('ASCII')
-        # Remove special characters but keep spaces
-        title = re.sub(r'[^a-zA-Z0-9\s]', '', title)
-        # Convert to lowercase and remove extra spaces
-        return ' '.join(title.lower().split())
-
-    def _title_similarity(self, title1: str, title2: str) -> float:
-        """Calculate similarity between two titles"""
-        from difflib import SequenceMatcher
-        return SequenceMatcher(None, 
-                             self._normalize_title(title1), 
-                             self._normalize_title(title2)).ratio()
-
     def get_movie_info(self, title: str) -> dict:
-        logger.info(f"Searching TMDb for title: {title}")
+        movie_id = self.resolver.resolver(title)
+        return self.get_movie_info_by_id(movie_id) if movie_id else {}
 
-        search_results = self._make_request("search/movie", params={"query": title, "language": "es"})
+    def _is_feature_film(self, details: dict) -> bool:
+        runtime = details.get('runtime')
+        if runtime and runtime < MIN_RUNTIME:
+            logger.warning(f"Movie {details.get('title')} with id: {details.get('id')} discarded because its a short film, duration of: {runtime} minutes")
+            return False
+        return True
 
-        if not search_results or not search_results.get("results"):
-            logger.warning(f"No results found for '{title}' in Spanish. Trying English search...")
-            search_results = self._make_request("search/movie", params={"query": title, "language": "en"})
+    def get_movie_info_by_id(self, movie_id: int) -> dict:
+        details = self._get_details(movie_id)
+        return self._movie_info(details) if details else {}
 
-        if not search_results or not search_results.get("results"):
-            logger.warning(f"No results found for: {title} in any language.")
-            return {}
+    def _get_details(self, movie_id: int) -> Optional[dict]:
+        """Details and credits in a single request"""
+        details = self._make_request(f"movie/{movie_id}", params={"language": "es", "append_to_response": "credits"})
+        if not details:
+            details = self._make_request(f"movie/{movie_id}", params={"language": "en", "append_to_response": "credits"})
+        return details
 
-        results = sorted(search_results["results"], key=lambda x: x.get("release_date", "1900-01-01"), reverse=True)
-
-        for result in results:
-            similarity = self._title_similarity(title, result.get("title", ""))
-            if similarity > 0.6:
-                movie_id = result["id"]
-                logger.info(f"Checking match: {result.get('title')} (ID: {movie_id}, Similarity: {similarity})")
-
-                details = self._make_request(f"movie/{movie_id}", params={"language": "es"})
-                if not details:
-                    details = self._make_request(f"movie/{movie_id}", params={"language": "en"})
-
-                credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "es"})
-                if not credits:
-                    credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
-
-                if not details or not credits:
-                    continue
-
-                runtime = details.get('runtime')
-                if runtime and runtime < 40:
-                    logger.warning(f"Movie {title} with id: {movie_id} discarded because its a short film, duration of: {runtime} minutes")
-                    continue
+    def _get_details_many(self, movie_ids: List[int]) -> Dict[int, dict]:
+        """Details for several candidates, concurrently when there is more than one"""
+        if len(movie_ids) == 1:
+            return {movie_ids[0]: self._get_details(movie_ids[0])}
+        try:
+            return self._batch_client().details_many(movie_ids)
+        except Exception as e:
+            logger.warning(f"Concurrent details fetch failed, fetching one by one: {str(e)}")
+            return {movie_id: self._get_details(movie_id) for movie_id in movie_ids}
 
-                logger.info(f"Found good match: {result.get('title')} (ID: {movie_id}, Similarity: {similarity})")
-                return {
-                    "director": ", ".join(c["name"] for c in credits.get("crew", []) if c["job"] == "Director"),
-                    "duración": f"{details.get('runtime', 'Desconocido')} min",
-                    "actores": ", ".join(a["name"] for a in credits.get("cast", [])[:5]),
-                    "sinopsis": details.get("overview"),
-                    "año": details.get("release_date", "")[:4],
-                    "poster_path": details.get("poster_path")
-                }
+    def _movie_info(self, details: dict) -> dict:
+        credits = details.get("credits") or {}
+        return {
+            "director": ", ".join(c["name"] for c in credits.get("crew", []) if c["job"] == "Director"),
+            "duración": f"{details.get('runtime', 'Desconocido')} min",
+            "actores": ", ".join(a["name"] for a in credits.get("cast", [])[:5]),
+            "sinopsis": details.get("overview"),
+            "año": details.get("release_date", "")[:4],
+            "poster_path": details.get("poster_path")
+        }
 
-        logger.warning(f"No good match found for: {title}")
-        return {}
+    def prefetch_movie_info(self, titles: Iterable[str]):
+        """Warm the shared cache for a batch of titles with concurrent TMDb requests"""
+        titles = list(dict.fromkeys(titles))
+        if not titles or not precarga_disponible():
+            return
+        # Titles remembered or found in the local indexes only need their details
+        local_ids = {title: self.resolver.candidatos_locales(title) for title in titles}
+        known_ids = [movie_id for ids in local_ids.values() if ids for movie_id in ids]
+        titles = [title for title, ids in local_ids.items() if ids is None]
+        logger.info(f"Prefetching TMDb data for {len(titles)} titles and {len(known_ids)} locally known IDs")
+        try:
+            batch = self._batch_client()
+            search_results = batch.search_many(titles)
+            # Same ranking as the resolver, so its first verification round hits the cache
+            candidate_ids = [
+                result["id"]
+                for title, results in search_results.items()
+                for result in clasificar_candidatos(title, results, MIN_SIMILARITY)[:VERIFY_TOP_K]
+            ]
+            batch.details_many(known_ids + candidate_ids)
+        except Exception as e:
+            logger.warning(f"TMDb prefetch failed, falling back to sequential lookups: {str(e)}")
 
 
 class ImageDownloader:
@@ -166,7 +213,7 @@ class ImageDownloader:
                 return str(filepath)
             
             logger.info(f"Downloading image: {url}")
-            response = requests.get(url)
+            response = cliente_http.get(url)
             response.raise_for_status()
             
             with open(filepath, 'wb') as f:
@@ -177,96 +224,233 @@ class ImageDownloader:
             return None
 
 class MovieScraper:
-    def __init__(self, tmdb_api: TMDbAPI, image_downloader: ImageDownloader):
+    def __init__(self, tmdb_api: TMDbAPI, image_downloader: ImageDownloader,
+                 previous_movies: Optional[List[Dict]] = None, refresh_days: float = ENRICHMENT_REFRESH_DAYS):
         self.tmdb_api = tmdb_api
         self.image_downloader = image_downloader
+        self.refresh_days = refresh_days
+        # Normalized title -> enrichment (TMDb data and poster), shared by every cinema and day
+        self._enriched: Dict[str, Dict] = {}
+        # Titles being enriched right now, so that other threads wait instead of repeating the work
+        self._enriching: Dict[str, Future] = {}
+        self._enriched_lock = threading.Lock()
+        for movie in previous_movies or []:
+            self._carry_over(movie)
+
+    def _carry_over(self, movie: Dict):
+        """Reuse the enrichment of a movie from the previous run if it is recent and has TMDb data"""
+        if not movie.get('director') and not movie.get('sinopsis'):
+            return
+        if not movie.get('cartel') or not os.path.exists(movie['cartel']):
+            return
+        try:
+            age = today() - datetime.fromisoformat(movie.get('última_actualización'))
+        except (TypeError, ValueError):
+            return
+        if age <= timedelta(days=self.refresh_days):
+            key = normalizar_titulo(movie.get('título', ''))
+            self._enriched.setdefault(key, {field: movie.get(field) for field in ENRICHED_FIELDS})
+
+    def _enrich_title(self, clean_title: str, poster_src: Optional[str]) -> Dict:
+        """TMDb data and poster for a title, computed once per title and run"""
+        key = normalizar_titulo(clean_title)
+        with self._enriched_lock:
+            known = self._enriched.get(key)
+            if known is not None:
+                return known
+            pending = self._enriching.get(key)
+            if pending is None:
+                self._enriching[key] = future = Future()
+        if pending is not None:
+            return pending.result()
+
+        try:
+            enrichment = self._fetch_enrichment(clean_title, poster_src)
+        except BaseException as e:
+            with self._enriched_lock:
+                del self._enriching[key]
+            future.set_exception(e)
+            raise
+        with self._enriched_lock:
+            self._enriched[key] = enrichment
+            del self._enriching[key]
+        future.set_result(enrichment)
+        return enrichment
+
+    def _fetch_enrichment(self, clean_title: str, poster_src: Optional[str]) -> Dict:
+        """Download the poster and look the title up in TMDb"""
+        fallback_image_path = None
+        if poster_src:
+            fallback_image_path = self.image_downloader.download(poster_src)
+        
+        # Get TMDb information
+        tmdb_info = self.tmdb_api.get_movie_info(clean_title)
+        
+        # Get TMDb poster if available
+        image_path = fallback_image_path
+        if tmdb_info.get('poster_path'):
+            poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
+            
+            # Generate a safe filename for the TMDb poster in lowercase
+            safe_filename = f"tmdb_{clean_title.lower()}.jpg"
+            
+            tmdb_image_path = self.image_downloader.download(
+                poster_url,
+                safe_filename
+            )
+            if tmdb_image_path:
+                image_path = tmdb_image_path
+        
+        return {
+            'cartel': image_path or "",
+            'director': tmdb_info.get('director'),
+            'duración': tmdb_info.get('duración'),
+            'actores': tmdb_info.get('actores'),
+            'sinopsis': tmdb_info.get('sinopsis'),
+            'año': tmdb_info.get('año'),
+            'última_actualización': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def _parse_day_page(self, html: str, formatted_date: str) -> List[Dict]:
+        """Extract the VOSE movies of a day page as plain dicts (title, poster and schedules)"""
+        soup = parseo_html.parsear(html, 'golem')
+        page_entries = []
+        
+        # Find all movies in the page
+        for movie_table in soup.find_all('table', {'background': '#AEAEAE'}):
+            title_elem = movie_table.find('a', {'class': 'txtNegXXL'})
+            if not title_elem:
+                continue
+                
+            title = title_elem.get_text(strip=True)
+            
+            # Filter VOSE movies: only those with "V.O.S.E" in the title
+            if "V.O.S.E" not in title:
+                continue
+                
+            clean_title = title.replace("(V.O.S.E.)", "").strip()
+            clean_title = clean_title.replace("(V.O.S.E)", "").strip()
+            
+            # Get poster from Golem
+            poster_elem = movie_table.find('img', {'class': 'bordeCartel'})
+            poster_src = poster_elem['src'] if poster_elem and 'src' in poster_elem.attrs else None
+            
+            # Get schedules
+            schedules = []
+            for schedule in movie_table.find_all('span', {'class': 'horaXXXL'}):
+                time = schedule.get_text(strip=True)
+                ticket_link = schedule.find('a', href=True)
+                ticket_url = None
+                if ticket_link and 'href' in ticket_link.attrs:
+                    ticket_url = f"https://golem.es{ticket_link['href']}"
+                
+                schedules.append({
+                    'fecha': formatted_date,
+                    'hora': time,
+                    'enlace_entradas': ticket_url
+                })
+            
+            page_entries.append({'título': clean_title, 'cartel': poster_src, 'horarios': schedules})
+        
+        return page_entries
+
+    def _fetch_day_page(self, url: str, formatted_date: str) -> Tuple[str, List[Dict]]:
+        """Fetch a day page and return its version and its VOSE entries"""
+        logger.info(f"Processing URL: {url}")
+        page = cache_html.obtener(url)
+        
+        # Unchanged pages reuse the entries parsed last time
+        page_entries = cache_html.derivado(url, page.version)
+        if page_entries is None:
+            page_entries = self._parse_day_page(page.texto, formatted_date)
+            cache_html.guardar_derivado(url, page_entries, page.version)
+        return page.version, page_entries
+
+    def scrape_cinemas(self, cinemas: List[Dict], days: int) -> List[Movie]:
+        """
+        Scrape several cinemas at once. Every (cinema, day) page is planned up front and
+        fetched by a bounded worker pool; each cinema is enriched as soon as its own pages
+        are in, while the other pages are still downloading. Movies are returned in cinema
+        order and, within a cinema, in page order.
+        """
+        start = today()
+        dates = [start + timedelta(days=i) for i in range(days)]
+        
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as page_pool, \
+                ThreadPoolExecutor(max_workers=max(1, len(cinemas))) as cinema_pool:
+            cinema_futures = []
+            for cinema in cinemas:
+                page_futures = []
+                for date in dates:
+                    url = f"{cinema['base_url']}/{date.strftime('%Y%m%d')}"
+                    future = page_pool.submit(self._fetch_day_page, url, date.strftime('%Y-%m-%d'))
+                    page_futures.append((url, future))
+                cinema_futures.append(cinema_pool.submit(
+                    self._enrich_cinema, cinema["base_url"], cinema["name"], page_futures
+                ))
+            
+            movies = []
+            for future in cinema_futures:
+                movies.extend(future.result())
+        return movies
 
     def scrape_cinema(self, base_url: str, cinema_name: str, days: int) -> List[Movie]:
         """Scrape movie information for a specific cinema"""
-        movies = []
+        return self.scrape_cinemas([{"base_url": base_url, "name": cinema_name}], days)
+
+    def _enrich_cinema(self, base_url: str, cinema_name: str, page_futures: List[Tuple[str, Future]]) -> List[Movie]:
+        """Wait for the day pages of a cinema and build its movies with TMDb data and posters"""
+        logger.info(f"Scraping {cinema_name}...")
+        # Normalized title -> [title, poster, schedules]: one record per film, with every day merged
+        entries: Dict[str, list] = {}
+        page_versions = []
+        all_pages_ok = True
         
-        for i in range(days):
-            date = datetime.now() + timedelta(days=i)
-            date_str = date.strftime('%Y%m%d')
-            formatted_date = date.strftime('%Y-%m-%d')
-            
-            url = f"{base_url}/{date_str}"
+        for url, future in page_futures:
             try:
-                logger.info(f"Processing URL: {url}")
-                response = requests.get(url)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find all movies in the page
-                for movie_table in soup.find_all('table', {'background': '#AEAEAE'}):
-                    title_elem = movie_table.find('a', {'class': 'txtNegXXL'})
-                    if not title_elem:
-                        continue
-                        
-                    title = title_elem.get_text(strip=True)
-                    
-                    # Filter VOSE movies: only those with "V.O.S.E" in the title
-                    if "V.O.S.E" not in title:
-                        continue
-                        
-                    clean_title = title.replace("(V.O.S.E.)", "").strip()
-                    clean_title = clean_title.replace("(V.O.S.E)", "").strip()
-                    
-                    # Get poster from Golem
-                    poster_elem = movie_table.find('img', {'class': 'bordeCartel'})
-                    fallback_image_path = None
-                    if poster_elem and 'src' in poster_elem.attrs:
-                        fallback_image_path = self.image_downloader.download(poster_elem['src'])
-                    
-                    # Get TMDb information
-                    tmdb_info = self.tmdb_api.get_movie_info(clean_title)
-                    
-                    # Get TMDb poster if available
-                    image_path = fallback_image_path
-                    if tmdb_info.get('poster_path'):
-                        poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
-                        
-                        # Generate a safe filename for the TMDb poster in lowercase
-                        safe_filename = f"tmdb_{clean_title.lower()}.jpg"
-                        
-                        tmdb_image_path = self.image_downloader.download(
-                            poster_url,
-                            safe_filename
-                        )
-                        if tmdb_image_path:
-                            image_path = tmdb_image_path
-                    
-                    # Get schedules
-                    schedules = []
-                    for schedule in movie_table.find_all('span', {'class': 'horaXXXL'}):
-                        time = schedule.get_text(strip=True)
-                        ticket_link = schedule.find('a', href=True)
-                        ticket_url = None
-                        if ticket_link and 'href' in ticket_link.attrs:
-                            ticket_url = f"https://golem.es{ticket_link['href']}"
-                        
-                        schedules.append(MovieSchedule(
-                            fecha=formatted_date,
-                            hora=time,
-                            enlace_entradas=ticket_url
-                        ))
-                    
-                    # Add movie to results
-                    movies.append(Movie(
-                        título=clean_title,
-                        cartel=image_path or "",
-                        horarios=schedules,
-                        cine=cinema_name,
-                        director=tmdb_info.get('director'),
-                        duración=tmdb_info.get('duración'),
-                        actores=tmdb_info.get('actores'),
-                        sinopsis=tmdb_info.get('sinopsis'),
-                        año=tmdb_info.get('año')
-                    ))
-                    
+                version, page_entries = future.result()
             except requests.exceptions.RequestException as e:
                 logger.error(f"Error scraping {url}: {str(e)}")
+                all_pages_ok = False
                 continue
+            page_versions.append(version)
+            for entry in page_entries:
+                schedules = [MovieSchedule(**schedule) for schedule in entry['horarios']]
+                merged = entries.setdefault(normalizar_titulo(entry['título']), [entry['título'], entry['cartel'], []])
+                merged[1] = merged[1] or entry['cartel']
+                merged[2].extend(schedules)
+        
+        # If every day page is unchanged, the enriched movies from the last run are still valid
+        cache_key = f"golem:merged:{base_url}"
+        if all_pages_ok:
+            cached_movies = cache_html.derivado(cache_key, *page_versions)
+            if cached_movies is not None:
+                logger.info(f"No changes in {cinema_name}; reusing {len(cached_movies)} movies")
+                return [
+                    Movie(**dict(movie, horarios=[MovieSchedule(**h) for h in movie['horarios']]))
+                    for movie in cached_movies
+                ]
+        
+        # Resolve every title not enriched yet (in this run or the previous one) in one concurrent batch
+        with self._enriched_lock:
+            new_titles = [title for key, (title, _, _) in entries.items() if key not in self._enriched]
+        self.tmdb_api.prefetch_movie_info(new_titles)
+        
+        # Second pass: enrichment, once per title and served from the warm cache
+        movies = []
+        for clean_title, poster_src, schedules in entries.values():
+            # Same session listed twice is kept once; times like "9:30" sort before "10:00"
+            unique_schedules = {(sch.fecha, sch.hora, sch.enlace_entradas): sch for sch in schedules}
+            ordered = sorted(unique_schedules.values(), key=lambda sch: (sch.fecha, sch.hora.zfill(5)))
+            movies.append(Movie(
+                título=clean_title,
+                horarios=ordered,
+                cine=cinema_name,
+                **self._enrich_title(clean_title, poster_src)
+            ))
+        
+        if all_pages_ok:
+            cache_html.guardar_derivado(cache_key, dataclass_to_dict(movies), *page_versions)
                 
         return movies
 
@@ -278,8 +462,17 @@ def dataclass_to_dict(obj):
         return [dataclass_to_dict(item) for item in obj]
     return obj
 
+def load_previous_movies(path: str) -> List[Dict]:
+    """Movies saved by the previous run, whose TMDb data can be carried over"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
 def main():
     # Configuration
+    cliente_http.configurar_cassette_desde_argumentos()
     load_dotenv()
     TMDB_API_KEY = os.getenv("TMDB_API_KEY")
     if not TMDB_API_KEY:
@@ -294,22 +487,16 @@ def main():
     IMAGES_FOLDER = "imagenes_peliculas"
     OUTPUT_FILE = "peliculas_vose.json"
     DAYS_TO_SCRAPE = 10
+    REFRESH_DAYS = float(os.getenv("GOLEM_REFRESH_DAYS", ENRICHMENT_REFRESH_DAYS))
 
     # Initialize components
     tmdb_api = TMDbAPI(TMDB_API_KEY)
     image_downloader = ImageDownloader(IMAGES_FOLDER)
-    scraper = MovieScraper(tmdb_api, image_downloader)
-
-    # Scrape all cinemas
-    all_movies = []
-    for cinema in CINEMAS:
-        logger.info(f"Scraping {cinema['name']}...")
-        movies = scraper.scrape_cinema(
-            cinema["base_url"],
-            cinema["name"],
-            DAYS_TO_SCRAPE
-        )
-        all_movies.extend(movies)
+    scraper = MovieScraper(tmdb_api, image_downloader, load_previous_movies(OUTPUT_FILE), REFRESH_DAYS)
+
+    # Scrape all cinemas, with a politeness limit for golem.es
+    cliente_http.limitar_concurrencia("golem.es", GOLEM_MAX_CONCURRENT)
+    all_movies = scraper.scrape_cinemas(CINEMAS, DAYS_TO_SCRAPE)
 
     # Convert dataclass objects to dictionaries before JSON serialization
     movies_data = [dataclass_to_dict(movie) for movie in all_movies]
@@ -1,14 +1,16 @@
 from dotenv import load_dotenv
 import requests
-from bs4 import BeautifulSoup
 import json
 import os
 from datetime import datetime
-import urllib.request
-import re
-from difflib import SequenceMatcher
 import logging
-import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_tmdb
+import cliente_http
+from resolucion_tmdb import ResolutorTMDb, clasificar_candidatos
+from tmdb_async import TMDbBatchClient, precarga_disponible
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -23,135 +25,76 @@ class TMDbAPI:
             "Content-Type": "application/json;charset=utf-8"
         }
         self.base_url = "https://api.themoviedb.org/3"
+        self.resolver = ResolutorTMDb(self._make_request, "yelmo")
 
     def _make_request(self, endpoint: str, params: dict = None) -> dict:
+        return cache_tmdb.consultar(endpoint, params, lambda: self._fetch(endpoint, params))
+
+    def _fetch(self, endpoint: str, params: dict = None) -> dict:
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, headers=self.headers, params=params)
+            response = cliente_http.get(url, headers=self.headers, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error making request to TMDb: {str(e)}")
             return {}
 
-    def _normalize_title(self, title: str) -> str:
-        import unicodedata
-        title = unicodedata.normalize('NFKD', title).encode('ASCII', 'ignore').decode('ASCII')
-        title = re.sub(r'[^a-zA-Z0-9\s]', '', title)
-        return ' '.join(title.lower().split())
-
-    def _title_similarity(self, title1: str, title2: str) -> float:
-        return SequenceMatcher(None, self._normalize_title(title1), self._normalize_title(title2)).ratio()
-
-    def get_movie_info(self, title: str) -> dict:
-        logger.info(f"Searching TMDb for title: {title}")
-
-        # Realizar una búsqueda con el título original
-        search_results = self._make_request("search/movie", params={"query": title, "language": "es"})
-
-        if not search_results or not search_results.get("results"):
-            # Si no hay resultados, intentar en inglés
-            logger.warning(f"No results found for '{title}' in Spanish. Trying English search...")
-            search_results = self._make_request("search/movie", params={"query": title, "language": "en"})
-
-        if not search_results or not search_results.get("results"):
-            logger.warning(f"No results found for: {title} in any language.")
+    def get_movie_info(self, title: str, year=None, director: str = None,
+                       original_title: str = None, key: str = None) -> dict:
+        # Memoria de resoluciones, búsqueda por año, director, título original e inglés
+        movie_id = self.resolver.resolver(title, anio=year, director=director,
+                                          titulo_original=original_title, clave=key)
+        return self.get_movie_info_by_id(movie_id) if movie_id else {}
+    
+    def get_movie_info_by_id(self, movie_id: int) -> dict:
+        # Detalles y créditos en una sola petición
+        details = self._make_request(f"movie/{movie_id}", params={"language": "es", "append_to_response": "credits"})
+        if not details:
+            details = self._make_request(f"movie/{movie_id}", params={"language": "en", "append_to_response": "credits"})
+
+        if not details:
             return {}
+        credits = details.get("credits") or {}
+
+        return {
+            "director": ", ".join(c["name"] for c in credits.get("crew", []) if c["job"] == "Director"),
+            "duración": f"{details.get('runtime', 'Desconocido')} min",
+            "actores": ", ".join(a["name"] for a in credits.get("cast", [])[:5]),
+            "sinopsis": details.get("overview"),
+            "año": details.get("release_date", "")[:4],
+            "poster_path": details.get("poster_path")
+        }
 
-        # Ordenar por fecha de lanzamiento (más reciente primero)
-        results = sorted(search_results["results"], key=lambda x: x.get("release_date", "1900-01-01"), reverse=True)
-
-        # Buscar el mejor match por similitud
-        best_match = None
-        highest_similarity = 0
-
-        for result in results:
-            similarity = self._title_similarity(title, result.get("title", ""))
-            if similarity > highest_similarity:
-                highest_similarity = similarity
-                best_match = result
-
-        if best_match and highest_similarity > 0.6:
-            movie_id = best_match["id"]
-            logger.info(f"Found match: {best_match.get('title')} (ID: {movie_id}, Similarity: {highest_similarity})")
-
-            # Obtener detalles adicionales
-            details = self._make_request(f"movie/{movie_id}", params={"language": "es"})
-            if not details:
-                details = self._make_request(f"movie/{movie_id}", params={"language": "en"})
-
-            credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "es"})
-            if not credits:
-                credits = self._make_request(f"movie/{movie_id}/credits", params={"language": "en"})
-
-            if not details or not credits:
-                return {}
-
-            return {
-                "director": ", ".join(c["name"] for c in credits.get("crew", []) if c["job"] == "Director"),
-                "duración": f"{details.get('runtime', 'Desconocido')} min",
-                "actores": ", ".join(a["name"] for a in credits.get("cast", [])[:5]),
-                "sinopsis": details.get("overview"),
-                "año": details.get("release_date", "")[:4],
-                "poster_path": details.get("poster_path")
-            }
-
-        logger.warning(f"No good match found for: {title}")
-        return {}
+    def prefetch_movie_info(self, titles) -> None:
+        """Rellena la caché compartida para un lote de títulos con peticiones concurrentes"""
+        titles = list(dict.fromkeys(titles))
+        if not titles or not precarga_disponible():
+            return
+        # Los títulos recordados o presentes en los índices locales solo necesitan sus detalles
+        ids_locales = {title: self.resolver.candidatos_locales(title) for title in titles}
+        best_ids = [movie_id for ids in ids_locales.values() if ids for movie_id in ids]
+        titles = [title for title, ids in ids_locales.items() if ids is None]
+        logger.info(f"Precargando datos de TMDb para {len(titles)} títulos y {len(best_ids)} IDs conocidos")
+        try:
+            batch = TMDbBatchClient(self.api_key)
+            search_results = batch.search_many(titles)
+            for title, results in search_results.items():
+                # Mismo orden que el resolutor para desempatar igual
+                candidatos = clasificar_candidatos(title, results)
+                if candidatos:
+                    best_ids.append(candidatos[0]["id"])
+            batch.details_many(best_ids)
+        except Exception as e:
+            logger.warning(f"Error en la precarga de TMDb, se continúa con consultas secuenciales: {str(e)}")
 
 
-# Crear directorio para las imágenes si no existe
 IMAGES_DIR = "imagenes_filmaffinity"
-if not os.path.exists(IMAGES_DIR):
-    os.makedirs(IMAGES_DIR)
-
-print("Scraping yelmocines.es...")
-
-headers = {
-    "accept": "application/json, text/javascript, */*; q=0.01",
-    "accept-language": "es-ES,es;q=0.9,de;q=0.8",
-    "content-type": "application/json; charset=UTF-8",
-    "x-requested-with": "XMLHttpRequest"
-}
-
-data = {"cityKey": "navarra"}
-
-try:
-    # Realizamos la petición POST
-    response = requests.post(
-        "https://www.yelmocines.es/now-playing.aspx/GetNowPlaying",
-        headers=headers,
-        json=data,
-        timeout=10  # Establecemos un timeout razonable
-    )
-    # Eleva una excepción si el código de estado no es 2xx
-    response.raise_for_status()
-
-    # Intentamos parsear la respuesta a JSON
-    datos = response.json()
-
-except requests.exceptions.RequestException as e:
-    # Captura errores de conexión, timeouts o códigos de estado 4xx/5xx
-    print(f"No se ha podido conectar con la web de Yelmo (o error HTTP). Mensaje:\n{e}")
-    print("Saliendo sin lanzar excepción...")
-    sys.exit(0)
-
-except ValueError as e:
-    # Captura errores al decodificar el JSON (JSON malformado)
-    print(f"Error decodificando JSON:\n{e}")
-    print("Saliendo sin lanzar excepción...")
-    sys.exit(0)
-
-# Llegados aquí, la respuesta es JSON y tenemos un status_code 2xx
-print("Contenido recibido (JSON):")
-print(json.dumps(datos, indent=4, ensure_ascii=False))
-
-# Comprobamos si está la clave "d"
-if "d" not in datos:
-    print("La respuesta no contiene la clave 'd'.")
-    print("Saliendo sin lanzar excepción...")
-    sys.exit(0)
-peliculas_filmaffinity = []
+ARCHIVO_SALIDA = "peliculas_filmaffinity.json"
+URL_CARTELERA = "https://www.yelmocines.es/now-playing.aspx/GetNowPlaying"
+CIUDAD_POR_DEFECTO = "navarra"
+# Peticiones GetNowPlaying simultáneas como máximo (una por ciudad)
+MAX_PETICIONES_SIMULTANEAS = 4
 
 MESES = {
     'enero': '01', 'febrero': '02', 'marzo': '03', 'abril': '04',
@@ -159,66 +102,191 @@ MESES = {
     'septiembre': '09', 'octubre': '10', 'noviembre': '11', 'diciembre': '12'
 }
 
-# Inicializar TMDbAPI
-load_dotenv()
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
-tmdb_api = TMDbAPI(TMDB_API_KEY)
-
-for cine in datos['d']['Cinemas']:
-    for fecha in cine['Dates']:
-        fecha_str = fecha['ShowtimeDate']
-        dia, mes = fecha_str.split()
-        mes_numero = MESES[mes.lower()]
-        anoActual = datetime.now().year
-        fecha_iso = f"{anoActual}-{mes_numero}-{dia.zfill(2)}"
-
-        for pelicula in fecha['Movies']:
-            for formato in pelicula['Formats']:
-                if 'VOSE' in formato['Language']:
-                    poster_url = pelicula['Poster']
-                    poster_filename = os.path.join(IMAGES_DIR, f"{pelicula['Key']}.jpg")
-
-                    if not os.path.exists(poster_filename):
-                        urllib.request.urlretrieve(poster_url, poster_filename)
-
-                    tmdb_info = tmdb_api.get_movie_info(pelicula['Title'])
-                    if tmdb_info.get('poster_path'):
-                        tmdb_poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
-                        tmdb_poster_filename = os.path.join(IMAGES_DIR, f"tmdb_{pelicula['Key']}.jpg")
-                        urllib.request.urlretrieve(tmdb_poster_url, tmdb_poster_filename)
-                        poster_filename = tmdb_poster_filename
-
-                    pelicula_existente = next(
-                        (p for p in peliculas_filmaffinity if p['título'] == pelicula['Title']),
-                        None
-                    )
+
+def obtener_cartelera(ciudad: str = CIUDAD_POR_DEFECTO):
+    """Descarga la cartelera de Yelmo de una ciudad; devuelve None si no se pudo obtener"""
+    headers = {
+        "accept": "application/json, text/javascript, */*; q=0.01",
+        "accept-language": "es-ES,es;q=0.9,de;q=0.8",
+        "content-type": "application/json; charset=UTF-8",
+        "x-requested-with": "XMLHttpRequest"
+    }
+
+    try:
+        # Realizamos la petición POST
+        response = cliente_http.post(
+            URL_CARTELERA,
+            headers=headers,
+            json={"cityKey": ciudad},
+            timeout=10  # Establecemos un timeout razonable
+        )
+        # Eleva una excepción si el código de estado no es 2xx
+        response.raise_for_status()
+
+        # Intentamos parsear la respuesta a JSON
+        datos = response.json()
+
+    except requests.exceptions.RequestException as e:
+        # Captura errores de conexión, timeouts o códigos de estado 4xx/5xx
+        print(f"No se ha podido conectar con la web de Yelmo para {ciudad} (o error HTTP). Mensaje:\n{e}")
+        return None
+
+    except ValueError as e:
+        # Captura errores al decodificar el JSON (JSON malformado)
+        print(f"Error decodificando JSON de {ciudad}:\n{e}")
+        return None
+
+    # Llegados aquí, la respuesta es JSON y tenemos un status_code 2xx
+    print(f"Contenido recibido de {ciudad} (JSON):")
+    print(json.dumps(datos, indent=4, ensure_ascii=False))
+
+    # Comprobamos si está la clave "d"
+    if "d" not in datos:
+        print(f"La respuesta de {ciudad} no contiene la clave 'd'.")
+        return None
+    return datos
+
+
+def fecha_iso(fecha_str: str) -> str:
+    """Convierte una fecha de Yelmo ("12 junio") a formato ISO con el año actual"""
+    dia, mes = fecha_str.split()
+    return f"{datetime.now().year}-{MESES[mes.lower()]}-{dia.zfill(2)}"
+
+
+def datos_pelicula(tmdb_api: TMDbAPI, pelicula: dict, memoria: dict) -> tuple:
+    """
+    Cartel e información de TMDb de una película de Yelmo, una sola vez por `Key` aunque
+    aparezca en varios cines, fechas y formatos. Devuelve (ruta del cartel, info de TMDb).
+    """
+    key = pelicula['Key']
+    if key in memoria:
+        return memoria[key]
+
+    poster_filename = os.path.join(IMAGES_DIR, f"{key}.jpg")
+    if not os.path.exists(poster_filename):
+        cliente_http.descargar_archivo(pelicula['Poster'], poster_filename)
+
+    tmdb_info = tmdb_api.get_movie_info(pelicula['Title'], key=key)
+    if tmdb_info.get('poster_path'):
+        tmdb_poster_url = f"https://image.tmdb.org/t/p/w500{tmdb_info['poster_path']}"
+        tmdb_poster_filename = os.path.join(IMAGES_DIR, f"tmdb_{key}.jpg")
+        cliente_http.descargar_archivo(tmdb_poster_url, tmdb_poster_filename)
+        poster_filename = tmdb_poster_filename
+
+    memoria[key] = (poster_filename, tmdb_info)
+    return memoria[key]
+
+
+def obtener_carteleras(ciudades: list) -> dict:
+    """Descarga a la vez la cartelera de varias ciudades; devuelve {ciudad: datos} con las que se obtuvieron"""
+    with ThreadPoolExecutor(max_workers=max(1, min(len(ciudades), MAX_PETICIONES_SIMULTANEAS))) as executor:
+        resultados = list(executor.map(obtener_cartelera, ciudades))
+    return {ciudad: datos for ciudad, datos in zip(ciudades, resultados) if datos is not None}
+
+
+def titulos_vose(datos: dict):
+    """Títulos de las películas con algún formato VOSE en una cartelera"""
+    return (
+        pelicula['Title']
+        for cine in datos['d']['Cinemas']
+        for fecha in cine['Dates']
+        for pelicula in fecha['Movies']
+        if any('VOSE' in formato['Language'] for formato in pelicula['Formats'])
+    )
+
+
+def agregar_cartelera(datos: dict, tmdb_api: TMDbAPI, memoria: dict = None) -> list:
+    """
+    Una entrada por cine y película (`Key`) con todas las sesiones VOSE de todas las fechas.
+    `memoria` guarda el cartel y la información de TMDb por `Key`; se comparte entre ciudades.
+    """
+    # (cine, Key) -> película, en orden de aparición
+    peliculas = {}
+    memoria = {} if memoria is None else memoria
+
+    for cine in datos['d']['Cinemas']:
+        for fecha in cine['Dates']:
+            fecha_sesion = fecha_iso(fecha['ShowtimeDate'])
+
+            for pelicula in fecha['Movies']:
+                for formato in pelicula['Formats']:
+                    if 'VOSE' not in formato['Language']:
+                        continue
 
                     horarios = [
                         {
-                            'fecha': fecha_iso,
+                            'fecha': fecha_sesion,
                             'hora': s['Time'],
                             'enlace_entradas': f"https://compra.yelmocines.es/?cinemaVistaId={s['VistaCinemaId']}&showtimeVistaId={s['ShowtimeId']}"
                         } for s in formato['Showtimes']
                     ]
 
-                    if pelicula_existente:
-                        pelicula_existente['horarios'].extend(horarios)
-                    else:
-                        info = {
-                            'título': pelicula['Title'],
-                            'cartel': poster_filename,
-                            'horarios': horarios,
-                            'cine': f"Yelmo {cine['Name']}",
-                            'director': tmdb_info.get('director'),
-                            'duración': tmdb_info.get('duración'),
-                            'actores': tmdb_info.get('actores'),
-                            'sinopsis': tmdb_info.get('sinopsis'),
-                            'año': tmdb_info.get('año')
-                        }
-                        peliculas_filmaffinity.append(info)
-
-with open('peliculas_filmaffinity.json', 'w', encoding='utf-8') as f:
-    json.dump(peliculas_filmaffinity, f, ensure_ascii=False, indent=4)
-
-print("Archivo JSON peliculas_filmaffinity.json creado con éxito.")
-print("Fin del scraping.")
\ No newline at end of file
+                    clave = (cine['Name'], pelicula['Key'])
+                    if clave in peliculas:
+                        peliculas[clave]['horarios'].extend(horarios)
+                        continue
+
+                    poster_filename, tmdb_info = datos_pelicula(tmdb_api, pelicula, memoria)
+                    peliculas[clave] = {
+                        'título': pelicula['Title'],
+                        'cartel': poster_filename,
+                        'horarios': horarios,
+                        'cine': f"Yelmo {cine['Name']}",
+                        'director': tmdb_info.get('director'),
+                        'duración': tmdb_info.get('duración'),
+                        'actores': tmdb_info.get('actores'),
+                        'sinopsis': tmdb_info.get('sinopsis'),
+                        'año': tmdb_info.get('año')
+                    }
+
+    return list(peliculas.values())
+
+
+def main():
+    # Grabación/reproducción de las respuestas HTTP (--record / --replay)
+    cliente_http.configurar_cassette_desde_argumentos()
+    parser = argparse.ArgumentParser(description='Scraper de la cartelera VOSE de Yelmo')
+    parser.add_argument('--ciudades', nargs='+', default=[CIUDAD_POR_DEFECTO],
+                        help=f'cityKey de las ciudades de Yelmo (default: {CIUDAD_POR_DEFECTO})')
+    parser.add_argument('--por-ciudad', action='store_true',
+                        help='Guardar un archivo por ciudad (peliculas_filmaffinity_<ciudad>.json) en vez de uno combinado')
+    args = parser.parse_args()
+    ciudades = list(dict.fromkeys(args.ciudades))
+
+    # Crear directorio para las imágenes si no existe
+    if not os.path.exists(IMAGES_DIR):
+        os.makedirs(IMAGES_DIR)
+
+    print(f"Scraping yelmocines.es ({', '.join(ciudades)})...")
+    carteleras = obtener_carteleras(ciudades)
+    if not carteleras:
+        print("Saliendo sin lanzar excepción...")
+        return
+
+    # Inicializar TMDbAPI
+    load_dotenv()
+    TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+    tmdb_api = TMDbAPI(TMDB_API_KEY)
+
+    # Enviar a TMDb todos los títulos VOSE de todas las ciudades de una vez antes de recorrer la cartelera
+    tmdb_api.prefetch_movie_info(titulo for datos in carteleras.values() for titulo in titulos_vose(datos))
+
+    # Una película que se proyecta en varias ciudades se completa una sola vez
+    memoria = {}
+    peliculas_por_ciudad = {
+        ciudad: agregar_cartelera(datos, tmdb_api, memoria) for ciudad, datos in carteleras.items()
+    }
+
+    if args.por_ciudad:
+        salidas = {f"peliculas_filmaffinity_{ciudad}.json": peliculas for ciudad, peliculas in peliculas_por_ciudad.items()}
+    else:
+        salidas = {ARCHIVO_SALIDA: [p for peliculas in peliculas_por_ciudad.values() for p in peliculas]}
+
+    for archivo, peliculas in salidas.items():
+        with open(archivo, 'w', encoding='utf-8') as f:
+            json.dump(peliculas, f, ensure_ascii=False, indent=4)
+        print(f"Archivo JSON {archivo} creado con éxito.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archivo_posts import ArchivoPosts
+from extraccion_posts import completar_director
+
+
+def _post(pelicula, director="Desconocido", contenido=""):
+    return {"title": pelicula, "pelicula": pelicula, "director": director, "url": f"https://ejemplo/{pelicula}",
+            "date": "2024-01-01T00:00:00", "content": contenido}
+
+
+def test_compactar_deja_solo_la_version_vigente(tmp_path):
+    archivo = ArchivoPosts(str(tmp_path))
+    for i in range(3):
+        archivo.añadir(_post(f"Película {i}"))
+    archivo.añadir(_post("Película 1", director="Otra Directora"))
+    archivo.guardar()
+    tamano = sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path) if n.endswith(".jsonl"))
+
+    assert archivo.compactar() > 0
+    assert sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path) if n.endswith(".jsonl")) < tamano
+    assert archivo.leer("Película_1_2024-01-01")["director"] == "Otra Directora"
+
+    # Al volver a abrirlo, el índice guardado corresponde a los segmentos nuevos
+    reabierto = ArchivoPosts(str(tmp_path))
+    assert len(reabierto) == 3
+    assert [p["pelicula"] for p in reabierto.recorrer()] == ["Película 0", "Película 2", "Película 1"]
+    assert reabierto.leer("Película_1_2024-01-01")["director"] == "Otra Directora"
+
+
+def test_director_de_la_ficha_solo_si_parece_un_nombre():
+    assert completar_director("Desconocido", "Título Original: X Dirección: Lynne Ramsay País: Reino Unido") \
+        == "Lynne Ramsay"
+    # Texto de la crítica tomado por la ficha, o un nombre de una sola palabra
+    assert completar_director("Desconocido", "Dirección: ha sido inteligente") == "Desconocido"
+    assert completar_director("Desconocido", "Dirección: Kogonada País: EE.UU.") == "Desconocido"
+    assert completar_director("Wes Anderson", "Dirección: Otro Nombre") == "Wes Anderson"
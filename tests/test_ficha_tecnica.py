@@ -0,0 +1,68 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ficha_tecnica import extraer_ficha, tramo_duracion
+
+
+def test_ficha_completa():
+    ficha = extraer_ficha(
+        "Título Original: L´AVENIR Dirección y guión: Mia Hansen-Løve Intérpretes: Isabelle Huppert, "
+        "Edith Scob y Roman Kolinka País: Francia. 2016 Duración: 100 min.ESTRENO: Octubre 2016\n\n"
+        "CRÍTICA:\nEn los últimos segundos…"
+    )
+    assert ficha.titulo_original == "L´AVENIR"
+    assert ficha.directores == ["Mia Hansen-Løve"]
+    assert ficha.interpretes == ["Isabelle Huppert", "Edith Scob", "Roman Kolinka"]
+    assert ficha.paises == ["Francia"]
+    assert ficha.año == 2016
+    assert ficha.duracion == 100
+    assert ficha.estreno == "Octubre 2016"
+
+
+def test_directores_con_iniciales():
+    casos = {
+        "M. Night Shyamalan": "Título Original: ONE THOUSAN A.E. Dirección: M. Night Shyamalan Guión: "
+                              "M. Night Shyamalan y Gary Whitta País: EE.UU. 2013",
+        "J.A. Bayona": "Título Original: LO IMPOSIBLE Dirección: J.A. Bayona Guión: Sergio G. Sánchez",
+        "F. Gary Gray": "Título Original: THE FATE & THE FURIOUS Dirección: F. Gary Gray Guión: Chris Morgan",
+        "C.B. Yi": "Título Original: MONEYBOYS Dirección y guion: C.B. Yi Intérpretes: Ko Kai, J.C. Lin",
+        "Paul W.S. Anderson": "Título Original: MONSTER HUNTER Dirección: Paul W.S. Anderson País: EE.UU. 2020",
+    }
+    for director, contenido in casos.items():
+        assert extraer_ficha(contenido + "\n\nCRÍTICA:\n…").directores == [director]
+
+
+def test_directores_que_comparten_apellido():
+    ficha = extraer_ficha("Título Original: TALK TO ME Dirección: Danny y Michael Philippou País: Australia. 2022")
+    assert ficha.directores == ["Danny Philippou", "Michael Philippou"]
+
+
+def test_fin_de_la_direccion():
+    ficha = extraer_ficha("Título Original: WOMEN TALKING Dirección y guion: Sarah Polley. Novela: Miriam Toews")
+    assert ficha.directores == ["Sarah Polley"]
+
+
+def test_post_sin_ficha():
+    ficha = extraer_ficha(
+        "Manuel Abramovich funde en su “Pornomelancolía” lo viejo y lo nuevo.\n\n"
+        "La dirección: de un modo u otro, ha sido inteligente. País: ninguno. Duración: 90 minutos"
+    )
+    assert ficha == type(ficha)()
+
+
+def test_ficha_sin_separador_solo_primer_parrafo():
+    ficha = extraer_ficha(
+        "Título Original: OREINA Dirección y guión: Koldo Almandoz País: España. 2018\n\n"
+        "Dirección: el resto del texto ya es la crítica"
+    )
+    assert ficha.directores == ["Koldo Almandoz"]
+
+
+def test_tramo_duracion():
+    assert tramo_duracion(None) is None
+    assert tramo_duracion(85) == "<90"
+    assert tramo_duracion(90) == "90-120"
+    assert tramo_duracion(136) == "120-150"
+    assert tramo_duracion(151) == ">150"
@@ -0,0 +1,80 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import resolucion_tmdb
+from resolucion_tmdb import ResolutorTMDb, extraer_pistas
+
+
+@pytest.fixture
+def memoria_temporal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TMDB_RESOLUCIONES_RUTA", str(tmp_path / "resoluciones_tmdb.json"))
+    monkeypatch.setenv("TMDB_CARTELERA_DESACTIVADA", "1")
+    monkeypatch.setenv("TMDB_INDICE_LOCAL_DESACTIVADO", "1")
+    monkeypatch.setattr(resolucion_tmdb, "_memoria_compartida", None)
+
+
+def test_subtitulo_entre_parentesis_es_parte_del_titulo():
+    for fuente in ("golem", "yelmo", "filmoteca"):
+        pistas = extraer_pistas("Misión: Imposible (Sentencia final)", fuente=fuente)
+        assert pistas.titulo == "Misión: Imposible (Sentencia final)"
+        assert pistas.titulo_original is None and pistas.anio is None
+
+
+def test_paises_y_año_de_la_filmoteca():
+    pistas = extraer_pistas("La dolce vita (Italia, Francia, 1960)", fuente="filmoteca")
+    assert (pistas.titulo, pistas.titulo_original, pistas.anio) == ("La dolce vita", None, 1960)
+    assert pistas.titulo_completo == "La dolce vita (Italia, Francia, 1960)"
+
+    pistas = extraer_pistas("Los cazafantasmas (Ghostbusters, EEUU, 1984)", fuente="filmoteca")
+    assert (pistas.titulo, pistas.titulo_original, pistas.anio) == ("Los cazafantasmas", "Ghostbusters", 1984)
+
+    # Otras fuentes no traen estas pistas
+    assert extraer_pistas("Batman (EEUU, 1989)", fuente="yelmo").titulo == "Batman (EEUU, 1989)"
+
+
+def test_director_solo_en_la_fuente_que_lo_pone_en_el_titulo():
+    assert extraer_pistas("TITANE de Julia Ducournau", fuente="ghostintheblog").director == "Julia Ducournau"
+    assert extraer_pistas("TITANE de Julia Ducournau", fuente="golem").director is None
+
+
+def test_busca_el_titulo_completo_antes_que_el_recortado(memoria_temporal):
+    consultas = []
+
+    def consultar(endpoint, params):
+        consultas.append((params["query"], params.get("primary_release_year")))
+        return {"results": []}
+
+    assert ResolutorTMDb(consultar, "filmoteca").resolver("Batman (EEUU, 1989)") is None
+    assert consultas[:4] == [("Batman (EEUU, 1989)", 1989), ("Batman (EEUU, 1989)", None),
+                             ("Batman", 1989), ("Batman", None)]
+
+
+class IndiceLocalFalso:
+    def __init__(self, candidatos):
+        self.candidatos = candidatos
+
+    def buscar(self, titulo, limite=10, umbral=0.6):
+        return self.candidatos
+
+
+def test_indice_local_sin_pistas_exige_popularidad(memoria_temporal):
+    detalles = {"id": 1, "release_date": "1971-01-01", "credits": {"crew": []}}
+    busquedas = []
+
+    def consultar(endpoint, params):
+        if endpoint == "search/movie":
+            busquedas.append(params["query"])
+            return {"results": []}
+        return detalles
+
+    desconocida = IndiceLocalFalso([{"id": 1, "original_title": "La casa", "popularity": 0.6, "similitud": 1.0}])
+    assert ResolutorTMDb(consultar, "yelmo", indice_local=desconocida).resolver("La casa") is None
+    assert busquedas
+
+    popular = IndiceLocalFalso([{"id": 1, "original_title": "La casa", "popularity": 12.0, "similitud": 1.0}])
+    assert ResolutorTMDb(consultar, "yelmo", indice_local=popular).resolver("La casa 2") == 1
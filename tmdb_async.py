@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Cliente asíncrono de TMDB para consultas en lote.
+Lanza muchas peticiones a la vez con un límite de concurrencia y un limitador
+token-bucket ajustado al presupuesto de peticiones de TMDB. Las respuestas pasan
+por la caché compartida (cache_tmdb), de modo que un lote lanzado antes del
+procesamiento secuencial de un scraper deja la caché caliente para sus
+get_movie_info / get_movie_details.
+"""
+
+import time
+import weakref
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+import cache_tmdb
+import cliente_http
+
+logger = logging.getLogger(__name__)
+
+# TMDB admite en torno a 50 peticiones por segundo y 20 conexiones simultáneas por IP
+PETICIONES_POR_SEGUNDO = 40
+RAFAGA_MAXIMA = 40
+CONCURRENCIA_POR_DEFECTO = 8
+
+_aviso_sin_cache = False
+
+
+def precarga_disponible() -> bool:
+    """
+    Indica si merece la pena lanzar una precarga en lote: sus respuestas solo llegan a las
+    consultas secuenciales de los scrapers a través de la caché compartida. Sin caché
+    (TMDB_CACHE_DESACTIVADA=1 o una base que no se pudo abrir) se avisa una vez.
+    """
+    global _aviso_sin_cache
+    if cache_tmdb.cache_activa():
+        return True
+    if not _aviso_sin_cache:
+        _aviso_sin_cache = True
+        logger.warning("La caché de TMDB está desactivada: se omite la precarga en lote y las consultas serán secuenciales")
+    return False
+
+
+class TokenBucket:
+    """Limitador token-bucket seguro entre hilos"""
+
+    def __init__(self, rate: float = PETICIONES_POR_SEGUNDO, capacity: int = RAFAGA_MAXIMA):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta disponer de un token"""
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (ahora - self._ultimo) * self.rate)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.rate
+            time.sleep(espera)
+
+
+class AsyncTMDbClient:
+    def __init__(self, api_key: str, concurrency: int = CONCURRENCIA_POR_DEFECTO,
+                 rate: float = PETICIONES_POR_SEGUNDO, burst: int = RAFAGA_MAXIMA):
+        self.api_key = api_key
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json;charset=utf-8"
+        }
+        self.base_url = "https://api.themoviedb.org/3"
+        self.concurrency = concurrency
+        self._limiter = TokenBucket(rate, burst)
+        # Un semáforo por bucle de eventos (la fachada síncrona crea uno en cada lote)
+        self._semaforos = weakref.WeakKeyDictionary()
+
+    def _semaforo(self) -> asyncio.Semaphore:
+        """Semáforo compartido por todas las peticiones del cliente en el bucle actual"""
+        bucle = asyncio.get_running_loop()
+        semaforo = self._semaforos.get(bucle)
+        if semaforo is None:
+            semaforo = self._semaforos[bucle] = asyncio.Semaphore(self.concurrency)
+        return semaforo
+
+    def _fetch(self, endpoint: str, params: Optional[dict]) -> dict:
+        """Descarga una respuesta respetando el limitador (se ejecuta en un hilo)"""
+        self._limiter.acquire()
+        try:
+            response = cliente_http.get(f"{self.base_url}/{endpoint}", headers=self.headers, params=params)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error en la petición a TMDB ({endpoint}): {str(e)}")
+            return {}
+
+    async def get(self, endpoint: str, params: Optional[dict] = None) -> dict:
+        """Consulta un endpoint a través de la caché compartida"""
+        async with self._semaforo():
+            return await asyncio.to_thread(
+                cache_tmdb.consultar, endpoint, params, lambda: self._fetch(endpoint, params)
+            ) or {}
+
+    async def get_many(self, requests_list: Iterable[Tuple[str, Optional[dict]]]) -> List[dict]:
+        """Consulta varios endpoints en paralelo y devuelve las respuestas en el mismo orden"""
+        return await asyncio.gather(*(self.get(endpoint, params) for endpoint, params in requests_list))
+
+    async def search_many(self, titles: Iterable[str], language: str = "es",
+                          fallback_language: Optional[str] = "en") -> Dict[str, list]:
+        """Busca varios títulos; los que no tienen resultados se repiten en el idioma alternativo"""
+        titles = list(dict.fromkeys(t for t in titles if t))
+        respuestas = await self.get_many(("search/movie", {"query": t, "language": language}) for t in titles)
+        resultados = {t: (r or {}).get("results", []) for t, r in zip(titles, respuestas)}
+
+        sin_resultados = [t for t, r in resultados.items() if not r]
+        if sin_resultados and fallback_language:
+            respuestas = await self.get_many(
+                ("search/movie", {"query": t, "language": fallback_language}) for t in sin_resultados
+            )
+            for t, r in zip(sin_resultados, respuestas):
+                resultados[t] = (r or {}).get("results", [])
+        return resultados
+
+    async def details_many(self, ids: Iterable[int], language: str = "es", fallback_language: Optional[str] = "en",
+                           append_to_response: Optional[str] = "credits") -> Dict[int, dict]:
+        """Obtiene los detalles de varias películas (con créditos añadidos por defecto)"""
+        def params(idioma):
+            p = {"language": idioma}
+            if append_to_response:
+                p["append_to_response"] = append_to_response
+            return p
+
+        ids = list(dict.fromkeys(i for i in ids if i))
+        respuestas = await self.get_many((f"movie/{i}", params(language)) for i in ids)
+        detalles = dict(zip(ids, respuestas))
+
+        sin_detalles = [i for i, d in detalles.items() if not d]
+        if sin_detalles and fallback_language:
+            respuestas = await self.get_many((f"movie/{i}", params(fallback_language)) for i in sin_detalles)
+            detalles.update(zip(sin_detalles, respuestas))
+        return detalles
+
+
+class TMDbBatchClient:
+    """Fachada síncrona del cliente asíncrono, para los scrapers que no usan asyncio"""
+
+    def __init__(self, api_key: str, **kwargs):
+        self._client = AsyncTMDbClient(api_key, **kwargs)
+
+    def get_many(self, requests_list: Iterable[Tuple[str, Optional[dict]]]) -> List[dict]:
+        return asyncio.run(self._client.get_many(list(requests_list)))
+
+    def search_many(self, titles: Iterable[str], **kwargs) -> Dict[str, list]:
+        return asyncio.run(self._client.search_many(list(titles), **kwargs))
+
+    def details_many(self, ids: Iterable[int], **kwargs) -> Dict[int, dict]:
+        return asyncio.run(self._client.details_many(list(ids), **kwargs))